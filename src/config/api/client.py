@@ -0,0 +1,182 @@
+"""
+HTTP client for the external APIs the app depends on.
+
+`ApiClient` keeps one pooled `requests.Session` per API, always sends
+connect/read timeouts, retries idempotent requests a bounded number of times
+with jittered exponential backoff and stops calling an API that keeps
+failing through a `CircuitBreaker`, so a slow or broken upstream fails fast
+instead of tying up workers. `JSONArrayStream` parses large list payloads
+item by item while they download.
+"""
+import json
+import random
+import re
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an API whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds. After that one trial call is let through:
+    it closes the circuit on success and opens it again on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class ApiClient:
+    def __init__(self, timeout=(3.05, 30), max_retries=2, backoff_factor=0.5, backoff_max=10,
+                 breaker=None, pool_maxsize=10, headers=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def get_backoff(self, attempt):
+        # "Full jitter": spread the retries of concurrent callers over the whole window
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, retrying connection errors, timeouts and retryable
+        statuses. The last response is returned even if its status is an
+        error; a failure to get any response is raised.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {url}")
+        kwargs.setdefault('timeout', self.timeout)
+
+        response = error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.get_backoff(attempt - 1))
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success()
+                return response
+            if attempt < self.max_retries:
+                response.close()
+
+        self.breaker.record_failure()
+        if response is not None:
+            return response
+        raise error
+
+
+class JSONArrayStream:
+    """
+    Iterate over the items of the array stored under `key` in a JSON object,
+    decoding them as text `chunks` arrive instead of loading the whole
+    document. Once exhausted, `envelope` holds the rest of the object with
+    that array left empty.
+
+    The array is found by the first ``"key": [`` in the document, so `key`
+    must not appear as an array key earlier on.
+    """
+
+    def __init__(self, chunks, key):
+        self.chunks = iter(chunks)
+        self.pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.decoder = json.JSONDecoder()
+        self.envelope = None
+
+    @classmethod
+    def from_response(cls, response, key, chunk_size=64 * 1024):
+        if response.encoding is None:
+            response.encoding = 'utf-8'
+        return cls(response.iter_content(chunk_size=chunk_size, decode_unicode=True), key)
+
+    def __iter__(self):
+        buffer = ''
+        match = None
+        while match is None:
+            match = self.pattern.search(buffer)
+            if match is None:
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    self.envelope = json.loads(buffer)
+                    return
+                buffer += chunk
+        prefix, buffer = buffer[:match.end() - 1], buffer[match.end():]
+
+        exhausted = False
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                break
+            try:
+                item, end = self.decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                item = end = None
+            # An item that ends with the buffer may still continue, e.g. a number
+            if end is not None and (end < len(buffer) or exhausted):
+                yield item
+                position = end
+                continue
+            if exhausted:
+                raise ValueError("Truncated JSON document")
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                buffer, position = buffer[position:] + chunk, 0
+
+        suffix = buffer[position + 1:] + ''.join(self.chunks)
+        self.envelope = json.loads(prefix + '[]' + suffix)
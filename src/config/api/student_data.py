@@ -1,19 +1,86 @@
+import logging
+from collections import namedtuple
 import requests
+from config.api.client import ApiClient, CircuitBreaker, JSONArrayStream
 
-def fetch_student_data(college_code, API_KEY, API_SECRET_KEY):
-    url = f"https://{college_code}.linways.com/lin-api/v1/academics/student/details"
-    headers = {
+logger = logging.getLogger(__name__)
+
+# Shared by every caller in the process so connections are reused and the circuit is common
+student_api = ApiClient(
+    timeout=(3.05, 30),
+    max_retries=2,
+    backoff_factor=0.5,
+    breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+)
+
+RosterResponse = namedtuple('RosterResponse', ['not_modified', 'students', 'etag', 'last_modified'])
+
+
+class StudentAPIError(Exception):
+    """Raised when the student API could not be reached or returned an error."""
+
+
+def get_student_api_url(college_code):
+    return f"https://{college_code}.linways.com/lin-api/v1/academics/student/details"
+
+
+def get_headers(API_KEY, API_SECRET_KEY):
+    return {
         "apiKey": API_KEY,
         "apiSecretKey": API_SECRET_KEY,
     }
 
+
+def fetch_student_data(college_code, API_KEY, API_SECRET_KEY):
     try:
-        response = requests.get(url, headers=headers)
+        response = student_api.get(get_student_api_url(college_code), headers=get_headers(API_KEY, API_SECRET_KEY))
         if response.status_code == 200:
-            data = response.json()
-            return data
-        else:
-            print(f"Error: {response.status_code} - {response.text}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-    return None
\ No newline at end of file
+            return response.json()
+        logger.error("Student API error: %s - %s", response.status_code, response.text)
+    except (requests.RequestException, ValueError) as e:
+        logger.error("Student API request failed: %s", e)
+    return None
+
+
+def fetch_student_roster(url, API_KEY, API_SECRET_KEY, etag='', last_modified=''):
+    """
+    Conditionally fetch the roster. When the API answers 304 for the given
+    `etag`/`last_modified`, `not_modified` is set and no students are returned.
+
+    Otherwise `students` lazily yields the student records while the payload
+    downloads, and raises `StudentAPIError` at the end if the API reported a
+    failure, so callers must consume it before acting on it.
+    """
+    headers = get_headers(API_KEY, API_SECRET_KEY)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = student_api.get(url, headers=headers, stream=True)
+    except requests.RequestException as e:
+        raise StudentAPIError(f"Student API request failed: {e}") from e
+
+    if response.status_code == 304:
+        response.close()
+        return RosterResponse(True, iter(()), etag, last_modified)
+    if response.status_code != 200:
+        response.close()
+        raise StudentAPIError(f"Student API error: {response.status_code}")
+
+    return RosterResponse(
+        False, _iter_students(response), response.headers.get('ETag', ''), response.headers.get('Last-Modified', '')
+    )
+
+
+def _iter_students(response):
+    stream = JSONArrayStream.from_response(response, 'data')
+    try:
+        yield from stream
+    except (requests.RequestException, ValueError) as e:
+        raise StudentAPIError(f"Could not read the student roster: {e}") from e
+    finally:
+        response.close()
+    if not stream.envelope.get('success'):
+        raise StudentAPIError("Student API returned an unsuccessful response")
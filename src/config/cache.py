@@ -0,0 +1,38 @@
+from django.core.cache import cache
+
+
+def _scope(namespace, org_id=None):
+    return namespace if org_id is None else f"{namespace}:org{org_id}"
+
+
+def get_namespace_version(namespace, org_id=None):
+    """Current version of a namespace, optionally scoped to one organisation."""
+    version_key = f"{_scope(namespace, org_id)}:version"
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, 1, timeout=None)
+        version = cache.get(version_key, 1)
+    return version
+
+
+def bump_namespace(namespace, org_id=None):
+    """
+    Invalidate every key of a namespace at once by moving it to a new version.
+    Old entries are never read again and simply expire.
+    """
+    version_key = f"{_scope(namespace, org_id)}:version"
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, 2, timeout=None)
+        return cache.get(version_key, 2)
+
+
+def make_key(namespace, *parts, org_id=None):
+    """
+    Build a namespaced, versioned cache key such as
+    ``room_settings:org3:v1:42``. Keys that belong to an organisation should
+    always pass `org_id` so they can be invalidated per organisation.
+    """
+    version = get_namespace_version(namespace, org_id)
+    return ":".join([_scope(namespace, org_id), f"v{version}", *(str(part) for part in parts)])
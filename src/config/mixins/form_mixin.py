@@ -1,103 +1,106 @@
 from django import forms
+from django.template import engines
+
+NON_FIELD_ERRORS = (
+    '{% if form.non_field_errors %}'
+    '<div class="alert alert-danger" role="alert">{{ form.non_field_errors|join:" " }}</div>'
+    '{% endif %}'
+)
+FIELD_ERRORS = (
+    '{% if field.errors %}'
+    '<p class="text-danger" style="margin-top: -15px;">{{ field.errors|join:" " }}</p>'
+    '{% endif %}'
+)
+HELP_TEXT = '{% if field.help_text %}<small class="form-text text-muted">{{ field.help_text|safe }}</small>{% endif %}'
+CHECK_LABEL = '<label class="form-check-label" for="{{ field.id_for_label }}">{{ field.label }}</label>'
+
+# Markup of a field, by kind
+FIELD_TEMPLATES = {
+    'switch': f'<div class="form-check form-switch mb-3">{{{{ field }}}}{CHECK_LABEL}{FIELD_ERRORS}{HELP_TEXT}</div>',
+    'checkbox': f'<div class="form-check mb-3">{{{{ field }}}}{CHECK_LABEL}{FIELD_ERRORS}{HELP_TEXT}</div>',
+    'default': (
+        '<p class="form-group">'
+        '{% if field.label %}<label for="{{ field.id_for_label }}" class="mb-1 ps-1">{{ field.label }}</label>{% endif %}'
+        f'{{{{ field }}}}{FIELD_ERRORS}{HELP_TEXT}</p>'
+    ),
+}
+
+
+def bootstrap_classes(widget):
+    """The class attribute of `widget` with the Bootstrap classes for its type added."""
+    if isinstance(widget, (forms.CheckboxInput, forms.RadioSelect)):
+        added = 'form-check-input'
+    elif isinstance(widget, forms.Select):
+        added = 'form-control form-select'
+    else:
+        added = 'form-control'
+    return f"{widget.attrs.get('class', '')} {added}".strip()
+
+
+def field_kind(field):
+    if isinstance(field.widget, forms.CheckboxInput):
+        return 'switch' if getattr(field, 'is_switch', False) else 'checkbox'
+    return 'default'
+
+
+def build_template(layout):
+    """Compile the template rendering the fields of `layout`, ``(name, kind)`` pairs, in order."""
+    source = NON_FIELD_ERRORS + ''.join(
+        f'{{% with field=form.{name} %}}{FIELD_TEMPLATES[kind]}{{% endwith %}}' for name, kind in layout
+    )
+    return engines['django'].from_string(source)
 
 
 class BootstrapFormMixin:
     """
     A mixin to automatically add Bootstrap classes to form fields based on their type,
     show errors below fields without list styling, and display help text.
+
+    Everything that only depends on the form class is worked out once per
+    class: the classes of each widget, and for `as_p` a compiled template per
+    field layout.
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        widget_classes = self.get_widget_classes()
         for field_name, field in self.fields.items():
-            widget = field.widget
+            classes = widget_classes.get(field_name)
+            field.widget.attrs['class'] = classes if classes is not None else bootstrap_classes(field.widget)
+
+    @classmethod
+    def get_widget_classes(cls):
+        # Looked up in the class' own __dict__ so subclasses never share a parent's entries
+        widget_classes = cls.__dict__.get('_bootstrap_widget_classes')
+        if widget_classes is None:
+            widget_classes = {name: bootstrap_classes(field.widget) for name, field in cls.base_fields.items()}
+            cls._bootstrap_widget_classes = widget_classes
+        return widget_classes
 
-            # Add 'form-control' class to all fields except Checkboxes and RadioSelect
-            if isinstance(widget, forms.CheckboxInput):
-                widget.attrs['class'] = widget.attrs.get('class', '') + ' form-check-input'
-            elif isinstance(widget, forms.RadioSelect):
-                widget.attrs['class'] = widget.attrs.get('class', '') + ' form-check-input'
-            else:
-                widget.attrs['class'] = widget.attrs.get('class', '') + ' form-control'
+    def full_clean(self):
+        super().full_clean()
+        # Add Bootstrap class for error styling
+        for field_name in self._errors:
+            if field_name in self.fields:
+                attrs = self.fields[field_name].widget.attrs
+                if 'is-invalid' not in attrs.get('class', '').split():
+                    attrs['class'] = f"{attrs.get('class', '')} is-invalid".strip()
 
-            # Special handling for select elements
-            if isinstance(widget, forms.Select):
-                widget.attrs['class'] += ' form-select'
+    def get_layout(self):
+        return tuple((field_name, field_kind(field)) for field_name, field in self.fields.items())
 
-            # Add Bootstrap class for error styling
-            if field_name in self.errors:
-                widget.attrs['class'] += ' is-invalid'
+    def get_template(self):
+        layout = self.get_layout()
+        templates = type(self).__dict__.get('_bootstrap_templates')
+        if templates is None:
+            templates = type(self)._bootstrap_templates = {}
+        template = templates.get(layout)
+        if template is None:
+            template = templates[layout] = build_template(layout)
+        return template
 
     def as_p(self):
         """
         Render the form fields as <p> elements with Bootstrap styling, error messages,
         and help text. Non-field errors are displayed at the top of the form.
         """
-        output = []
-
-        # Add non-field errors at the top
-        if self.non_field_errors():
-            output.append(f"""
-            <div class="alert alert-danger" role="alert">
-                { " ".join(self.non_field_errors()) }
-            </div>
-            """)
-
-        # Render each field
-        for field_name, field in self.fields.items():
-            # Field widget, errors, and help_text
-            bound_field = self[field_name]
-            field_errors = bound_field.errors
-            is_invalid = 'is-invalid' if field_errors else ''
-
-            error_html = ''
-            if field_errors:
-                error_html = f'<p class="text-danger" style="margin-top: -15px;">{ " ".join(field_errors) }</p>'
-
-            # Help text (if any)
-            help_text_html = ''
-            if field.help_text:
-                help_text_html = f'<small class="form-text text-muted">{field.help_text}</small>'
-
-            # Check if the field should be rendered as a switch
-            is_switch = getattr(field, 'is_switch', False)
-
-            if isinstance(bound_field.field.widget, forms.CheckboxInput) and is_switch:
-                # Render as a switch
-                output.append(f"""
-                <div class="form-check form-switch mb-3">
-                    {bound_field}
-                    <label class="form-check-label" for="{bound_field.id_for_label}">
-                        {bound_field.label}
-                    </label>
-                    {error_html}
-                    {help_text_html}
-                </div>
-                """)
-            elif isinstance(bound_field.field.widget, forms.CheckboxInput):
-                # Render as a regular checkbox
-                output.append(f"""
-                <div class="form-check mb-3">
-                    {bound_field}
-                    <label class="form-check-label" for="{bound_field.id_for_label}">
-                        {bound_field.label}
-                    </label>
-                    {error_html}
-                    {help_text_html}
-                </div>
-                """)
-            else:
-                # Render other fields normally
-                label_html = ''
-                if bound_field.label:  # Only add the label if it is not an empty string
-                    label_html = f'<label for="{bound_field.id_for_label}" class="mb-1 ps-1">{bound_field.label}</label>'
-
-                output.append(f"""
-                <p class="form-group">
-                    {label_html}
-                    {bound_field}
-                    {error_html}
-                    {help_text_html}
-                </p>
-                """)
-
-        return ''.join(output)
\ No newline at end of file
+        return self.get_template().render({'form': self})
@@ -0,0 +1,189 @@
+import base64
+import json
+from datetime import datetime, time, timedelta
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+class KeysetPage:
+    """One page of a keyset-paginated list, used as `page_obj` in templates."""
+
+    def __init__(self, object_list, has_next, has_previous, next_query, previous_query):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_query = next_query
+        self.previous_query = previous_query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetListMixin:
+    """
+    Sorting, filtering and keyset pagination for a `ListView`.
+
+    Pages are fetched with ``WHERE (sort, id) > (last sort value, last id)``
+    instead of ``OFFSET``, so every page costs the same however deep it is and
+    rows inserted meanwhile do not shift the page. Only whitelisted request
+    parameters are used:
+
+    - ``sort``: a key of `sort_fields`, prefixed with ``-`` for descending.
+      Sort fields must be non-null columns of the model itself.
+    - `filter_fields`: each parameter filters on its lookup with an exact match;
+      values the field cannot hold are ignored.
+    - ``from`` / ``to``: an inclusive date range on `date_field`.
+    - ``after`` / ``before``: the cursors of the next and previous page.
+    """
+    paginate_by = 50
+    sort_fields = {'created': 'created_on'}
+    default_sort = '-created'
+    filter_fields = {}
+    date_field = 'created_on'
+
+    def get_sort(self):
+        """The requested sort parameter, falling back to `default_sort`."""
+        sort = self.request.GET.get('sort', '')
+        return sort if sort.lstrip('-') in self.sort_fields else self.default_sort
+
+    def get_sort_field(self):
+        sort = self.get_sort()
+        return self.sort_fields[sort.lstrip('-')], sort.startswith('-')
+
+    def get_lookup_field(self, lookup):
+        """The model field `lookup` ends on, following relations."""
+        model = self.model
+        for name in lookup.split('__'):
+            field = model._meta.get_field(name)
+            model = field.related_model
+        return field
+
+    def get_active_filters(self):
+        """The requested filters, leaving out values their field cannot hold."""
+        filters = {}
+        for param, lookup in self.filter_fields.items():
+            value = self.request.GET.get(param)
+            if not value:
+                continue
+            try:
+                filters[lookup] = self.get_lookup_field(lookup).to_python(value)
+            except ValidationError:
+                continue
+        return filters
+
+    def filter_queryset(self, queryset):
+        queryset = queryset.filter(**self.get_active_filters())
+        if not self.date_field:
+            return queryset
+        start, end = self.get_date_param('from'), self.get_date_param('to')
+        if start:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': self.start_of_day(start)})
+        if end:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': self.start_of_day(end + timedelta(days=1))})
+        return queryset
+
+    def get_date_param(self, param):
+        try:
+            return parse_date(self.request.GET.get(param) or '')
+        except ValueError:
+            return None
+
+    def start_of_day(self, day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def get_queryset(self):
+        return self.filter_queryset(super().get_queryset())
+
+    def encode_cursor(self, obj, field):
+        value = getattr(obj, field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, obj.pk]).encode()).decode()
+
+    def decode_cursor(self, cursor, field):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return self.model._meta.get_field(field).to_python(value), int(pk)
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def get_page_query(self, **cursor):
+        params = self.request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params.update(cursor)
+        return params.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        field, descending = self.get_sort_field()
+        after = self.decode_cursor(self.request.GET.get('after', ''), field)
+        before = None if after else self.decode_cursor(self.request.GET.get('before', ''), field)
+        # Walking backwards reads the rows before the cursor in reverse order
+        backwards = before is not None
+        cursor = before or after
+        ascending = descending == backwards
+
+        if cursor:
+            value, pk = cursor
+            op = 'gt' if ascending else 'lt'
+            queryset = queryset.filter(Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk}))
+        prefix = '' if ascending else '-'
+        rows = list(queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        has_next = (has_more and not backwards) or backwards
+        has_previous = (has_more and backwards) or (cursor is not None and not backwards)
+        page = KeysetPage(
+            rows, has_next, has_previous,
+            next_query=self.get_page_query(after=self.encode_cursor(rows[-1], field)) if has_next and rows else None,
+            previous_query=self.get_page_query(before=self.encode_cursor(rows[0], field)) if has_previous and rows else None,
+        )
+        return None, page, rows, page.has_other_pages()
+
+    def get_sort_options(self):
+        options = []
+        for name in self.sort_fields:
+            label = name.replace('_', ' ').capitalize()
+            options += [(name, f"{label} (ascending)"), (f'-{name}', f"{label} (descending)")]
+        return options
+
+    def get_filter_choices(self):
+        """
+        Choices offered for each filter parameter, as ``{param: [(value, label), ...]}``.
+        Defaults to the choices declared on the filtered model field.
+        """
+        choices = {}
+        for param, lookup in self.filter_fields.items():
+            if '__' not in lookup:
+                field = self.model._meta.get_field(lookup)
+                if field.choices:
+                    choices[param] = [(str(value), label) for value, label in field.flatchoices]
+                elif field.get_internal_type() == 'BooleanField':
+                    choices[param] = [('True', 'Yes'), ('False', 'No')]
+        return choices
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['list_controls'] = {
+            'sort': self.get_sort(),
+            'sort_options': self.get_sort_options(),
+            'filters': [
+                {'name': param, 'label': param.replace('_', ' ').capitalize(), 'choices': param_choices, 'value': self.request.GET.get(param, '')}
+                for param, param_choices in self.get_filter_choices().items()
+            ],
+            'date_from': self.request.GET.get('from', ''),
+            'date_to': self.request.GET.get('to', ''),
+            'has_date_range': bool(self.date_field),
+        }
+        return context
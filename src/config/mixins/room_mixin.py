@@ -0,0 +1,28 @@
+from inventory.room_context import get_room_context
+
+
+class RoomContextMixin:
+    """
+    Exposes the room named by the `room_slug` URL kwarg as `self.room` and its
+    settings as `self.room_settings`, resolving both at most once per request,
+    and adds them to the template context.
+    """
+    room_slug_url_kwarg = 'room_slug'
+
+    def get_room_context(self):
+        return get_room_context(self.request, self.kwargs[self.room_slug_url_kwarg])
+
+    @property
+    def room(self):
+        return self.get_room_context().room
+
+    @property
+    def room_settings(self):
+        return self.get_room_context().room_settings
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.setdefault('room', self.room)
+        context['room_slug'] = self.kwargs[self.room_slug_url_kwarg]
+        context['room_settings'] = self.room_settings
+        return context
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'inventory.middleware.QueryProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -81,6 +83,48 @@ DATABASES = {
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Select with DJANGO_CACHE_BACKEND: "locmem" (per process), "file" (shared
+# between gunicorn workers on one host) or "redis" (needs the redis package).
+#
+# Cached rows, such as room settings, are invalidated by deleting their keys
+# when they change. A locmem cache only drops them in the worker that handled
+# the change while the other workers keep serving the old values until they
+# expire, so it is only allowed with DEBUG on, under the single process
+# development server. Without DEBUG the default is "file".
+
+CACHE_BACKEND = os.environ.get("DJANGO_CACHE_BACKEND") or ("locmem" if DEBUG else "file")
+CACHE_LOCATION = os.environ.get("DJANGO_CACHE_LOCATION")
+
+if CACHE_BACKEND == 'locmem' and not DEBUG:
+    raise ImproperlyConfigured(
+        'DJANGO_CACHE_BACKEND=locmem is not shared between workers; use "file" or "redis" when DEBUG is off.'
+    )
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': CACHE_LOCATION or 'blixtro',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_LOCATION or 'redis://127.0.0.1:6379',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'blixtro',
+        'TIMEOUT': int(os.environ.get("DJANGO_CACHE_TIMEOUT", 300)),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -122,8 +166,62 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+# Room reports are rendered by this many background threads per web process.
+# Set REPORT_WORKERS=0 to leave them to the run_report_jobs management command.
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", 2))
+# A job still pending or running after this many seconds was lost, e.g. with a
+# restarted worker; it is marked failed and the next request queues a new one.
+REPORT_JOB_TIMEOUT = int(os.environ.get("REPORT_JOB_TIMEOUT", 15 * 60))
+
+# Rendered reports of unchanged rooms are served from this directory, keeping
+# at most REPORT_CACHE_MAX_BYTES of the most recently used ones.
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", os.path.join(BASE_DIR, 'report_cache'))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Opt-in query profiler (QUERY_PROFILER_ENABLED=1), see inventory/profiling.py.
+# A QUERY_PROFILER_SAMPLE_RATE share of requests is profiled and logged; with
+# QUERY_PROFILER_HEADER=1 the figures are also sent in an X-Query-Profile header.
+# Requests slower than QUERY_PROFILER_SLOW_MS are written with their slowest
+# queries to QUERY_PROFILER_SLOW_LOG, rotated every QUERY_PROFILER_SLOW_LOG_BYTES.
+QUERY_PROFILER_ENABLED = os.environ.get("QUERY_PROFILER_ENABLED") == "1"
+QUERY_PROFILER_SAMPLE_RATE = float(os.environ.get("QUERY_PROFILER_SAMPLE_RATE", 1.0))
+QUERY_PROFILER_HEADER = os.environ.get("QUERY_PROFILER_HEADER") == "1"
+QUERY_PROFILER_SLOW_MS = float(os.environ.get("QUERY_PROFILER_SLOW_MS", 500))
+QUERY_PROFILER_SLOW_LOG = os.environ.get("QUERY_PROFILER_SLOW_LOG", os.path.join(BASE_DIR, 'slow_requests.log'))
+QUERY_PROFILER_SLOW_LOG_BYTES = int(os.environ.get("QUERY_PROFILER_SLOW_LOG_BYTES", 10 * 1024 * 1024))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'query_profiles': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': QUERY_PROFILER_SLOW_LOG,
+            'maxBytes': QUERY_PROFILER_SLOW_LOG_BYTES,
+            'backupCount': 5,
+            # The file is only created once a slow request is logged
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'inventory.profiling': {
+            'handlers': ['query_profiles'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'inventory.profiling.slow': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -139,4 +237,17 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 COLLEGE_CODE = os.environ.get("COLLEGE_CODE")
 STUDENT_API_KEY = os.environ.get("STUDENT_API_KEY")
 STUDENT_API_SECRET_KEY = os.environ.get("STUDENT_API_SECRET_KEY")
+STUDENT_API_URL = os.environ.get(
+    "STUDENT_API_URL", f"https://{COLLEGE_CODE}.linways.com/lin-api/v1/academics/student/details"
+)
+
+# The local student directory is refreshed in the background once it is older than this (seconds)
+STUDENT_DIRECTORY_MAX_AGE = int(os.environ.get("STUDENT_DIRECTORY_MAX_AGE", 24 * 60 * 60))
+
+# Issue reports verify students against the synced directory ("directory") or an
+# in-process roster cache ("roster") that is served stale for up to
+# STUDENT_ROSTER_STALE_TTL seconds past its TTL while it refreshes in the background.
+STUDENT_LOOKUP = os.environ.get("STUDENT_LOOKUP", "directory")
+STUDENT_ROSTER_TTL = int(os.environ.get("STUDENT_ROSTER_TTL", 60 * 60))
+STUDENT_ROSTER_STALE_TTL = int(os.environ.get("STUDENT_ROSTER_STALE_TTL", 24 * 60 * 60))
 
@@ -8,6 +8,17 @@ DATABASES = {
     }
 }
 
+# Keep tests independent of the environment's cache backend
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blixtro-tests',
+    }
+}
+
+# Report jobs are run explicitly by the tests
+REPORT_WORKERS = 0
+
 # Static files configuration
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
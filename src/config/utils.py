@@ -1,26 +1,183 @@
-import random
+import secrets
 import string
+import threading
+from contextlib import nullcontext
+from django.db import IntegrityError, router, transaction
+
+CODE_ALPHABET = string.ascii_lowercase + string.digits
+SLUG_CODE_LENGTH = 8
+MAX_CODE_ATTEMPTS = 5
+
+
+def generate_code(no_of_char):
+    return ''.join(secrets.choice(CODE_ALPHABET) for _ in range(no_of_char))
+
+
+def _build_slug(model, base_slug, field='slug'):
+    max_length = model._meta.get_field(field).max_length
+    base_slug = base_slug[:max_length - SLUG_CODE_LENGTH - 1].rstrip('-')
+    return f"{base_slug}-{generate_code(SLUG_CODE_LENGTH)}"
 
 
 def generate_unique_slug(instance, base_slug):
-    """Generates a unique slug with a 4-character alphanumeric code."""
-    def generate_code():
-        return ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-    
-    slug = f"{base_slug}-{generate_code()}"
-    model_class = instance.__class__
-    while model_class.objects.filter(slug=slug).exists():
-        slug = f"{base_slug}-{generate_code()}"
-    return slug
-
-
-def generate_unique_code(model, no_of_char=6, unique_field='id'):
-    def generate_code():
-        return ''.join(random.choices(string.ascii_lowercase + string.digits, k=no_of_char))
-    
-    code = generate_code()
-    filter_kwargs = {unique_field: code}
-    model_class = model.__class__
-    while model_class.objects.filter(**filter_kwargs).exists():
-        code = generate_code()
-    return code
\ No newline at end of file
+    """
+    Generates a slug with an 8-character alphanumeric code.
+
+    The table is not probed for an existing slug: collisions are rare enough
+    that the unique constraint catches them and `UniqueSlugMixin` retries.
+    """
+    return _build_slug(instance.__class__, base_slug)
+
+
+def generate_unique_code(no_of_char=6):
+    """Generates a random code for a unique field, relying on its constraint like `generate_unique_slug`."""
+    return generate_code(no_of_char)
+
+
+def reserve_unique_values(model, field, make_value, count):
+    """
+    Returns `count` distinct values for `field` that are not yet used in the
+    table, checking each batch of candidates with a single query.
+    """
+    values = set()
+    while len(values) < count:
+        candidates = {make_value() for _ in range(count - len(values))} - values
+        taken = set(model._default_manager.filter(**{f'{field}__in': candidates}).values_list(field, flat=True))
+        values |= candidates - taken
+    return list(values)
+
+
+def reserve_unique_slugs(model, base_slugs, field='slug'):
+    """
+    Returns one unique slug per entry of `base_slugs`, in order, for bulk
+    inserts. Usually costs a single query for the whole batch.
+    """
+    base_slugs = list(base_slugs)
+    reserved = {}
+    pending = list(range(len(base_slugs)))
+    while pending:
+        candidates = {index: _build_slug(model, base_slugs[index], field) for index in pending}
+        taken = set(model._default_manager.filter(**{f'{field}__in': candidates.values()}).values_list(field, flat=True))
+        taken |= set(reserved.values())
+        pending = []
+        for index, slug in candidates.items():
+            if slug in taken:
+                pending.append(index)
+            else:
+                reserved[index] = slug
+                taken.add(slug)
+    return [reserved[index] for index in range(len(base_slugs))]
+
+
+def reserve_unique_codes(model, count, no_of_char=6, unique_field='id'):
+    """Bulk counterpart of `generate_unique_code`."""
+    return reserve_unique_values(model, unique_field, lambda: generate_code(no_of_char), count)
+
+
+class UniqueSlugMixin:
+    """
+    Model mixin that retries an insert with freshly generated values when one
+    of the `generated_fields` collides with an existing row.
+
+    The model's own `save` fills empty generated fields, so the retry simply
+    clears them (some are derived from each other) and saves again.
+    """
+    generated_fields = ('slug',)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        attempt = getattr(self, '_unique_code_attempt', 0)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # A failed insert only breaks an enclosing transaction, so only then
+        # does the retry need a savepoint to roll back to
+        in_transaction = transaction.get_connection(using).in_atomic_block
+        try:
+            with transaction.atomic(using=using) if in_transaction else nullcontext():
+                return super().save(*args, **kwargs)
+        except IntegrityError:
+            if not self.get_colliding_fields() or attempt + 1 >= MAX_CODE_ATTEMPTS:
+                raise
+            for field in self.generated_fields:
+                setattr(self, field, '')
+            self._unique_code_attempt = attempt + 1
+            try:
+                return self.save(*args, **kwargs)
+            finally:
+                if attempt == 0:
+                    del self._unique_code_attempt
+
+    def get_colliding_fields(self):
+        manager = type(self)._default_manager
+        return [
+            field for field in self.generated_fields
+            if getattr(self, field) and manager.filter(**{field: getattr(self, field)}).exists()
+        ]
+
+
+class LoadedValuesMixin:
+    """
+    Model mixin keeping the field values a row was loaded with, by attname,
+    in `_loaded_values`, so a save can tell what it changes without reading
+    the row again.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        attnames = [self._meta.get_field(name).attname for name in fields] if fields else [
+            field.attname for field in self._meta.concrete_fields if field.attname in self.__dict__
+        ]
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}), **{attname: getattr(self, attname) for attname in attnames}
+        }
+
+    def forget_loaded_values(self, *attnames):
+        """Drop the loaded values of fields changed in the database behind this instance's back."""
+        for attname in attnames:
+            getattr(self, '_loaded_values', {}).pop(attname, None)
+
+
+class CommitBatch:
+    """
+    Work collected while a transaction runs and done once when it commits,
+    such as the index updates of many saved rows. Outside a transaction it is
+    done right away. `create` returns an empty batch and `apply` does the
+    work of one.
+
+    A batch started in a savepoint that is rolled back is dropped with it.
+    Work added to a batch started earlier is done even if the savepoint it was
+    added in is rolled back, so `apply` must accept rows that do not exist.
+    """
+
+    def __init__(self, create, apply):
+        self.create = create
+        self.apply = apply
+        self.local = threading.local()
+
+    def add(self, update):
+        """Add work to the batch of the current transaction by calling `update` with it."""
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            batch = self.create()
+            update(batch)
+            self.apply(batch)
+            return
+        pending = getattr(self.local, 'pending', None)
+        if pending is None or not any(func is pending[1] for _, func, _ in connection.run_on_commit):
+            batch = self.create()
+            pending = self.local.pending = (batch, lambda: self.run(batch))
+            transaction.on_commit(pending[1])
+        update(pending[0])
+
+    def run(self, batch):
+        pending = getattr(self.local, 'pending', None)
+        if pending is not None and pending[0] is batch:
+            self.local.pending = None
+        self.apply(batch)
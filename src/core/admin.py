@@ -1,5 +1,5 @@
 from django.contrib import admin
-from core.models import User, UserProfile, Organisation
+from core.models import User, UserProfile, Organisation, Student
 from django.utils.translation import gettext_lazy as _
 
 
@@ -25,4 +25,8 @@ class OrganisationAdmin(admin.ModelAdmin):
     fieldsets = (
         (_('Organisation'), {'fields': ('name',)}),
     )
-    
\ No newline at end of file
+    
+@admin.register(Student)
+class StudentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'reg_no', 'admission_no', 'synced_on')
+    search_fields = ('name', 'reg_no', 'admission_no')
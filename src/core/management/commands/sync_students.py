@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import student_directory
+
+
+class Command(BaseCommand):
+    help = "Sync the local student directory from the student API."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Download the full roster even if it did not change.")
+
+    def handle(self, *args, **options):
+        try:
+            result = student_directory.sync_students(force=options['force'])
+        except student_directory.StudentSyncError as e:
+            raise CommandError(str(e))
+
+        if result.not_modified:
+            self.stdout.write("Student roster not modified.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Synced students: {result.created} created, {result.updated} updated, {result.deleted} deleted."
+            ))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Student',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reg_no', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('admission_no', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('synced_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentDirectorySync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=255)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('synced_on', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_student_directory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['org', 'first_name'], name='core_userpr_org_id_e6142d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['org', 'last_name'], name='core_userpr_org_id_257aa9_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-18 14:20
+
+from django.db import migrations
+
+# istartswith compiles to UPPER(column) LIKE UPPER(%s) on PostgreSQL and to a
+# case-insensitive LIKE on SQLite, which the plain (org, name) indexes cannot
+# serve. These indexes of the department and people pickers match each form:
+# the upper-cased name with text_pattern_ops, and the name with the NOCASE
+# collation.
+INDEXES = [
+    ('core_department_org_name_prefix', 'core_department', 'organisation_id', 'department_name'),
+    ('core_userprofile_org_first_name_prefix', 'core_userprofile', 'org_id', 'first_name'),
+    ('core_userprofile_org_last_name_prefix', 'core_userprofile', 'org_id', 'last_name'),
+]
+
+POSTGRESQL_FORWARDS = [
+    f"CREATE INDEX {name} ON {table} ({scope}, UPPER({column}) text_pattern_ops)" for name, table, scope, column in INDEXES
+]
+SQLITE_FORWARDS = [
+    f"CREATE INDEX {name} ON {table} ({scope}, {column} COLLATE NOCASE)" for name, table, scope, column in INDEXES
+]
+BACKWARDS = [f"DROP INDEX {name}" for name, _, _, _ in INDEXES]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_profile_name_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRESQL_FORWARDS, 'sqlite': SQLITE_FORWARDS}),
+            run_for_vendor({'postgresql': BACKWARDS, 'sqlite': BACKWARDS}),
+        ),
+    ]
@@ -3,7 +3,7 @@ from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from . user_manager import UserManager
 from django.utils.text import slugify
-from config.utils import generate_unique_slug
+from config.utils import generate_unique_slug, UniqueSlugMixin
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
     
@@ -33,7 +33,7 @@ class User(AbstractUser):
     )
     
 
-class Organisation(models.Model):
+class Organisation(UniqueSlugMixin, models.Model):
     name = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, db_index=True)
     
@@ -47,7 +47,7 @@ class Organisation(models.Model):
         return self.name
     
 
-class Department(models.Model):
+class Department(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation,on_delete=models.CASCADE)
     department_name = models.CharField(max_length=255)
     created_on = models.DateTimeField(auto_now_add=True)
@@ -64,7 +64,7 @@ class Department(models.Model):
         return f"{self.department_name}"
     
     
-class UserProfile(models.Model):
+class UserProfile(UniqueSlugMixin, models.Model):
     user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='profile')
     org = models.ForeignKey(Organisation, null=True, on_delete=models.SET_NULL, related_name='org')
     first_name = models.CharField(max_length=255)
@@ -73,6 +73,9 @@ class UserProfile(models.Model):
     is_incharge = models.BooleanField(_('is room incharge'), default=False)
     is_student = models.BooleanField(_('is student'), default=False)
     slug = models.SlugField(unique=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['org', 'first_name']), models.Index(fields=['org', 'last_name'])]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -84,6 +87,33 @@ class UserProfile(models.Model):
         return f"{str(self.first_name)} {str(self.last_name)}"
     
 
+class Student(models.Model):
+    """Local copy of a student from the college's student API, kept in sync by `sync_students`."""
+    reg_no = models.CharField(max_length=255, blank=True, db_index=True)
+    admission_no = models.CharField(max_length=255, blank=True, db_index=True)
+    name = models.CharField(max_length=255)
+    synced_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class StudentDirectorySync(models.Model):
+    """Single row remembering the last roster sync, for conditional requests to the student API."""
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=255, blank=True)
+    student_count = models.PositiveIntegerField(default=0)
+    synced_on = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def get_state(cls):
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
+
+    def __str__(self):
+        return f"Student directory synced on {self.synced_on}"
+
+
 # Signals
 # Delete User that is associated with UserProfile on its delete
 @receiver(post_delete, sender=UserProfile)
@@ -0,0 +1,149 @@
+"""
+Local directory of students, synced from the college's student API.
+
+Issue reports verify the student with an indexed lookup on `Student` instead
+of downloading the whole roster per submission. The directory is refreshed
+by the ``sync_students`` management command, or in the background once it is
+older than ``STUDENT_DIRECTORY_MAX_AGE``. Syncs send the last ETag and
+Last-Modified back to the API and only write the rows that changed.
+"""
+import logging
+import threading
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from config.api.student_data import StudentAPIError, fetch_student_roster
+from config.cache import make_key
+from core.models import Student, StudentDirectorySync
+from core.student_roster import get_roster_cache
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'student_directory'
+SYNC_LOCK_TIMEOUT = 10 * 60
+BATCH_SIZE = 1000
+
+SyncResult = namedtuple('SyncResult', ['not_modified', 'created', 'updated', 'deleted'])
+
+
+class StudentSyncError(Exception):
+    """Raised when the roster could not be fetched from the student API."""
+
+
+def sync_lock_key():
+    # Students are shared by every organisation, so the key is not scoped to one
+    return make_key(NAMESPACE, 'sync_lock')
+
+
+def find_student(reg_no=None, admission_no=None):
+    lookup = Q()
+    if reg_no:
+        lookup |= Q(reg_no=reg_no)
+    if admission_no:
+        lookup |= Q(admission_no=admission_no)
+    if not lookup:
+        return None
+    return Student.objects.filter(lookup).first()
+
+
+def lookup_student(reg_no=None, admission_no=None):
+    """
+    Find a student for an issue report with the configured ``STUDENT_LOOKUP``.
+    Returns None when the student is unknown or cannot be verified right now.
+    """
+    try:
+        if settings.STUDENT_LOOKUP == 'roster':
+            return get_roster_cache().find_student(reg_no, admission_no)
+        ensure_fresh()
+    except (StudentSyncError, StudentAPIError):
+        logger.exception("Could not refresh the student roster")
+        if settings.STUDENT_LOOKUP == 'roster':
+            return None
+    # Verify against whatever the directory already holds
+    return find_student(reg_no, admission_no)
+
+
+def sync_students(force=False):
+    """Fetch the roster and apply it to the directory. `force` ignores the stored ETag."""
+    state = StudentDirectorySync.get_state()
+    try:
+        roster = fetch_student_roster(
+            settings.STUDENT_API_URL, settings.STUDENT_API_KEY, settings.STUDENT_API_SECRET_KEY,
+            etag='' if force else state.etag, last_modified='' if force else state.last_modified,
+        )
+        if roster.not_modified:
+            result = SyncResult(True, 0, 0, 0)
+        else:
+            result = apply_roster(roster.students)
+    except StudentAPIError as e:
+        raise StudentSyncError(str(e)) from e
+
+    if not result.not_modified:
+        state.etag = roster.etag
+        state.last_modified = roster.last_modified
+        state.student_count = Student.objects.count()
+    state.synced_on = timezone.now()
+    state.save()
+    return result
+
+
+def apply_roster(students):
+    """
+    Make the directory match `students` (records of the student API), writing
+    only new, renamed and removed students. `students` is fully consumed
+    before anything is written.
+    """
+    incoming = {}
+    for student in students:
+        key = (student.get('regNo') or '', student.get('admissionNo') or '')
+        if any(key):
+            incoming[key] = student.get('studentName') or ''
+
+    existing = {
+        (reg_no, admission_no): (pk, name)
+        for pk, reg_no, admission_no, name in Student.objects.values_list('pk', 'reg_no', 'admission_no', 'name').iterator()
+    }
+
+    to_create = [
+        Student(reg_no=reg_no, admission_no=admission_no, name=name)
+        for (reg_no, admission_no), name in incoming.items() if (reg_no, admission_no) not in existing
+    ]
+    to_update = [
+        Student(pk=existing[key][0], name=name, synced_on=timezone.now())
+        for key, name in incoming.items() if key in existing and existing[key][1] != name
+    ]
+    to_delete = [pk for key, (pk, _) in existing.items() if key not in incoming]
+
+    with transaction.atomic():
+        Student.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Student.objects.bulk_update(to_update, ['name', 'synced_on'], batch_size=BATCH_SIZE)
+        for start in range(0, len(to_delete), BATCH_SIZE):
+            Student.objects.filter(pk__in=to_delete[start:start + BATCH_SIZE]).delete()
+    return SyncResult(False, len(to_create), len(to_update), len(to_delete))
+
+
+def ensure_fresh():
+    """
+    Make sure the directory can be used. It is synced in place the very first
+    time, and refreshed by a background thread once it is stale.
+    """
+    state = StudentDirectorySync.get_state()
+    if state.synced_on is None:
+        sync_students()
+    elif state.synced_on < timezone.now() - timedelta(seconds=settings.STUDENT_DIRECTORY_MAX_AGE):
+        if cache.add(sync_lock_key(), True, timeout=SYNC_LOCK_TIMEOUT):
+            threading.Thread(target=_sync_in_background, daemon=True).start()
+
+
+def _sync_in_background():
+    try:
+        sync_students()
+    except Exception:
+        logger.exception("Background student directory sync failed")
+    finally:
+        cache.delete(sync_lock_key())
+        close_old_connections()
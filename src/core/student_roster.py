@@ -0,0 +1,109 @@
+"""
+In-process TTL cache of the student roster.
+
+An alternative to the synced `Student` directory for deployments that do not
+run ``sync_students`` (``STUDENT_LOOKUP = "roster"``). The roster is indexed
+by registration and admission number once per refresh, so lookups are dict
+gets. Once the roster is older than ``STUDENT_ROSTER_TTL`` it keeps being
+served while a single background thread refreshes it; only a roster older
+than ``STUDENT_ROSTER_TTL + STUDENT_ROSTER_STALE_TTL`` (or none at all) makes
+the caller wait for the student API.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from config.api.student_data import fetch_student_roster
+from core.models import Student
+
+logger = logging.getLogger(__name__)
+
+
+def build_index(students):
+    index = {}
+    for student in students:
+        record = Student(
+            reg_no=student.get('regNo') or '',
+            admission_no=student.get('admissionNo') or '',
+            name=student.get('studentName') or '',
+        )
+        if record.reg_no:
+            index[('reg_no', record.reg_no)] = record
+        if record.admission_no:
+            index[('admission_no', record.admission_no)] = record
+    return index
+
+
+class RosterCache:
+
+    def __init__(self, ttl, stale_ttl):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.index = None
+        self.loaded_at = None
+        self.etag = ''
+        self.refresh_lock = threading.Lock()
+        self.stats = Counter()
+
+    def fetch(self):
+        roster = fetch_student_roster(
+            settings.STUDENT_API_URL, settings.STUDENT_API_KEY, settings.STUDENT_API_SECRET_KEY,
+            etag=self.etag if self.index is not None else '',
+        )
+        index = self.index if roster.not_modified else build_index(roster.students)
+        self.index, self.etag, self.loaded_at = index, roster.etag, time.monotonic()
+        self.stats['refreshes'] += 1
+
+    def get_index(self):
+        index, loaded_at = self.index, self.loaded_at
+        if index is not None:
+            age = time.monotonic() - loaded_at
+            if age < self.ttl:
+                self.stats['hits'] += 1
+                return index
+            if age < self.ttl + self.stale_ttl:
+                self.stats['stale_hits'] += 1
+                self.refresh_in_background()
+                return index
+
+        self.stats['misses'] += 1
+        with self.refresh_lock:
+            # Another caller may have loaded it while we waited for the lock
+            if self.loaded_at == loaded_at:
+                self.fetch()
+        return self.index
+
+    def refresh_in_background(self):
+        if not self.refresh_lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        try:
+            self.fetch()
+        except Exception:
+            self.stats['refresh_errors'] += 1
+            logger.exception("Student roster refresh failed, serving the stale roster")
+        finally:
+            self.refresh_lock.release()
+
+    def find_student(self, reg_no=None, admission_no=None):
+        index = self.get_index()
+        return (reg_no and index.get(('reg_no', reg_no))) or (admission_no and index.get(('admission_no', admission_no))) or None
+
+    def clear(self):
+        with self.refresh_lock:
+            self.index = self.loaded_at = None
+            self.etag = ''
+            self.stats.clear()
+
+
+_roster_cache = None
+
+
+def get_roster_cache():
+    global _roster_cache
+    if _roster_cache is None:
+        _roster_cache = RosterCache(settings.STUDENT_ROSTER_TTL, settings.STUDENT_ROSTER_STALE_TTL)
+    return _roster_cache
@@ -1,3 +1,341 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+import requests
+from django.core.cache import cache
+from django.core.management import call_command
+from django import forms
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from config.api.client import ApiClient, CircuitBreaker, CircuitOpenError, JSONArrayStream
+from config.cache import make_key, bump_namespace
+from config.mixins.form_mixin import BootstrapFormMixin
+from core import student_directory
+from core.student_roster import RosterCache
+from core.models import Organisation, Student, StudentDirectorySync, User, UserProfile
+from inventory.models import Issue, Room
 
-# Create your tests here.
+
+class CacheKeyTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_keys_are_scoped_per_organisation(self):
+        self.assertEqual(make_key('rooms', 7, org_id=1), 'rooms:org1:v1:7')
+        self.assertNotEqual(make_key('rooms', 7, org_id=1), make_key('rooms', 7, org_id=2))
+
+    def test_bump_invalidates_only_that_organisation(self):
+        key = make_key('rooms', 7, org_id=1)
+        other_key = make_key('rooms', 7, org_id=2)
+        bump_namespace('rooms', org_id=1)
+        self.assertNotEqual(make_key('rooms', 7, org_id=1), key)
+        self.assertEqual(make_key('rooms', 7, org_id=2), other_key)
+
+
+class SampleForm(BootstrapFormMixin, forms.Form):
+    name = forms.CharField(help_text="As <em>printed</em>.", widget=forms.TextInput(attrs={'class': 'wide'}))
+    kind = forms.ChoiceField(choices=[('a', 'A'), ('b', 'B')])
+    notify = forms.BooleanField(required=False)
+    enabled = forms.BooleanField(required=False)
+    enabled.is_switch = True
+
+    def clean_name(self):
+        raise forms.ValidationError("No <script> please.")
+
+
+class BootstrapFormMixinTests(SimpleTestCase):
+
+    def test_widget_classes_are_worked_out_once_per_class(self):
+        form = SampleForm()
+        self.assertEqual(form.fields['name'].widget.attrs['class'], 'wide form-control')
+        self.assertEqual(form.fields['kind'].widget.attrs['class'], 'form-control form-select')
+        self.assertEqual(form.fields['notify'].widget.attrs['class'], 'form-check-input')
+        self.assertIn('_bootstrap_widget_classes', SampleForm.__dict__)
+        self.assertEqual(SampleForm().fields['name'].widget.attrs['class'], 'wide form-control')
+
+    def test_bound_forms_are_validated_only_when_asked(self):
+        form = SampleForm({'name': "x", 'kind': 'a'})
+        self.assertIsNone(form._errors)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.fields['name'].widget.attrs['class'], 'wide form-control is-invalid')
+        form.full_clean()
+        self.assertEqual(form.fields['name'].widget.attrs['class'].count('is-invalid'), 1)
+
+    def test_as_p_renders_fields_with_escaped_errors(self):
+        form = SampleForm({'name': "x", 'kind': 'c'})
+        form.is_valid()
+        html = form.as_p()
+        self.assertIn("No &lt;script&gt; please.", html)
+        self.assertIn('<small class="form-text text-muted">As <em>printed</em>.</small>', html)
+        self.assertIn('<div class="form-check form-switch mb-3"><input type="checkbox" name="enabled"', html)
+        self.assertIn('<div class="form-check mb-3"><input type="checkbox" name="notify"', html)
+        self.assertIn('<label for="id_kind" class="mb-1 ps-1">Kind</label>', html)
+        self.assertIn('class="wide form-control is-invalid"', html)
+
+    def test_template_is_compiled_once_per_layout(self):
+        form = SampleForm()
+        template = form.get_template()
+        self.assertIs(SampleForm().get_template(), template)
+
+        del form.fields['notify']
+        self.assertIsNot(form.get_template(), template)
+        self.assertNotIn('name="notify"', form.as_p())
+
+        class SubForm(SampleForm):
+            pass
+        self.assertIsNot(SubForm().get_template(), template)
+
+
+class StubStudentAPI(BaseHTTPRequestHandler):
+    """Serves `roster` like the student API, honouring If-None-Match."""
+    roster = []
+    success = True
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps({'success': self.success, 'data': self.roster}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubStudentAPIMixin:
+    """Points the student API settings at a local `StubStudentAPI` server."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubStudentAPI)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(
+            STUDENT_API_URL=f"http://127.0.0.1:{cls.server.server_port}/students",
+            STUDENT_API_KEY='key', STUDENT_API_SECRET_KEY='secret',
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubStudentAPI.roster = [
+            {'regNo': 'R1', 'admissionNo': 'A1', 'studentName': 'Asha'},
+            {'regNo': 'R2', 'admissionNo': 'A2', 'studentName': 'Ben'},
+        ]
+        StubStudentAPI.etag = '"v1"'
+        StubStudentAPI.requests = []
+
+
+class StudentDirectoryTests(StubStudentAPIMixin, TestCase):
+
+    def test_sync_indexes_students_by_both_numbers(self):
+        result = student_directory.sync_students()
+        self.assertEqual((result.created, result.updated, result.deleted), (2, 0, 0))
+        self.assertEqual(student_directory.find_student(reg_no='R1').name, 'Asha')
+        self.assertEqual(student_directory.find_student(admission_no='A2').name, 'Ben')
+        self.assertIsNone(student_directory.find_student(reg_no='R9'))
+        self.assertEqual(StubStudentAPI.requests[0]['apiKey'], 'key')
+
+    def test_unchanged_roster_is_not_downloaded_again(self):
+        student_directory.sync_students()
+        result = student_directory.sync_students()
+        self.assertTrue(result.not_modified)
+        self.assertEqual(StubStudentAPI.requests[1]['If-None-Match'], '"v1"')
+
+    def test_sync_writes_only_changes(self):
+        student_directory.sync_students()
+        StubStudentAPI.roster = [
+            {'regNo': 'R1', 'admissionNo': 'A1', 'studentName': 'Asha K'},
+            {'regNo': 'R3', 'admissionNo': 'A3', 'studentName': 'Chen'},
+        ]
+        StubStudentAPI.etag = '"v2"'
+        out = StringIO()
+        call_command('sync_students', stdout=out)
+        self.assertIn('1 created, 1 updated, 1 deleted', out.getvalue())
+        self.assertEqual(
+            sorted(Student.objects.values_list('reg_no', 'name')), [('R1', 'Asha K'), ('R3', 'Chen')]
+        )
+
+    def test_issue_report_is_verified_against_the_directory(self):
+        org = Organisation.objects.create(name="Test College")
+        profile = UserProfile.objects.create(
+            user=User.objects.create_user(email="incharge@example.com", password="password"),
+            org=org, first_name="Room", last_name="Incharge",
+        )
+        room = Room.objects.create(organisation=org, label="L1", room_name="Lab", incharge=profile)
+        url = reverse('student:report_issue')
+        data = {'reg_no': 'R2', 'subject': 'Broken fan', 'description': 'Fan', 'room': room.pk}
+
+        self.client.post(url, data)
+        self.assertEqual(Issue.objects.get().created_by, 'Ben')
+        self.assertEqual(len(StubStudentAPI.requests), 1)
+
+        response = self.client.post(url, {**data, 'reg_no': 'R9'})
+        self.assertContains(response, 'Student not found.')
+        self.assertEqual(len(StubStudentAPI.requests), 1)
+
+    def test_unsuccessful_roster_is_not_applied(self):
+        student_directory.sync_students()
+        StubStudentAPI.roster = []
+        StubStudentAPI.etag = '"v2"'
+        with mock.patch.object(StubStudentAPI, 'success', False):
+            with self.assertRaises(student_directory.StudentSyncError):
+                student_directory.sync_students()
+        self.assertEqual(Student.objects.count(), 2)
+
+    def test_stale_directory_is_refreshed_once_at_a_time(self):
+        cache.clear()
+        student_directory.sync_students()
+        StudentDirectorySync.objects.update(synced_on=timezone.now() - timedelta(days=30))
+        with mock.patch.object(student_directory.threading, 'Thread') as thread:
+            student_directory.ensure_fresh()
+            student_directory.ensure_fresh()
+        self.assertEqual(thread.call_count, 1)
+        self.assertTrue(cache.get(student_directory.sync_lock_key()))
+
+
+@override_settings(STUDENT_LOOKUP='roster')
+class StudentRosterCacheTests(StubStudentAPIMixin, SimpleTestCase):
+
+    def make_cache(self):
+        return RosterCache(ttl=60, stale_ttl=600)
+
+    def test_lookups_are_served_from_the_cached_index(self):
+        roster_cache = self.make_cache()
+        self.assertEqual(roster_cache.find_student(reg_no='R1').name, 'Asha')
+        self.assertEqual(roster_cache.find_student(admission_no='A2').name, 'Ben')
+        self.assertIsNone(roster_cache.find_student(reg_no='R9', admission_no='A9'))
+        self.assertEqual(len(StubStudentAPI.requests), 1)
+        self.assertEqual((roster_cache.stats['misses'], roster_cache.stats['hits']), (1, 2))
+
+    def test_expired_roster_is_served_stale_while_it_refreshes(self):
+        roster_cache = self.make_cache()
+        roster_cache.find_student(reg_no='R1')
+        StubStudentAPI.roster = [{'regNo': 'R1', 'admissionNo': 'A1', 'studentName': 'Asha K'}]
+        StubStudentAPI.etag = '"v2"'
+        roster_cache.loaded_at -= 120
+
+        self.assertEqual(roster_cache.find_student(reg_no='R1').name, 'Asha')
+        self.assertEqual(roster_cache.stats['stale_hits'], 1)
+        with roster_cache.refresh_lock:
+            pass
+        self.assertEqual(roster_cache.find_student(reg_no='R1').name, 'Asha K')
+        self.assertEqual(roster_cache.stats['refreshes'], 2)
+
+    def test_unchanged_roster_keeps_the_index(self):
+        roster_cache = self.make_cache()
+        roster_cache.find_student(reg_no='R1')
+        index = roster_cache.index
+        roster_cache.loaded_at -= 10000
+        roster_cache.find_student(reg_no='R1')
+        self.assertIs(roster_cache.index, index)
+        self.assertEqual(StubStudentAPI.requests[1]['If-None-Match'], '"v1"')
+
+    def test_lookup_student_uses_the_roster_cache(self):
+        with mock.patch('core.student_directory.get_roster_cache', return_value=self.make_cache()):
+            self.assertEqual(student_directory.lookup_student(reg_no='R2').name, 'Ben')
+
+
+class FlakyAPI(BaseHTTPRequestHandler):
+    """Answers with the queued `statuses` first, then 200."""
+    statuses = []
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        status = type(self).statuses.pop(0) if type(self).statuses else 200
+        self.send_response(status)
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class ApiClientTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyAPI)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FlakyAPI.statuses = []
+        FlakyAPI.hits = 0
+
+    def test_retryable_statuses_are_retried(self):
+        FlakyAPI.statuses = [503, 502]
+        client = ApiClient(max_retries=2, backoff_factor=0)
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.assertEqual(FlakyAPI.hits, 3)
+
+    def test_retries_are_bounded(self):
+        FlakyAPI.statuses = [503] * 5
+        client = ApiClient(max_retries=1, backoff_factor=0)
+        self.assertEqual(client.get(self.url).status_code, 503)
+        self.assertEqual(FlakyAPI.hits, 2)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        FlakyAPI.statuses = [503] * 2
+        client = ApiClient(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        client.get(self.url)
+        client.get(self.url)
+        with self.assertRaises(CircuitOpenError):
+            client.get(self.url)
+        self.assertEqual(FlakyAPI.hits, 2)
+
+        client.breaker.opened_at -= 60
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.assertFalse(client.breaker.is_open)
+
+    def test_connection_errors_are_raised_after_retries(self):
+        client = ApiClient(max_retries=1, backoff_factor=0, timeout=0.5)
+        with self.assertRaises(requests.ConnectionError):
+            client.get("http://127.0.0.1:1/")
+
+
+class JSONArrayStreamTests(SimpleTestCase):
+    document = json.dumps({
+        'success': True,
+        'data': [{'name': 'A "quoted" ] name'}, 12345, 'text, with comma', [1, [2]], None],
+        'count': 5,
+    })
+
+    def test_items_are_decoded_across_chunk_boundaries(self):
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(size=size):
+                chunks = [self.document[i:i + size] for i in range(0, len(self.document), size)]
+                stream = JSONArrayStream(chunks, 'data')
+                self.assertEqual(list(stream), json.loads(self.document)['data'])
+                self.assertEqual(stream.envelope, {'success': True, 'data': [], 'count': 5})
+
+    def test_truncated_document_is_rejected(self):
+        with self.assertRaises(ValueError):
+            list(JSONArrayStream([self.document[:40]], 'data'))
@@ -0,0 +1,153 @@
+"""
+Choices of the pickers of the inventory forms, scoped to an organisation.
+
+Each source is a model an organisation picks rows of; sources whose rows
+belong to a room are narrowed to the room of the form when there is one.
+Forms limit their model choice fields with `limit_choices`; querysets stay
+lazy until the field is rendered or a value is validated. A picker renders
+at most ``SELECT_LIMIT`` options: past that it only renders the selected one
+and its other choices are searched through the autocomplete endpoint of the
+room, or of the organisation for forms outside a room, backed by `search`.
+
+Searches match a prefix of the source's search fields, ignoring case, on
+``(room or organisation, field)`` indexes built for case-insensitive prefix
+matches on PostgreSQL and SQLite, return at most ``MAX_RESULTS``
+rows and are cached for ``CACHE_TIMEOUT`` seconds, under a namespace per
+organisation moved to a new version when a transaction changing rows of a
+source commits.
+"""
+import hashlib
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from config.cache import bump_namespace, make_key
+from config.utils import CommitBatch
+from core.models import Department, UserProfile
+from inventory.forms.widgets import AutocompleteSelect
+from inventory.models import Brand, Category, Item, Vendor
+
+NAMESPACE = 'autocomplete'
+
+# Options rendered by a picker before it switches to search
+SELECT_LIMIT = 100
+
+# Results of one search, by default and at most
+RESULT_LIMIT = 20
+MAX_RESULTS = 50
+
+# Seconds a search result is reused; writes through the ORM drop it sooner
+CACHE_TIMEOUT = 60
+
+
+class ChoiceSource:
+    """
+    The rows of `model` an organisation picks from, matched on the prefix of
+    any of `search_fields` and ordered by them. Rows of models with a
+    `room_field` are narrowed to the room when one is given.
+    """
+
+    def __init__(self, model, search_fields, org_field='organisation', room_field='room'):
+        self.model = model
+        self.search_fields = search_fields
+        self.org_field = org_field
+        self.room_field = room_field
+
+    def scope(self, organisation_id, room=None):
+        if room is not None and self.room_field:
+            return {f'{self.room_field}_id': room.pk}
+        return {f'{self.org_field}_id': organisation_id}
+
+    def queryset(self, organisation_id, room=None):
+        return self.model.objects.filter(**self.scope(organisation_id, room)).only(*self.search_fields).order_by(
+            *self.search_fields, 'pk'
+        )
+
+    def matching(self, organisation_id, prefix, room=None):
+        condition = Q()
+        for field in self.search_fields:
+            condition |= Q(**{f'{field}__istartswith': prefix})
+        return self.queryset(organisation_id, room).filter(condition)
+
+
+SOURCES = {
+    'category': ChoiceSource(Category, ['category_name']),
+    'brand': ChoiceSource(Brand, ['brand_name']),
+    'item': ChoiceSource(Item, ['item_name']),
+    'vendor': ChoiceSource(Vendor, ['vendor_name'], room_field=None),
+    'department': ChoiceSource(Department, ['department_name'], room_field=None),
+    'person': ChoiceSource(UserProfile, ['first_name', 'last_name'], org_field='org', room_field=None),
+}
+
+
+def get_url(source_name, room=None):
+    if room is not None:
+        return reverse('room_incharge:autocomplete', kwargs={'room_slug': room.slug, 'source': source_name})
+    return reverse('central_admin:autocomplete', kwargs={'source': source_name})
+
+
+def limit_choices(field, source_name, organisation_id, room=None):
+    """
+    Limit the model choice `field` to the rows of `source_name` in the
+    organisation, or in `room`, searched once there are many.
+    """
+    if organisation_id is None:
+        field.queryset = field.queryset.none()
+        return
+    field.widget = AutocompleteSelect(get_url(source_name, room), limit=SELECT_LIMIT, attrs=field.widget.attrs)
+    field.widget.is_required = field.required
+    # Setting the queryset hands the new widget its choices
+    field.queryset = SOURCES[source_name].queryset(organisation_id, room)
+
+
+def search(source_name, organisation_id, prefix, room=None, limit=RESULT_LIMIT):
+    """
+    The first `limit` choices of `source_name` in the organisation, or in
+    `room`, whose search fields start with `prefix`, ignoring case, as
+    ``{'id', 'text'}`` dicts, and whether more match.
+    """
+    source = SOURCES[source_name]
+    prefix = prefix.strip()
+    scope = ','.join(f'{name}={value}' for name, value in source.scope(organisation_id, room).items())
+    key = make_key(
+        NAMESPACE, source_name, scope, limit, hashlib.md5(prefix.lower().encode()).hexdigest(),
+        org_id=organisation_id,
+    )
+    found = cache.get(key)
+    if found is None:
+        rows = list(source.matching(organisation_id, prefix, room)[:limit + 1])
+        found = ([{'id': row.pk, 'text': str(row)} for row in rows[:limit]], len(rows) > limit)
+        cache.set(key, found, CACHE_TIMEOUT)
+    return found
+
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return RESULT_LIMIT
+    return min(max(limit, 1), MAX_RESULTS)
+
+
+def autocomplete_response(request, source_name, organisation_id, room=None):
+    """The JSON answer to a search of `source_name` with the ``q`` and ``limit`` parameters of `request`."""
+    if source_name not in SOURCES:
+        raise Http404("Unknown choices.")
+    results, more = search(
+        source_name, organisation_id, request.GET.get('q', ''), room=room, limit=parse_limit(request.GET.get('limit')),
+    )
+    return JsonResponse({'results': results, 'more': more})
+
+
+def forget(org_id):
+    """Drop the cached searches of an organisation once the transaction commits."""
+    pending.add(lambda organisation_ids: organisation_ids.add(org_id))
+
+
+def forget_all(organisation_ids):
+    for org_id in organisation_ids:
+        bump_namespace(NAMESPACE, org_id=org_id)
+
+
+# Organisations whose sources changed in the current transaction
+pending = CommitBatch(set, forget_all)
@@ -0,0 +1,139 @@
+"""
+Page benchmarks over a seeded organisation.
+
+`page_urls` lists every page of the room incharge and central admin URL
+configurations, filled in with rows of one room of the organisation, and
+`measure_pages` requests each of them through the test client. A page is
+requested once to warm the caches, `repeat` times to count its queries and
+time it, then once more under ``tracemalloc`` for the peak memory allocated
+while handling it, which would skew the timings otherwise. Every request
+runs in a savepoint rolled back afterwards, so pages that write on GET see
+the same data on every run.
+
+Results are plain dicts meant to be stored as a JSON baseline; `compare`
+lists the pages that regressed against one.
+"""
+import statistics
+import time
+import tracemalloc
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from inventory.models import ItemGroupItem, Purchase, ReportJob, SystemComponent, Vendor
+from inventory.urls import central_admin as central_admin_urls
+from inventory.urls import room_incharge as room_incharge_urls
+
+URLCONFS = (room_incharge_urls, central_admin_urls)
+
+
+def _last(queryset):
+    return queryset.order_by('pk').last()
+
+
+def sample_kwargs(org):
+    """The URL kwargs of the pages of the last room of `org`, None where it has no such row."""
+    room = _last(org.room_set.all())
+    component = _last(SystemComponent.objects.filter(system__room=room).select_related('system'))
+    group_item = _last(ItemGroupItem.objects.filter(item_group__room=room).select_related('item_group'))
+    item = _last(room.item_set.all())
+    return {
+        'room_slug': room.slug,
+        'category_slug': getattr(_last(room.category_set.all()), 'slug', None),
+        'brand_slug': getattr(_last(room.brand_set.all()), 'slug', None),
+        'item_slug': getattr(item, 'slug', None),
+        'system_slug': component.system.slug if component else getattr(_last(room.system_set.all()), 'slug', None),
+        'component_slug': getattr(component, 'slug', None),
+        'item_group_slug': group_item.item_group.slug if group_item else None,
+        'item_group_item_slug': getattr(group_item, 'slug', None),
+        'purchase_slug': getattr(_last(Purchase.objects.filter(room=room)), 'slug', None),
+        'job_id': ReportJob.objects.create(room=room, requested_by=room.incharge).job_id,
+        'dataset': 'items',
+        'source': 'item',
+        'people_slug': room.incharge.slug,
+        'vendor_slug': getattr(_last(Vendor.objects.filter(organisation=org)), 'slug', None),
+        'department_slug': getattr(room.department, 'slug', None),
+    }
+
+
+def page_urls(kwargs):
+    """
+    The URL of every page, by URL name, and the names of those left out
+    for lack of a row to show.
+    """
+    pages, skipped = {}, []
+    for urlconf in URLCONFS:
+        for pattern in urlconf.urlpatterns:
+            name = f"{urlconf.app_name}:{pattern.name}"
+            names = list(pattern.pattern.converters)
+            if any(kwargs.get(kwarg) is None for kwarg in names):
+                skipped.append(name)
+                continue
+            pages[name] = reverse(name, kwargs={kwarg: kwargs[kwarg] for kwarg in names})
+    return pages, skipped
+
+
+def request_page(client, url):
+    """GET `url` with a savepoint rolled back afterwards, reading streamed responses to the end."""
+    with transaction.atomic():
+        response = client.get(url)
+        if response.streaming:
+            # The client closes streamed responses once they are read
+            for _ in response.streaming_content:
+                pass
+        transaction.set_rollback(True)
+    return response
+
+
+def measure_page(client, url, repeat):
+    response = request_page(client, url)
+    timings, queries = [], 0
+    for _ in range(max(repeat, 1)):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            request_page(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(captured))
+
+    tracemalloc.start()
+    try:
+        request_page(client, url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'url': url,
+        'status': response.status_code,
+        'queries': queries,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(statistics.quantiles(timings, n=20)[18] if len(timings) > 1 else timings[0], 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def measure_pages(client, pages, repeat):
+    """Measure each of `pages`, URL by name, as the user logged in with `client`."""
+    return {name: measure_page(client, url, repeat) for name, url in pages.items()}
+
+
+def compare(baseline, results, latency_tolerance, memory_tolerance, slack_ms):
+    """
+    The regressions of `results` against the pages of `baseline`, as
+    messages. Any extra query counts; latencies and memory only once they
+    grow by more than their tolerance, a fraction, and latencies by more than
+    `slack_ms` too, which keeps fast pages from failing on timer noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{name}: {result['queries']} queries, was {previous['queries']}")
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = max(previous[metric] * (1 + latency_tolerance), previous[metric] + slack_ms)
+            if result[metric] > limit:
+                regressions.append(f"{name}: {metric} {result[metric]:.1f}, was {previous[metric]:.1f}")
+        if result['peak_kib'] > previous['peak_kib'] * (1 + memory_tolerance):
+            regressions.append(f"{name}: peak {result['peak_kib']:.0f} KiB, was {previous['peak_kib']:.0f} KiB")
+    return regressions
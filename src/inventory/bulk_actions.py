@@ -0,0 +1,71 @@
+"""
+Actions applied to many rows selected on a list page at once.
+
+Each action runs in one transaction and touches every table once: `Archive`
+rows are written with ``bulk_create``, item counters move with a single
+UPDATE through `stock.move_stock_many` and status fields are set with
+``QuerySet.update`` through `dashboard.update_rows`, which also moves the
+dashboard counters. As updates skip the signal handlers, the search
+documents of changed systems are refreshed explicitly.
+"""
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from config.utils import reserve_unique_slugs
+from inventory import dashboard, search, stock
+from inventory.models import Archive, System, SystemComponent
+
+
+def create_archives(room, items, counts, archive_type, remark):
+    """Bulk create one `Archive` of ``counts[item.pk]`` units for each of `items`, keyed by item pk."""
+    slugs = reserve_unique_slugs(Archive, [slugify(item.item_name) for item in items])
+    archives = Archive.objects.bulk_create([
+        Archive(
+            organisation_id=item.organisation_id, department_id=item.department_id, room=room, item=item,
+            count=counts[item.pk], archive_type=archive_type, remark=remark, slug=slug,
+        )
+        for item, slug in zip(items, slugs)
+    ])
+    return {archive.item_id: archive for archive in archives}
+
+
+def archive_items(room, items, count, archive_type, remark, actor=None):
+    """Archive `count` available units of each of `items`; all or nothing."""
+    counts = {item.pk: count for item in items}
+    with transaction.atomic():
+        archives = create_archives(room, items, counts, archive_type, remark)
+        stock.move_stock_many(counts, 'archive', actor=actor, sources=archives, available=-1, archived=1)
+    for item in items:
+        item.forget_loaded_values('available_count', 'achived_count')
+    return list(archives.values())
+
+
+def archive_components(room, components, archive_type, remark, actor=None):
+    """
+    Archive the items in use by `components` and remove the components. The
+    components of one item share an `Archive` row counting all of them.
+    """
+    components = list(components)
+    counts = Counter(component.component_item_id for component in components)
+    items = list({component.component_item_id: component.component_item for component in components}.values())
+    with transaction.atomic():
+        archives = create_archives(room, items, counts, archive_type, remark)
+        stock.move_stock_many(counts, 'archive', actor=actor, sources=archives, in_use=-1, archived=1)
+        SystemComponent.objects.filter(pk__in=[component.pk for component in components]).delete()
+    for item in items:
+        item.forget_loaded_values('in_use', 'achived_count')
+    return list(archives.values())
+
+
+def set_system_status(systems, status):
+    """Set the status of `systems`, a queryset, and return how many changed."""
+    with transaction.atomic():
+        updated = dashboard.update_rows(systems, status=status, updated_on=timezone.now())
+        search.index_objects('system', System.objects.filter(pk__in=systems.values('pk')))
+    return updated
+
+
+def resolve_issues(issues):
+    """Mark the unresolved `issues`, a queryset, as resolved and return how many changed."""
+    return dashboard.update_rows(issues.filter(resolved=False), resolved=True, updated_on=timezone.now())
@@ -0,0 +1,260 @@
+"""
+Summary tables behind the central admin dashboard.
+
+Every room has a `RoomSummary` and every organisation an `OrgSummary` with
+counters of its items and stock, pending purchases, open issues and systems
+by status, so the dashboard reads a handful of rows however big the
+organisation grows.
+
+Counters are kept current incrementally: a saved or deleted row adds the
+difference between its new contribution and the one it was loaded with.
+The differences of all the rows saved in a transaction are summed up and
+applied once it commits, with one ``F()`` UPDATE per summary. Writes that
+bypass the signals report their changes themselves: stock movements
+through `record_stock_deltas`, bulk inserts through `record_created` and
+queryset updates through `update_rows`. A summary found missing when a row
+is saved or created is rebuilt from the source tables, other writes leave
+that to the next rebuild; ``rebuild_dashboard`` rebuilds them all.
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from config.utils import CommitBatch
+from core.models import Organisation
+from inventory.models import Issue, Item, OrgSummary, Purchase, Room, RoomSummary, System
+
+SYSTEM_STATUSES = [status for status, _ in System.STATUS_CHOICES]
+
+# Stock counter of `inventory.stock` -> summary counter
+STOCK_COUNTERS = {
+    'total': 'total_stock',
+    'available': 'available_stock',
+    'in_use': 'in_use_stock',
+    'archived': 'archived_stock',
+}
+
+# Fields a row's contribution depends on, besides its room and organisation
+TRACKED_FIELDS = {
+    Item: ['total_count', 'available_count', 'in_use', 'achived_count'],
+    Purchase: ['status'],
+    Issue: ['resolved'],
+    System: ['status'],
+}
+
+# The counters of the rows of each model, as aggregates
+AGGREGATES = {
+    Item: {
+        'item_count': Count('pk'),
+        'total_stock': Coalesce(Sum('total_count'), 0),
+        'available_stock': Coalesce(Sum('available_count'), 0),
+        'in_use_stock': Coalesce(Sum('in_use'), 0),
+        'archived_stock': Coalesce(Sum('achived_count'), 0),
+    },
+    Purchase: {'pending_purchases': Count('pk', filter=Q(status='requested'))},
+    Issue: {'open_issues': Count('pk', filter=Q(resolved=False))},
+    System: {f'{status}_systems': Count('pk', filter=Q(status=status)) for status in SYSTEM_STATUSES},
+}
+
+
+def contribution(model, row):
+    """The counters a single row of `model` adds, from a dict of its tracked fields."""
+    if model is Item:
+        return {
+            'item_count': 1, 'total_stock': row['total_count'], 'available_stock': row['available_count'],
+            'in_use_stock': row['in_use'], 'archived_stock': row['achived_count'],
+        }
+    if model is Purchase:
+        return {'pending_purchases': int(row['status'] == 'requested')}
+    if model is Issue:
+        return {'open_issues': int(not row['resolved'])}
+    if row['status'] in SYSTEM_STATUSES:
+        return {f"{row['status']}_systems": 1}
+    return {}
+
+
+def tracked_values(instance):
+    fields = ['room_id', 'organisation_id', *TRACKED_FIELDS[type(instance)]]
+    return {field: getattr(instance, field) for field in fields}
+
+
+def loaded_values(instance):
+    """The tracked fields of `instance` as it was loaded, None if some were not loaded."""
+    fields = ['room_id', 'organisation_id', *TRACKED_FIELDS[type(instance)]]
+    loaded = getattr(instance, '_loaded_values', {})
+    if all(field in loaded for field in fields):
+        return {field: loaded[field] for field in fields}
+    return None
+
+
+def remember(instance):
+    """
+    Keep the stored values of `instance`, which is about to be saved or
+    deleted, in its loaded values. Reads the row only when some of them were
+    not loaded or moved with ``F()`` since.
+    """
+    if instance._state.adding or loaded_values(instance) is not None:
+        return
+    fields = ['room_id', 'organisation_id', *TRACKED_FIELDS[type(instance)]]
+    previous = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    if previous is not None:
+        instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **previous}
+
+
+def record_save(instance, created=False):
+    """Count a row just saved once the transaction commits."""
+    model = type(instance)
+    previous = None if created else loaded_values(instance)
+    current = tracked_values(instance)
+
+    def update(changes):
+        if previous is not None:
+            changes.add(previous['room_id'], previous['organisation_id'], contribution(model, previous), -1)
+        changes.add(current['room_id'], current['organisation_id'], contribution(model, current), rebuild_missing=True)
+
+    pending.add(update)
+    # A later save of the same instance starts from what this one stored
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **current}
+
+
+def record_delete(instance):
+    """Uncount a deleted row once the transaction commits."""
+    previous = loaded_values(instance) or tracked_values(instance)
+    pending.add(lambda changes: changes.add(
+        previous['room_id'], previous['organisation_id'], contribution(type(instance), previous), -1,
+    ))
+
+
+def record_created(objects):
+    """Count rows inserted with ``bulk_create``."""
+    changes = Changes()
+    for obj in objects:
+        changes.add(obj.room_id, obj.organisation_id, contribution(type(obj), tracked_values(obj)))
+    changes.apply(rebuild_missing=True)
+
+
+def record_stock_deltas(deltas):
+    """Count stock movements, given as ``{item pk: {stock counter: delta}}``."""
+    if len(deltas) == 1:
+        # A single movement updates the summaries through the item, without reading it first
+        (pk, item_deltas), = deltas.items()
+        updates = {STOCK_COUNTERS[name]: F(STOCK_COUNTERS[name]) + delta for name, delta in item_deltas.items() if delta}
+        if updates:
+            RoomSummary.objects.filter(room__item=pk).update(**updates)
+            OrgSummary.objects.filter(organisation__item=pk).update(**updates)
+        return
+
+    changes = Changes()
+    for pk, room_id, organisation_id in Item.objects.filter(pk__in=deltas).values_list('pk', 'room_id', 'organisation_id'):
+        changes.add(room_id, organisation_id, {STOCK_COUNTERS[name]: delta for name, delta in deltas[pk].items()})
+    changes.apply()
+
+
+def update_rows(queryset, **values):
+    """``queryset.update(**values)`` that also moves the counters of the updated rows."""
+    model = queryset.model
+    fields = ['room_id', 'organisation_id', *TRACKED_FIELDS[model]]
+    with transaction.atomic():
+        groups = list(queryset.values(*fields).annotate(rows=Count('pk')).order_by())
+        updated = queryset.update(**values)
+        changes = Changes()
+        for group in groups:
+            rows = group.pop('rows')
+            changes.add(group['room_id'], group['organisation_id'], contribution(model, group), -rows)
+            changes.add(group['room_id'], group['organisation_id'], contribution(model, {**group, **values}), rows)
+        changes.apply()
+    return updated
+
+
+class Changes:
+    """Counter deltas collected per room and organisation, applied with one UPDATE per summary."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.organisations = {}
+        self.rooms_to_rebuild = set()
+        self.organisations_to_rebuild = set()
+
+    def add(self, room_id, organisation_id, counters, sign=1, rebuild_missing=False):
+        """
+        Add `counters` times `sign`. Only rebuild summaries found missing when
+        asked: deletes may run while the room or organisation itself is being
+        deleted.
+        """
+        self.rooms.setdefault((room_id, organisation_id), Counter()).update(
+            {name: value * sign for name, value in counters.items()}
+        )
+        self.organisations.setdefault(organisation_id, Counter()).update(
+            {name: value * sign for name, value in counters.items()}
+        )
+        if rebuild_missing:
+            self.rooms_to_rebuild.add(room_id)
+            self.organisations_to_rebuild.add(organisation_id)
+
+    def apply(self, rebuild_missing=False):
+        """Update the summaries, rebuilding missing ones of every row when `rebuild_missing`."""
+        for (room_id, organisation_id), counters in self.rooms.items():
+            updates = {name: F(name) + value for name, value in counters.items() if value}
+            if updates and not RoomSummary.objects.filter(room_id=room_id).update(**updates):
+                if rebuild_missing or room_id in self.rooms_to_rebuild:
+                    rebuild_rooms(Room.objects.filter(pk=room_id))
+        for organisation_id, counters in self.organisations.items():
+            updates = {name: F(name) + value for name, value in counters.items() if value}
+            if updates and not OrgSummary.objects.filter(organisation_id=organisation_id).update(**updates):
+                if rebuild_missing or organisation_id in self.organisations_to_rebuild:
+                    # The organisation may have been deleted since, later in the transaction
+                    if Organisation.objects.filter(pk=organisation_id).exists():
+                        rebuild_organisation(organisation_id)
+
+
+# Changes of the rows saved and deleted in the current transaction
+pending = CommitBatch(Changes, Changes.apply)
+
+
+def count_rooms(rooms):
+    """The counters of `rooms`, a queryset, computed from the source tables as ``{room pk: {counter: value}}``."""
+    counts = {room_pk: dict.fromkeys(OrgSummary.COUNTERS, 0) for room_pk in rooms.values_list('pk', flat=True)}
+    for model, aggregates in AGGREGATES.items():
+        rows = model.objects.filter(room__in=rooms.values('pk')).values('room_id').annotate(**aggregates).order_by()
+        for row in rows:
+            room_counts = counts.get(row.pop('room_id'))
+            if room_counts is not None:
+                room_counts.update(row)
+    return counts
+
+
+def rebuild_rooms(rooms):
+    """Recompute the summaries of `rooms`, a queryset."""
+    counts = count_rooms(rooms)
+    organisations = dict(rooms.values_list('pk', 'organisation_id'))
+    with transaction.atomic():
+        RoomSummary.objects.filter(room__in=list(counts)).delete()
+        RoomSummary.objects.bulk_create([
+            RoomSummary(room_id=room_pk, organisation_id=organisations[room_pk], **room_counts)
+            for room_pk, room_counts in counts.items()
+        ])
+
+
+def rebuild_organisation(organisation_id):
+    """Recompute the summaries of an organisation and of all its rooms."""
+    counts = count_rooms(Room.objects.filter(organisation_id=organisation_id))
+    totals = dict.fromkeys(OrgSummary.COUNTERS, 0)
+    for room_counts in counts.values():
+        for name, value in room_counts.items():
+            totals[name] += value
+    with transaction.atomic():
+        RoomSummary.objects.filter(organisation_id=organisation_id).delete()
+        RoomSummary.objects.bulk_create([
+            RoomSummary(room_id=room_pk, organisation_id=organisation_id, **room_counts)
+            for room_pk, room_counts in counts.items()
+        ])
+        OrgSummary.objects.update_or_create(organisation_id=organisation_id, defaults=totals)
+
+
+def get_org_summary(organisation):
+    """The `OrgSummary` of `organisation`, built first if it does not exist yet."""
+    summary = OrgSummary.objects.filter(organisation=organisation).first()
+    if summary is None:
+        rebuild_organisation(organisation.pk)
+        summary = OrgSummary.objects.get(organisation=organisation)
+    return summary
@@ -0,0 +1,139 @@
+"""
+Spreadsheet exports of room and organisation inventory.
+
+Rows are read with ``values_list().iterator()`` so neither model instances
+nor the whole result set are held in memory: CSV is streamed to the client
+as it is read, XLSX is written row by row with openpyxl's write-only
+workbook into a spooled temporary file.
+
+Text that a spreadsheet would read as a formula, such as an issue subject
+starting with ``=``, is written with a leading ``'`` so it stays text.
+"""
+import csv
+import tempfile
+from django.http import FileResponse, StreamingHttpResponse
+from inventory.models import Archive, Issue, Item, Purchase, System
+
+CHUNK_SIZE = 2000
+
+# dataset -> (model, [(header, lookup), ...])
+DATASETS = {
+    'items': (Item, [
+        ('Room', 'room__room_name'),
+        ('Item', 'item_name'),
+        ('Category', 'category__category_name'),
+        ('Brand', 'brand__brand_name'),
+        ('Total', 'total_count'),
+        ('Available', 'available_count'),
+        ('In use', 'in_use'),
+        ('Archived', 'achived_count'),
+        ('Listed', 'is_listed'),
+        ('Created on', 'created_on'),
+        ('Updated on', 'updated_on'),
+    ]),
+    'systems': (System, [
+        ('Room', 'room__room_name'),
+        ('System', 'system_name'),
+        ('Status', 'status'),
+        ('Component type', 'systemcomponent__component_type'),
+        ('Component item', 'systemcomponent__component_item__item_name'),
+        ('Serial number', 'systemcomponent__serial_number'),
+    ]),
+    'purchases': (Purchase, [
+        ('Room', 'room__room_name'),
+        ('Purchase ID', 'purchase_id'),
+        ('Item', 'item__item_name'),
+        ('Quantity', 'quantity'),
+        ('Unit', 'unit_of_measure'),
+        ('Vendor', 'vendor__vendor_name'),
+        ('Status', 'status'),
+        ('Added to stock', 'added_to_stock'),
+        ('Created on', 'created_on'),
+    ]),
+    'archives': (Archive, [
+        ('Room', 'room__room_name'),
+        ('Item', 'item__item_name'),
+        ('Count', 'count'),
+        ('Type', 'archive_type'),
+        ('Remark', 'remark'),
+        ('Archived on', 'archived_on'),
+    ]),
+    'issues': (Issue, [
+        ('Room', 'room__room_name'),
+        ('Subject', 'subject'),
+        ('Description', 'description'),
+        ('Reported by', 'created_by'),
+        ('Resolved', 'resolved'),
+        ('Created on', 'created_on'),
+    ]),
+}
+
+FORMATS = ('csv', 'xlsx')
+
+# First characters that make a spreadsheet evaluate a cell
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object whose `write` hands the row back to the CSV writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def clean_cell(value):
+    """`value`, with text that would be evaluated as a formula escaped."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def get_rows(dataset, **filters):
+    model, columns = DATASETS[dataset]
+    lookups = [lookup for _, lookup in columns]
+    rows = model.objects.filter(**filters).order_by('room__room_name', 'pk').values_list(*lookups)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield [clean_cell(value) for value in row]
+
+
+def get_headers(dataset):
+    return [header for header, _ in DATASETS[dataset][1]]
+
+
+def stream_csv(dataset, filename, **filters):
+    writer = csv.writer(Echo())
+
+    def rows():
+        yield writer.writerow(get_headers(dataset))
+        for row in get_rows(dataset, **filters):
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(rows(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def write_xlsx(dataset, filename, **filters):
+    # Only needed for this export, keep the import out of every other request
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=dataset.capitalize())
+    sheet.append(get_headers(dataset))
+    for row in get_rows(dataset, **filters):
+        # Excel cannot store timezone-aware datetimes
+        sheet.append([value.replace(tzinfo=None) if hasattr(value, 'tzinfo') else value for value in row])
+
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=f"{filename}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def export_response(dataset, export_format, filename, **filters):
+    if export_format == 'xlsx':
+        return write_xlsx(dataset, filename, **filters)
+    return stream_csv(dataset, filename, **filters)
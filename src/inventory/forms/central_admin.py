@@ -2,8 +2,23 @@ from django import forms
 from core.models import User, UserProfile
 from inventory.models import Department, Room, Vendor, Purchase, Issue, Category, Brand
 from config.mixins import form_mixin
+from inventory import autocomplete
 from django.forms import RadioSelect
 
+class OrgChoicesMixin:
+    """
+    Limits the model choice fields named in `org_choices`, field name ->
+    autocomplete source, to the rows of the form's `organisation`.
+    """
+    org_choices = {}
+
+    def __init__(self, *args, organisation=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        organisation_id = organisation.pk if organisation is not None else None
+        for field_name, source_name in self.org_choices.items():
+            autocomplete.limit_choices(self.fields[field_name], source_name, organisation_id)
+
+
 class DepartmentForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
     class Meta:
         model = Department
@@ -54,7 +69,9 @@ class PeopleCreateForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
         return email
 
 
-class RoomCreateForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class RoomCreateForm(form_mixin.BootstrapFormMixin, OrgChoicesMixin, forms.ModelForm):
+    org_choices = {'department': 'department', 'incharge': 'person'}
+
     class Meta:
         model = Room
         fields = ['label', 'room_name', 'department', 'incharge']  # Adjust fields as necessary
\ No newline at end of file
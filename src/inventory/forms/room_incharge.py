@@ -1,6 +1,7 @@
 from django import forms
 from inventory.models import Category, Brand, Item, System, SystemComponent, Archive, Room, Purchase, Vendor, Receipt, ItemGroup, ItemGroupItem, RoomSettings  # Import RoomSettings
 from config.mixins import form_mixin
+from inventory import autocomplete
 
 class CategoryForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
     class Meta:
@@ -12,21 +13,146 @@ class BrandForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
         model = Brand
         fields = ['brand_name']
 
-class ItemForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class RoomChoicesMixin:
+    """
+    Limits the model choice fields named in `room_choices`, field name ->
+    autocomplete source, to the rows of the form's `room`.
+    """
+    room_choices = {}
+
+    def __init__(self, *args, room=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        organisation_id = room.organisation_id if room is not None else None
+        for field_name, source_name in self.room_choices.items():
+            autocomplete.limit_choices(self.fields[field_name], source_name, organisation_id, room=room)
+
+class ItemForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
+    room_choices = {'category': 'category', 'brand': 'brand'}
+
     class Meta:
         model = Item
         fields = ['item_name', 'category', 'brand', 'total_count']  # Include necessary fields
 
+class ItemImportForm(form_mixin.BootstrapFormMixin, forms.Form):
+    file = forms.FileField(
+        label="CSV file",
+        help_text="Columns: Item, Category, Brand, Total. Other columns are ignored, so an item export can be imported as is.",
+    )
+
+class ItemImportRowForm(forms.Form):
+    item_name = forms.CharField(max_length=255)
+    category = forms.CharField(max_length=255)
+    brand = forms.CharField(max_length=255)
+    total_count = forms.IntegerField(min_value=0)
+
 class SystemForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
     class Meta:
         model = System
         fields = ['system_name', 'status']
 
-class SystemComponentForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class SystemComponentForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
+    room_choices = {'component_item': 'item'}
+
     class Meta:
         model = SystemComponent
         fields = ['component_item', 'component_type', 'serial_number']  # Updated field
 
+class SystemBulkCreateForm(form_mixin.BootstrapFormMixin, forms.Form):
+    name_pattern = forms.CharField(
+        max_length=255, initial="System {n}",
+        help_text="{n} is replaced by the number of each system, e.g. PC-{n:02} gives PC-01, PC-02...",
+    )
+    start = forms.IntegerField(min_value=0, initial=1, help_text="Number of the first system.")
+    count = forms.IntegerField(min_value=1, max_value=200, help_text="How many systems to create.")
+    status = forms.ChoiceField(choices=System.STATUS_CHOICES)
+
+    def clean_name_pattern(self):
+        pattern = self.cleaned_data['name_pattern']
+        check_numbered(pattern)
+        return pattern
+
+    def get_numbers(self):
+        start = self.cleaned_data['start']
+        return range(start, start + self.cleaned_data['count'])
+
+    def get_names(self):
+        return [format_numbered(self.cleaned_data['name_pattern'], n) for n in self.get_numbers()]
+
+class SystemBulkComponentForm(form_mixin.BootstrapFormMixin, forms.Form):
+    component_type = forms.ChoiceField(choices=SystemComponent.COMPONENT_TYPES)
+    component_item = forms.ModelChoiceField(queryset=Item.objects.none(), label="Item")
+    serial_numbers = forms.CharField(
+        required=False, widget=forms.Textarea(attrs={'rows': 3}),
+        help_text="One per line, in system order. Leave empty to use the pattern.",
+    )
+    serial_pattern = forms.CharField(
+        required=False, max_length=255,
+        help_text="Used when no serial numbers are pasted, e.g. MS-{n:03} with n the system number.",
+    )
+
+    def __init__(self, *args, room=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['component_item'].queryset = Item.objects.filter(room=room).only('item_name', 'available_count')
+
+    def has_changed(self):
+        # A row is only used once an item is picked, whatever its other fields say
+        return bool(self['component_item'].data)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        pasted = cleaned_data.get('serial_numbers', '')
+        cleaned_data['serial_list'] = [line.strip() for line in pasted.splitlines() if line.strip()]
+        pattern = cleaned_data.get('serial_pattern')
+        if not cleaned_data['serial_list'] and not pattern:
+            raise forms.ValidationError("Paste the serial numbers or give a pattern for them.")
+        if pattern and not cleaned_data['serial_list']:
+            try:
+                check_numbered(pattern)
+            except forms.ValidationError as e:
+                self.add_error('serial_pattern', e)
+        return cleaned_data
+
+    def get_serials(self, numbers):
+        """The serial number of this component in each system, numbered by `numbers`."""
+        serials = self.cleaned_data['serial_list']
+        if serials:
+            if len(serials) != len(numbers):
+                raise forms.ValidationError(f"{len(serials)} serial numbers given for {len(numbers)} systems.")
+            return serials
+        return [format_numbered(self.cleaned_data['serial_pattern'], n) for n in numbers]
+
+class BaseSystemBulkComponentFormSet(forms.BaseFormSet):
+    """Offers the components of a typical computer, leaving the ones without an item out."""
+    default_types = ['mouse', 'keyboard', 'monitor', 'cpu', 'ups']
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        if index is not None and index < len(self.default_types):
+            kwargs['initial'] = {'component_type': self.default_types[index]}
+        return kwargs
+
+    def get_components(self):
+        return [form for form in self.forms if form.has_changed()]
+
+    def clean(self):
+        super().clean()
+        if not self.get_components():
+            raise forms.ValidationError("Add at least one component.")
+
+SystemBulkComponentFormSet = forms.formset_factory(
+    SystemBulkComponentForm, formset=BaseSystemBulkComponentFormSet, extra=5, max_num=15, validate_max=True,
+)
+
+def format_numbered(pattern, n):
+    try:
+        return pattern.format(n=n)
+    except (AttributeError, KeyError, IndexError, ValueError):
+        raise forms.ValidationError("Use {n} (optionally with a format, e.g. {n:03}) for the number and nothing else in braces.")
+
+def check_numbered(pattern):
+    if format_numbered(pattern, 1) == format_numbered(pattern, 2):
+        raise forms.ValidationError("The pattern must contain {n} so that every system gets its own value.")
+
 class SystemComponentArchiveForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
     class Meta:
         model = Archive
@@ -39,29 +165,62 @@ class ItemArchiveForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
         model = Archive
         fields = ['archive_type', 'remark', 'count']
 
-class RoomUpdateForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class BulkSelectionForm(forms.Form):
+    """The rows ticked on a list page, limited to the `queryset` the page shows."""
+    selected = forms.ModelMultipleChoiceField(
+        queryset=None, widget=forms.MultipleHiddenInput,
+        error_messages={'required': "Select at least one row.", 'invalid_choice': "Select rows of this list only."},
+    )
+
+    def __init__(self, *args, queryset, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['selected'].queryset = queryset
+
+class ItemBulkArchiveForm(BulkSelectionForm):
+    count = forms.IntegerField(min_value=1, initial=1, help_text="Units archived of each selected item.")
+    archive_type = forms.ChoiceField(choices=Archive.ARCHIVE_TYPES)
+    remark = forms.CharField()
+
+class SystemComponentBulkArchiveForm(BulkSelectionForm):
+    archive_type = forms.ChoiceField(choices=Archive.ARCHIVE_TYPES)
+    remark = forms.CharField()
+
+class SystemBulkStatusForm(BulkSelectionForm):
+    status = forms.ChoiceField(choices=System.STATUS_CHOICES)
+
+class IssueBulkResolveForm(BulkSelectionForm):
+    pass
+
+class RoomUpdateForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
+    room_choices = {'department': 'department', 'incharge': 'person'}
+
     class Meta:
         model = Room
         fields = ['label', 'room_name', 'department', 'incharge']  # Adjust fields as necessary
 
-class PurchaseForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class PurchaseForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
+    room_choices = {'item': 'item', 'vendor': 'vendor'}
+
     class Meta:
         model = Purchase
         fields = ['item', 'quantity', 'unit_of_measure', 'vendor']  # Include necessary fields
         
         
-class PurchaseUpdateForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class PurchaseUpdateForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
+    room_choices = {'vendor': 'vendor'}
+
     class Meta:
         model = Purchase
         fields = ['quantity', 'unit_of_measure', 'vendor']  # Include necessary fields
 
-class ItemPurchaseForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class ItemPurchaseForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
     item_name = forms.CharField(max_length=255)
-    category = forms.ModelChoiceField(queryset=Category.objects.all())
-    brand = forms.ModelChoiceField(queryset=Brand.objects.all())
+    category = forms.ModelChoiceField(queryset=Category.objects.none())
+    brand = forms.ModelChoiceField(queryset=Brand.objects.none())
     quantity = forms.FloatField(min_value=1)
     unit_of_measure = forms.ChoiceField(choices=Purchase.UNIT_CHOICES)
-    vendor = forms.ModelChoiceField(queryset=Vendor.objects.all())
+    vendor = forms.ModelChoiceField(queryset=Vendor.objects.none())
+    room_choices = {'category': 'category', 'brand': 'brand', 'vendor': 'vendor'}
 
     class Meta:
         model = Purchase
@@ -77,7 +236,9 @@ class ItemGroupForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
         model = ItemGroup
         fields = ['item_group_name']  # Include necessary fields
 
-class ItemGroupItemForm(form_mixin.BootstrapFormMixin, forms.ModelForm):
+class ItemGroupItemForm(form_mixin.BootstrapFormMixin, RoomChoicesMixin, forms.ModelForm):
+    room_choices = {'item': 'item'}
+
     class Meta:
         model = ItemGroupItem
         fields = ['item', 'qty']  # Include necessary fields
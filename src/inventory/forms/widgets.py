@@ -0,0 +1,44 @@
+import copy
+from django import forms
+from django.core.exceptions import ValidationError
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A select of a model choice field that renders its options as long as
+    there are at most `limit` of them. Past that it only renders the selected
+    option and points ``autocomplete_select.html`` to `url` to search the
+    others.
+    """
+
+    def __init__(self, url, limit, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.limit = limit
+
+    def get_context(self, name, value, attrs):
+        choices, searched = self.get_shown_choices(self.format_value(value))
+        widget = copy.copy(self)
+        widget.choices = choices
+        context = super(AutocompleteSelect, widget).get_context(name, value, attrs)
+        if searched:
+            context['widget']['attrs']['data-autocomplete-url'] = self.url
+        return context
+
+    def get_shown_choices(self, values):
+        """The choices to render, read with a single query while they fit, and whether the rest is searched."""
+        iterator = self.choices
+        shown = [] if iterator.field.empty_label is None else [('', iterator.field.empty_label)]
+        rows = list(iterator.queryset[:self.limit + 1])
+        if len(rows) <= self.limit:
+            return shown + [iterator.choice(obj) for obj in rows], False
+
+        rows = []
+        selected = [value for value in values if value]
+        if selected:
+            try:
+                rows = list(iterator.queryset.filter(pk__in=selected))
+            except (ValueError, TypeError, ValidationError):
+                # An invalid submitted value has no option to keep
+                pass
+        return shown + [iterator.choice(obj) for obj in rows], True
@@ -0,0 +1,141 @@
+"""
+Bulk import of items from CSV.
+
+The upload is parsed row by row while it is read and handled in batches:
+rows are validated, the categories and brands they name are created when
+missing, slugs are reserved for the whole batch at once and the items, their
+opening stock movements and search documents are written with
+``bulk_create``. The import runs in a single transaction; invalid rows are
+skipped and reported with their line number.
+
+The expected headers are those of the items export, so an export of one room
+can be imported into another.
+"""
+import csv
+import io
+from collections import namedtuple
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+from config.utils import reserve_unique_slugs
+from inventory import autocomplete, dashboard, search, stock
+from inventory.forms.room_incharge import ItemImportRowForm
+from inventory.models import Brand, Category, Item
+
+BATCH_SIZE = 500
+MAX_ROWS = 10000
+
+# CSV header (case-insensitive) -> field of ItemImportRowForm
+COLUMNS = {
+    'item': 'item_name',
+    'category': 'category',
+    'brand': 'brand',
+    'total': 'total_count',
+}
+HEADERS = {field: header.capitalize() for header, field in COLUMNS.items()}
+
+ImportResult = namedtuple('ImportResult', ['created', 'categories_created', 'brands_created', 'errors'])
+
+
+class ItemImportError(Exception):
+    """Raised when the upload cannot be imported at all; nothing is saved."""
+
+
+def read_rows(file):
+    """Yield ``(line number, {field: value})`` for the non-blank rows of the CSV `file`."""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = [name.strip().lower() for name in next(reader, [])]
+        columns = {index: COLUMNS[name] for index, name in enumerate(header) if name in COLUMNS}
+        missing = [HEADERS[field] for field in COLUMNS.values() if field not in columns.values()]
+        if missing:
+            raise ItemImportError(f"Missing column(s): {', '.join(missing)}.")
+
+        for number, row in enumerate(reader, start=1):
+            if number > MAX_ROWS:
+                raise ItemImportError(f"A file can hold at most {MAX_ROWS} rows.")
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, {field: row[index].strip() if index < len(row) else '' for index, field in columns.items()}
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ItemImportError(f"The file is not a valid UTF-8 CSV file: {e}") from e
+    finally:
+        # Leave the upload open for Django to clean up
+        text.detach()
+
+
+def import_items(room, file):
+    """Import the items of the CSV `file` into `room` and return an `ImportResult`."""
+    categories = {category.category_name.lower(): category for category in Category.objects.filter(room=room)}
+    brands = {brand.brand_name.lower(): brand for brand in Brand.objects.filter(room=room)}
+    created = categories_created = brands_created = 0
+    errors = []
+
+    with transaction.atomic():
+        rows = read_rows(file)
+        while batch := list(islice(rows, BATCH_SIZE)):
+            valid = []
+            for line, data in batch:
+                row, row_errors = clean_row(data)
+                if row_errors:
+                    errors.append((line, '; '.join(row_errors)))
+                else:
+                    valid.append(row)
+            if not valid:
+                continue
+            categories_created += create_missing(room, Category, 'category_name', categories, [row['category'] for row in valid])
+            brands_created += create_missing(room, Brand, 'brand_name', brands, [row['brand'] for row in valid])
+            created += len(create_items(room, valid, categories, brands))
+
+    # Bulk inserts skip the signal that drops cached searches
+    autocomplete.forget(room.organisation_id)
+    return ImportResult(created, categories_created, brands_created, errors)
+
+
+def clean_row(data):
+    """
+    Validate a row with the fields of `ItemImportRowForm`, cleaned directly
+    to skip the per-instance copy of the fields a bound form makes.
+    """
+    row, errors = {}, []
+    for name, field in ItemImportRowForm.base_fields.items():
+        try:
+            row[name] = field.clean(data.get(name, ''))
+        except ValidationError as e:
+            errors.append(f"{HEADERS[name]}: {' '.join(e.messages)}")
+    return row, errors
+
+
+def create_missing(room, model, name_field, known, names):
+    """Create the `model` rows of `room` named in `names` that are not in `known` yet."""
+    missing = {}
+    for name in names:
+        missing.setdefault(name.lower(), name)
+    missing = [name for key, name in missing.items() if key not in known]
+    if not missing:
+        return 0
+
+    slugs = reserve_unique_slugs(model, [slugify(name) for name in missing])
+    objects = model.objects.bulk_create([
+        model(organisation_id=room.organisation_id, room=room, slug=slug, **{name_field: name})
+        for name, slug in zip(missing, slugs)
+    ])
+    known.update((getattr(obj, name_field).lower(), obj) for obj in objects)
+    return len(objects)
+
+
+def create_items(room, rows, categories, brands):
+    slugs = reserve_unique_slugs(Item, [slugify(row['item_name']) for row in rows])
+    items = Item.objects.bulk_create([
+        Item(
+            organisation_id=room.organisation_id, room=room, slug=slug,
+            category=categories[row['category'].lower()], brand=brands[row['brand'].lower()],
+            item_name=row['item_name'], total_count=row['total_count'], available_count=row['total_count'],
+        )
+        for row, slug in zip(rows, slugs)
+    ])
+    stock.record_opening_balances(items)
+    dashboard.record_created(items)
+    search.index_objects('item', Item.objects.filter(pk__in=[item.pk for item in items]))
+    return items
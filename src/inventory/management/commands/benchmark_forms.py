@@ -0,0 +1,56 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.forms import ModelChoiceField
+from config.mixins.form_mixin import build_template
+from inventory.forms.central_admin import PeopleCreateForm
+from inventory.forms.room_incharge import ItemForm, PurchaseForm
+
+FORMS = (ItemForm, PurchaseForm, PeopleCreateForm)
+
+
+def make_form(form_class, data=None):
+    form = form_class(data)
+    # Keep choice queries out of the timings
+    for field in form.fields.values():
+        if isinstance(field, ModelChoiceField):
+            field.queryset = field.queryset.none()
+    return form
+
+
+class Command(BaseCommand):
+    help = (
+        "Time instantiating and rendering ItemForm, PurchaseForm and PeopleCreateForm with "
+        "BootstrapFormMixin: rendering with the template compiled on every render, with the one "
+        "cached per form class, with errors, and the share of the widgets alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=1000, help="Runs of each measurement.")
+
+    def handle(self, *args, **options):
+        repeat = max(options['repeat'], 1)
+        self.stdout.write(
+            f"{'Form':<20}{'init':>12}{'compiled':>12}{'cached':>12}{'invalid':>12}{'widgets':>12}   (median µs)"
+        )
+        for form_class in FORMS:
+            form = make_form(form_class)
+            layout = form.get_layout()
+            invalid = make_form(form_class, data={})
+            invalid.is_valid()
+            timings = (
+                self.time(lambda: form_class(), repeat),
+                self.time(lambda: build_template(layout).render({'form': form}), repeat),
+                self.time(form.as_p, repeat),
+                self.time(invalid.as_p, repeat),
+                self.time(lambda: [str(bound_field) for bound_field in form], repeat),
+            )
+            self.stdout.write(f"{form_class.__name__:<20}" + ''.join(f"{timing:>12.1f}" for timing in timings))
+
+    def time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1e6)
+        return statistics.median(timings)
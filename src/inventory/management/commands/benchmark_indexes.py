@@ -0,0 +1,90 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from inventory.models import Archive, Brand, Category, Issue, Item, Purchase, System
+from inventory.seeding import seed_organisation
+
+INDEXED_MODELS = (Archive, Brand, Category, Issue, Item, Purchase, System)
+
+
+def scoped_queries(org, room):
+    """The lookups the room incharge and central admin pages run, by label."""
+    return {
+        "Items of a room": Item.objects.filter(room__slug=room.slug, organisation=org).order_by('-created_on', '-pk')[:51],
+        "Categories of a room": Category.objects.filter(room=room, organisation=org),
+        "Brands of a room": Brand.objects.filter(room=room, organisation=org),
+        "Systems of a room": System.objects.filter(room__slug=room.slug, organisation=org).order_by('-created_on', '-pk')[:51],
+        "Archives of a room": Archive.objects.filter(room__slug=room.slug, organisation=org).order_by('-archived_on', '-pk')[:51],
+        "Purchases of a room": Purchase.objects.filter(room__slug=room.slug, organisation=org).order_by('-created_on', '-pk')[:51],
+        "Issues of a room": Issue.objects.filter(room__slug=room.slug, organisation=org).order_by('-created_on', '-pk')[:51],
+        "Requested purchases": Purchase.objects.filter(organisation=org, status='requested').order_by('-created_on', '-pk')[:51],
+        "Open issues": Issue.objects.filter(organisation=org, resolved=False).order_by('-created_on', '-pk')[:51],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset and compare query plans and timings of the org/room scoped lookups "
+        "with and without their composite indexes. Everything is rolled back afterwards, but the "
+        "tables stay locked while it runs, so use a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orgs', type=int, default=3, help="Organisations to seed.")
+        parser.add_argument('--rooms', type=int, default=20, help="Rooms per organisation.")
+        parser.add_argument('--items', type=int, default=500, help="Items per room.")
+        parser.add_argument('--repeat', type=int, default=20, help="Runs of each query to time.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write("Seeding...")
+            orgs = [
+                seed_organisation(
+                    rooms=options['rooms'], items_per_room=options['items'], systems_per_room=options['items'] // 10,
+                    purchases_per_room=options['items'] // 2, archives_per_room=options['items'] // 2,
+                    issues_per_room=options['items'] // 5, seed=n,
+                )
+                for n in range(options['orgs'])
+            ]
+            org = orgs[-1]
+            room = org.room_set.order_by('pk').last()
+
+            self.analyze()
+            with_indexes = self.measure(scoped_queries(org, room), options['repeat'])
+            self.drop_indexes()
+            self.analyze()
+            without_indexes = self.measure(scoped_queries(org, room), options['repeat'])
+            transaction.set_rollback(True)
+
+        for label, (indexed_ms, indexed_plan) in with_indexes.items():
+            plain_ms, plain_plan = without_indexes[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  with indexes:    {indexed_ms:8.3f} ms")
+            self.stdout.write(self.indent(indexed_plan))
+            self.stdout.write(f"  without indexes: {plain_ms:8.3f} ms")
+            self.stdout.write(self.indent(plain_plan))
+
+    def measure(self, queries, repeat):
+        results = {}
+        for label, queryset in queries.items():
+            timings = []
+            for _ in range(max(repeat, 1)):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = (statistics.median(timings), queryset.explain())
+        return results
+
+    def drop_indexes(self):
+        editor = connection.schema_editor()
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                editor.execute(index.remove_sql(model, editor))
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def indent(self, plan):
+        return '\n'.join(f"      {line}" for line in plan.splitlines())
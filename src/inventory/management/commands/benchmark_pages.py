@@ -0,0 +1,89 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from inventory import benchmarks
+from inventory.seeding import seed_organisation
+
+# Option -> (argument of seed_organisation, default)
+SCALE = {
+    'rooms': ('rooms', 5),
+    'items': ('items_per_room', 200),
+    'systems': ('systems_per_room', 20),
+    'components': ('components_per_system', 3),
+    'item_groups': ('item_groups_per_room', 5),
+    'purchases': ('purchases_per_room', 100),
+    'archives': ('archives_per_room', 100),
+    'issues': ('issues_per_room', 20),
+    'departments': ('departments', 3),
+    'history_days': ('history_days', 3 * 365),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed an organisation and request every room incharge and central admin page through the test "
+        "client, recording query counts, p50/p95 latency and peak memory of each. Results can be saved "
+        "as a JSON baseline and compared with one, failing on regressions. Runs on the configured "
+        "database, SQLite or PostgreSQL, and rolls everything back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        for option, (argument, default) in SCALE.items():
+            parser.add_argument(
+                f"--{option.replace('_', '-')}", dest=option, type=int,
+                help=f"{argument.replace('_', ' ').capitalize()} (default {default}, or the baseline's).",
+            )
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests of each page.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', help="Compare with the results in this JSON file, at its scale.")
+        parser.add_argument('--latency-tolerance', type=float, default=0.5, help="Allowed latency growth, as a fraction.")
+        parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed peak memory growth, as a fraction.")
+        parser.add_argument('--slack-ms', type=float, default=5.0, help="Latency growth always allowed, in ms.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            if baseline['database'] != connection.vendor:
+                raise CommandError(f"The baseline was recorded on {baseline['database']}, not {connection.vendor}.")
+
+        scale = {option: default for option, (_, default) in SCALE.items()}
+        if baseline is not None:
+            scale.update(baseline['scale'])
+        scale.update({option: options[option] for option in SCALE if options[option] is not None})
+        if baseline is not None and scale != baseline['scale']:
+            raise CommandError("The baseline was recorded at another scale.")
+
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            self.stdout.write("Seeding...")
+            org = seed_organisation(**{SCALE[option][0]: value for option, value in scale.items()})
+            pages, skipped = benchmarks.page_urls(benchmarks.sample_kwargs(org))
+            client = Client()
+            client.force_login(org.room_set.order_by('pk').last().incharge.user)
+            results = benchmarks.measure_pages(client, pages, options['repeat'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'Page':<50}{'status':>8}{'queries':>9}{'p50 ms':>10}{'p95 ms':>10}{'peak KiB':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<50}{result['status']:>8}{result['queries']:>9}"
+                f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['peak_kib']:>10.0f}"
+            )
+        if skipped:
+            self.stdout.write(f"Skipped, nothing to show: {', '.join(skipped)}")
+
+        if baseline is not None:
+            regressions = benchmarks.compare(
+                baseline['pages'], results, options['latency_tolerance'], options['memory_tolerance'], options['slack_ms'],
+            )
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(regression)
+                raise CommandError(f"{len(regressions)} regressions against {options['baseline']}.")
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'database': connection.vendor, 'scale': scale, 'repeat': options['repeat'], 'pages': results}, f, indent=2)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.models import Organisation
+from inventory import dashboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the central admin dashboard summaries from the inventory tables, e.g. after rows were bulk inserted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', help="Only rebuild the organisation with this slug.")
+
+    def handle(self, *args, **options):
+        organisations = Organisation.objects.all()
+        if options['org']:
+            organisations = organisations.filter(slug=options['org'])
+
+        count = 0
+        for organisation_id in organisations.values_list('pk', flat=True).iterator():
+            dashboard.rebuild_organisation(organisation_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the summaries of {count} organisation(s)."))
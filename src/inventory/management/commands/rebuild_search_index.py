@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from inventory import search
+from inventory.models import Room, SearchDocument
+
+
+class Command(BaseCommand):
+    help = "Recreate the search documents of rooms, e.g. after rows were bulk inserted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', help="Only rebuild rooms of the organisation with this slug.")
+        parser.add_argument('--room', help="Only rebuild the room with this slug.")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options['org']:
+            rooms = rooms.filter(organisation__slug=options['org'])
+        if options['room']:
+            rooms = rooms.filter(slug=options['room'])
+
+        search.rebuild(rooms)
+        count = SearchDocument.objects.filter(room__in=rooms).count()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} document(s)."))
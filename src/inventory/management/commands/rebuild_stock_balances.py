@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from inventory import stock
+from inventory.models import Item
+
+
+class Command(BaseCommand):
+    help = "Recompute item stock counters from the stock movement ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', help="Only rebuild items of the organisation with this slug.")
+        parser.add_argument('--room', help="Only rebuild items of the room with this slug.")
+
+    def handle(self, *args, **options):
+        items = Item.objects.all()
+        if options['org']:
+            items = items.filter(organisation__slug=options['org'])
+        if options['room']:
+            items = items.filter(room__slug=options['room'])
+
+        corrected = stock.rebuild_balances(items)
+        self.stdout.write(self.style.SUCCESS(f"Corrected {corrected} item(s)."))
@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from inventory import reports
+
+
+class Command(BaseCommand):
+    help = "Render queued room reports."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help="Render at most this many jobs.")
+        parser.add_argument('--poll', type=float, help="Keep running, checking for new jobs every POLL seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            rendered = reports.run_pending_jobs(limit=options['limit'])
+            self.stdout.write(f"Rendered {rendered} report(s).")
+            if not options['poll']:
+                break
+            time.sleep(options['poll'])
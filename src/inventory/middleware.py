@@ -0,0 +1,46 @@
+import random
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from inventory.profiling import QueryProfile
+
+
+class QueryProfilerMiddleware:
+    """
+    Profiles the queries and timings of a sample of requests, see
+    `inventory.profiling`. Goes first in ``MIDDLEWARE`` so the queries of the
+    other middleware are counted too; removed from the chain unless
+    ``QUERY_PROFILER_ENABLED`` is set.
+    """
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.QUERY_PROFILER_SAMPLE_RATE
+        self.slow_ms = settings.QUERY_PROFILER_SLOW_MS
+        self.add_header = settings.QUERY_PROFILER_HEADER
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = request.query_profile = QueryProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        # Template responses are rendered by the time they get here
+        profile.end_view()
+
+        summary = profile.summary(request, response)
+        profile.log(summary, self.slow_ms)
+        if self.add_header:
+            response['X-Query-Profile'] = profile.header(summary)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, 'query_profile', None)
+        if profile is not None:
+            profile.start_view()
+        return None
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def create_missing_room_settings(apps, schema_editor):
+    Room = apps.get_model('inventory', 'Room')
+    RoomSettings = apps.get_model('inventory', 'RoomSettings')
+    RoomSettings.objects.bulk_create(
+        RoomSettings(room_id=room_id)
+        for room_id in Room.objects.filter(roomsettings__isnull=True).values_list('id', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_roomsettings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_room_settings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 10:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_opening_balances(apps, schema_editor):
+    Item = apps.get_model('inventory', 'Item')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(
+                item_id=item['id'],
+                movement_type='opening',
+                total_delta=item['total_count'],
+                available_delta=item['available_count'],
+                in_use_delta=item['in_use'],
+                archived_delta=item['achived_count'],
+            )
+            for item in Item.objects.values('id', 'total_count', 'available_count', 'in_use', 'achived_count').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0007_create_missing_roomsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('opening', 'Opening balance'), ('purchase', 'Purchase'), ('assign', 'Assigned'), ('release', 'Released'), ('archive', 'Archived'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('total_delta', models.IntegerField(default=0)),
+                ('available_delta', models.IntegerField(default=0)),
+                ('in_use_delta', models.IntegerField(default=0)),
+                ('archived_delta', models.IntegerField(default=0)),
+                ('source_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.userprofile')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.item')),
+                ('source_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['item', 'created_on'], name='inventory_s_item_id_d7396d_idx'),
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
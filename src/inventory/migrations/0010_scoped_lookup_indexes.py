@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archive',
+            index=models.Index(fields=['room', 'organisation', 'archived_on', 'id'], name='inventory_a_room_id_409b30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='brand',
+            index=models.Index(fields=['room', 'organisation'], name='inventory_b_room_id_67ee0d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['room', 'organisation'], name='inventory_c_room_id_279850_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['room', 'organisation', 'created_on', 'id'], name='inventory_i_room_id_88a0c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['organisation', 'resolved', 'created_on', 'id'], name='inventory_i_organis_7c8413_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['room', 'organisation', 'created_on', 'id'], name='inventory_i_room_id_39ffcd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['room', 'organisation', 'created_on', 'id'], name='inventory_p_room_id_614882_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['organisation', 'status', 'created_on', 'id'], name='inventory_p_organis_62bb24_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='system',
+            index=models.Index(fields=['room', 'organisation', 'created_on', 'id'], name='inventory_s_room_id_5277e3_idx'),
+        ),
+    ]
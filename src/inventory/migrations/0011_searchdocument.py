@@ -0,0 +1,68 @@
+# Generated by Django 4.2 on 2026-10-18 10:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+POSTGRESQL_FORWARDS = [
+    "CREATE INDEX inventory_searchdocument_vector ON inventory_searchdocument USING GIN "
+    "((setweight(to_tsvector('simple', title), 'A') || to_tsvector('simple', text)))",
+]
+POSTGRESQL_BACKWARDS = ["DROP INDEX inventory_searchdocument_vector"]
+
+# External content FTS5 table over the documents, kept in sync by triggers
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE inventory_searchdocument_fts USING fts5("
+    "title, text, content='inventory_searchdocument', content_rowid='id')",
+    "CREATE TRIGGER inventory_searchdocument_ai AFTER INSERT ON inventory_searchdocument BEGIN "
+    "INSERT INTO inventory_searchdocument_fts(rowid, title, text) VALUES (new.id, new.title, new.text); END",
+    "CREATE TRIGGER inventory_searchdocument_ad AFTER DELETE ON inventory_searchdocument BEGIN "
+    "INSERT INTO inventory_searchdocument_fts(inventory_searchdocument_fts, rowid, title, text) "
+    "VALUES ('delete', old.id, old.title, old.text); END",
+    "CREATE TRIGGER inventory_searchdocument_au AFTER UPDATE ON inventory_searchdocument BEGIN "
+    "INSERT INTO inventory_searchdocument_fts(inventory_searchdocument_fts, rowid, title, text) "
+    "VALUES ('delete', old.id, old.title, old.text); "
+    "INSERT INTO inventory_searchdocument_fts(rowid, title, text) VALUES (new.id, new.title, new.text); END",
+]
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER inventory_searchdocument_au",
+    "DROP TRIGGER inventory_searchdocument_ad",
+    "DROP TRIGGER inventory_searchdocument_ai",
+    "DROP TABLE inventory_searchdocument_fts",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_scoped_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('item', 'Item'), ('system', 'System'), ('purchase', 'Purchase')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('slug', models.SlugField(max_length=255)),
+                ('title', models.CharField(max_length=255)),
+                ('text', models.TextField(blank=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='inventory.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRESQL_FORWARDS, 'sqlite': SQLITE_FORWARDS}),
+            run_for_vendor({'postgresql': POSTGRESQL_BACKWARDS, 'sqlite': SQLITE_BACKWARDS}),
+        ),
+    ]
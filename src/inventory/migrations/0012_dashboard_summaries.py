@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-18 11:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_student_directory'),
+        ('inventory', '0011_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_stock', models.IntegerField(default=0)),
+                ('available_stock', models.IntegerField(default=0)),
+                ('in_use_stock', models.IntegerField(default=0)),
+                ('archived_stock', models.IntegerField(default=0)),
+                ('pending_purchases', models.IntegerField(default=0)),
+                ('open_issues', models.IntegerField(default=0)),
+                ('active_systems', models.IntegerField(default=0)),
+                ('inactive_systems', models.IntegerField(default=0)),
+                ('under_maintenance_systems', models.IntegerField(default=0)),
+                ('disposed_systems', models.IntegerField(default=0)),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.organisation')),
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='inventory.room')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrgSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_stock', models.IntegerField(default=0)),
+                ('available_stock', models.IntegerField(default=0)),
+                ('in_use_stock', models.IntegerField(default=0)),
+                ('archived_stock', models.IntegerField(default=0)),
+                ('pending_purchases', models.IntegerField(default=0)),
+                ('open_issues', models.IntegerField(default=0)),
+                ('active_systems', models.IntegerField(default=0)),
+                ('inactive_systems', models.IntegerField(default=0)),
+                ('under_maintenance_systems', models.IntegerField(default=0)),
+                ('disposed_systems', models.IntegerField(default=0)),
+                ('organisation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_summary', to='core.organisation')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='roomsummary',
+            index=models.Index(fields=['organisation', 'room'], name='inventory_r_organis_0879fb_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_dashboard_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='brand',
+            index=models.Index(fields=['room', 'brand_name'], name='inventory_b_room_id_0a481b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['room', 'category_name'], name='inventory_c_room_id_d7c48c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['room', 'item_name'], name='inventory_i_room_id_1e482f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['organisation', 'vendor_name'], name='inventory_v_organis_36cc3e_idx'),
+        ),
+    ]
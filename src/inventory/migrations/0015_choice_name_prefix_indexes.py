@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-18 14:05
+
+from django.db import migrations
+
+# istartswith compiles to UPPER(column) LIKE UPPER(%s) on PostgreSQL and to a
+# case-insensitive LIKE on SQLite, which the plain (room, name) indexes cannot
+# serve. These indexes match each form: the upper-cased name with
+# text_pattern_ops, and the name with the NOCASE collation.
+INDEXES = [
+    ('inventory_category_room_name_prefix', 'inventory_category', 'room_id', 'category_name'),
+    ('inventory_brand_room_name_prefix', 'inventory_brand', 'room_id', 'brand_name'),
+    ('inventory_item_room_name_prefix', 'inventory_item', 'room_id', 'item_name'),
+    ('inventory_vendor_org_name_prefix', 'inventory_vendor', 'organisation_id', 'vendor_name'),
+]
+
+POSTGRESQL_FORWARDS = [
+    f"CREATE INDEX {name} ON {table} ({scope}, UPPER({column}) text_pattern_ops)" for name, table, scope, column in INDEXES
+]
+SQLITE_FORWARDS = [
+    f"CREATE INDEX {name} ON {table} ({scope}, {column} COLLATE NOCASE)" for name, table, scope, column in INDEXES
+]
+BACKWARDS = [f"DROP INDEX {name}" for name, _, _, _ in INDEXES]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_item_org_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRESQL_FORWARDS, 'sqlite': SQLITE_FORWARDS}),
+            run_for_vendor({'postgresql': BACKWARDS, 'sqlite': BACKWARDS}),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 14:20
+
+from django.db import migrations
+
+# Case-insensitive prefix index for item searches across the organisation,
+# see 0015_choice_name_prefix_indexes.
+INDEXES = [
+    ('inventory_item_org_name_prefix', 'inventory_item', 'organisation_id', 'item_name'),
+]
+
+POSTGRESQL_FORWARDS = [
+    f"CREATE INDEX {name} ON {table} ({scope}, UPPER({column}) text_pattern_ops)" for name, table, scope, column in INDEXES
+]
+SQLITE_FORWARDS = [
+    f"CREATE INDEX {name} ON {table} ({scope}, {column} COLLATE NOCASE)" for name, table, scope, column in INDEXES
+]
+BACKWARDS = [f"DROP INDEX {name}" for name, _, _, _ in INDEXES]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_choice_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRESQL_FORWARDS, 'sqlite': SQLITE_FORWARDS}),
+            run_for_vendor({'postgresql': BACKWARDS, 'sqlite': BACKWARDS}),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_item_org_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='reportjob',
+            name='file',
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -1,13 +1,18 @@
+import uuid
 from django.db import models
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.forms import ValidationError
 from core.models import Organisation, UserProfile, Department
 from django.utils.text import slugify
-from config.utils import generate_unique_slug, generate_unique_code
-from django.db.models.signals import post_delete
+from config.utils import generate_unique_slug, generate_unique_code, LoadedValuesMixin, UniqueSlugMixin
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.core.cache import cache
+from config.cache import make_key
 
 
-class Room(models.Model):
+class Room(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True)
     label = models.CharField(max_length=20)
@@ -35,11 +40,51 @@ class RoomSettings(models.Model):
     categories_tab = models.BooleanField(default=True)
     brands_tab = models.BooleanField(default=True)
     
+    TAB_FIELDS = ['items_tab', 'item_groups_tab', 'systems_tab', 'categories_tab', 'brands_tab']
+
     def __str__(self):
         return f"{self.room.room_name} settings"
 
+    @staticmethod
+    def cache_key(room):
+        return make_key('room_settings', room.pk, org_id=room.organisation_id)
+
+    @classmethod
+    def for_room(cls, room):
+        """
+        Return the settings of `room`, served from the cache when possible.
+
+        Rows are created together with their room, so a miss is a single SELECT.
+        Should a row still be missing, unsaved defaults are returned rather than
+        writing to the database while rendering a page. Saving the settings
+        deletes the cached copy, which every worker only misses with a cache
+        shared between them; the settings refuse a per-process one without DEBUG.
+        """
+        key = cls.cache_key(room)
+        values = cache.get(key)
+        if values is None:
+            values = cls.objects.filter(room_id=room.pk).values('id', *cls.TAB_FIELDS).first()
+            if values is None:
+                return cls(room=room)
+            cache.set(key, values)
+        room_settings = cls(room=room, **values)
+        room_settings._state.adding = False
+        return room_settings
+
+
+@receiver(post_save, sender=Room)
+def create_room_settings(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RoomSettings.objects.get_or_create(room=instance)
+
+
+@receiver(post_save, sender=RoomSettings)
+@receiver(post_delete, sender=RoomSettings)
+def invalidate_room_settings_cache(sender, instance, **kwargs):
+    cache.delete(RoomSettings.cache_key(instance.room))
 
-class Activity(models.Model):
+
+class Activity(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     action = models.CharField(max_length=255)
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
@@ -57,7 +102,7 @@ class Activity(models.Model):
         return self.action
 
 
-class Vendor(models.Model):
+class Vendor(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     vendor_name = models.CharField(max_length=255)
     email = models.EmailField()
@@ -69,9 +114,14 @@ class Vendor(models.Model):
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
     
+    generated_fields = ('vendor_id', 'slug')
+
+    class Meta:
+        indexes = [models.Index(fields=['organisation', 'vendor_name'])]
+    
     def save(self, *args, **kwargs):
         if not self.vendor_id:
-            self.vendor_id = generate_unique_code(self, 8, 'vendor_id')
+            self.vendor_id = generate_unique_code(8)
         if not self.slug:
             base_slug = slugify(self.vendor_name)
             self.slug = generate_unique_slug(self, base_slug)
@@ -81,7 +131,7 @@ class Vendor(models.Model):
         return self.vendor_name
 
 
-class Purchase(models.Model):
+class Purchase(LoadedValuesMixin, UniqueSlugMixin, models.Model):
     UNIT_CHOICES = [
         ('kilogram', 'Kilogram'),
         ('liters', 'Liters'),
@@ -105,10 +155,18 @@ class Purchase(models.Model):
     added_to_stock = models.BooleanField(default=False)
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'organisation', 'created_on', 'id']),
+            models.Index(fields=['organisation', 'status', 'created_on', 'id']),
+        ]
+    
+    generated_fields = ('purchase_id', 'slug')
     
     def save(self, *args, **kwargs):
         if not self.purchase_id:
-            self.purchase_id = generate_unique_code(self, 8, 'purchase_id')
+            self.purchase_id = generate_unique_code(8)
         if not self.slug:
             base_slug = slugify(self.purchase_id)
             self.slug = generate_unique_slug(self, base_slug)
@@ -124,7 +182,7 @@ def delete_related_item(sender, instance, **kwargs):
         item.delete()
 
 
-class Issue(models.Model):
+class Issue(LoadedValuesMixin, UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     created_by = models.CharField(max_length=255)
@@ -134,6 +192,12 @@ class Issue(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'organisation', 'created_on', 'id']),
+            models.Index(fields=['organisation', 'resolved', 'created_on', 'id']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -145,13 +209,16 @@ class Issue(models.Model):
         return self.subject
 
 
-class Category(models.Model):
+class Category(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     category_name = models.CharField(max_length=255)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=['room', 'organisation']), models.Index(fields=['room', 'category_name'])]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -163,13 +230,16 @@ class Category(models.Model):
         return self.category_name
 
 
-class Brand(models.Model):
+class Brand(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     brand_name = models.CharField(max_length=255)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=['room', 'organisation']), models.Index(fields=['room', 'brand_name'])]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -180,7 +250,7 @@ class Brand(models.Model):
     def __str__(self):
         return self.brand_name
 
-class Item(models.Model):
+class Item(LoadedValuesMixin, UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     department = models.ForeignKey(Department, null=True, blank=True, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
@@ -195,6 +265,13 @@ class Item(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'organisation', 'created_on', 'id']),
+            models.Index(fields=['room', 'item_name']),
+            models.Index(fields=['organisation', 'item_name']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -206,7 +283,7 @@ class Item(models.Model):
         return self.item_name
     
 
-class ItemGroup(models.Model):
+class ItemGroup(UniqueSlugMixin, models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     department = models.ForeignKey(Department, null=True, blank=True, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
@@ -225,7 +302,7 @@ class ItemGroup(models.Model):
         return self.item_group_name
     
 
-class ItemGroupItem(models.Model):
+class ItemGroupItem(UniqueSlugMixin, models.Model):
     item_group = models.ForeignKey(ItemGroup, on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     qty = models.IntegerField()
@@ -249,14 +326,15 @@ class ItemGroupItem(models.Model):
         return self.item.item_name
 
 @receiver(post_delete, sender=ItemGroupItem)
-def restore_item_count(sender, instance, **kwargs):
-    item = instance.item
-    item.available_count += instance.qty
-    item.in_use -= instance.qty
-    item.save()
+def restore_item_count(sender, instance, origin=None, **kwargs):
+    # Return the stock only when the group changes, not when the item itself is being deleted
+    if origin is not None and getattr(origin, 'model', type(origin)) not in (ItemGroup, ItemGroupItem):
+        return
+    from inventory import stock
+    stock.release(instance.item_id, instance.qty, source=instance)
 
 
-class System(models.Model):
+class System(LoadedValuesMixin, UniqueSlugMixin, models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
         ('inactive', 'Inactive'),
@@ -271,6 +349,9 @@ class System(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=['room', 'organisation', 'created_on', 'id'])]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -282,7 +363,7 @@ class System(models.Model):
         return self.system_name
 
 
-class SystemComponent(models.Model):
+class SystemComponent(UniqueSlugMixin, models.Model):
     COMPONENT_TYPES = [
         ('mouse', 'Mouse'),
         ('keyboard', 'Keyboard'),
@@ -324,7 +405,7 @@ class SystemComponent(models.Model):
         return self.component_item.item_name  # Updated field
 
 
-class Archive(models.Model):
+class Archive(UniqueSlugMixin, models.Model):
     ARCHIVE_TYPES = [
         ('consumption', 'Consumption'),
         ('depreciation', 'Depreciation'),
@@ -338,6 +419,9 @@ class Archive(models.Model):
     remark = models.TextField()
     archived_on = models.DateTimeField(auto_now_add=True)
     slug = models.SlugField(unique=True, max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=['room', 'organisation', 'archived_on', 'id'])]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -359,3 +443,252 @@ class Receipt(models.Model):
     def __str__(self):
         return f"Receipt for {self.purchase.purchase_id}"
 
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of changes to an item's stock counters.
+
+    The counters on `Item` are the materialized running balance of these rows;
+    `rebuild_stock_balances` recomputes them from the ledger.
+    """
+    MOVEMENT_TYPES = [
+        ('opening', 'Opening balance'),
+        ('purchase', 'Purchase'),
+        ('assign', 'Assigned'),
+        ('release', 'Released'),
+        ('archive', 'Archived'),
+        ('adjustment', 'Adjustment'),
+    ]
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='stock_movements')
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPES)
+    total_delta = models.IntegerField(default=0)
+    available_delta = models.IntegerField(default=0)
+    in_use_delta = models.IntegerField(default=0)
+    archived_delta = models.IntegerField(default=0)
+    actor = models.ForeignKey(UserProfile, null=True, blank=True, on_delete=models.SET_NULL)
+    source_type = models.ForeignKey(ContentType, null=True, blank=True, on_delete=models.SET_NULL)
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
+    source = GenericForeignKey('source_type', 'source_id')
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['item', 'created_on'])]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stock movements are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Stock movements are append-only.")
+
+    def __str__(self):
+        return f"{self.get_movement_type_display()} of {self.item_id}"
+
+
+@receiver(post_save, sender=Item)
+def record_opening_balance(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        StockMovement.objects.create(
+            item=instance,
+            movement_type='opening',
+            total_delta=instance.total_count,
+            available_delta=instance.available_count,
+            in_use_delta=instance.in_use,
+            archived_delta=instance.achived_count,
+        )
+
+
+class ReportJob(models.Model):
+    """A room report queued for rendering outside of the request cycle."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='report_jobs')
+    requested_by = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Key of the rendered report in `inventory.report_cache`
+    fingerprint = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_on'])]
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    def __str__(self):
+        return f"Report for {self.room} ({self.status})"
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of an item, system or purchase, maintained by
+    `inventory.search`. The full-text index over `title` and `text` is
+    database specific and created by the migration.
+    """
+    KIND_CHOICES = [
+        ('item', 'Item'),
+        ('system', 'System'),
+        ('purchase', 'Purchase'),
+    ]
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    slug = models.SlugField(max_length=255)
+    title = models.CharField(max_length=255)
+    text = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document')]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=System)
+@receiver(post_save, sender=Purchase)
+@receiver(post_save, sender=SystemComponent)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Vendor)
+def update_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        from inventory import search
+        search.index_instance(instance, created=created)
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=System)
+@receiver(post_delete, sender=Purchase)
+@receiver(post_delete, sender=SystemComponent)
+def remove_search_documents(sender, instance, **kwargs):
+    from inventory import search
+    search.remove_instance(instance)
+
+
+class SummaryCounts(models.Model):
+    """
+    Counters shown on the central admin dashboard. Writes to items,
+    purchases, issues and systems keep them current through
+    `inventory.dashboard`; ``rebuild_dashboard`` recomputes them.
+    """
+    item_count = models.IntegerField(default=0)
+    total_stock = models.IntegerField(default=0)
+    available_stock = models.IntegerField(default=0)
+    in_use_stock = models.IntegerField(default=0)
+    archived_stock = models.IntegerField(default=0)
+    pending_purchases = models.IntegerField(default=0)
+    open_issues = models.IntegerField(default=0)
+    active_systems = models.IntegerField(default=0)
+    inactive_systems = models.IntegerField(default=0)
+    under_maintenance_systems = models.IntegerField(default=0)
+    disposed_systems = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    COUNTERS = [
+        'item_count', 'total_stock', 'available_stock', 'in_use_stock', 'archived_stock', 'pending_purchases',
+        'open_issues', 'active_systems', 'inactive_systems', 'under_maintenance_systems', 'disposed_systems',
+    ]
+
+    def systems_by_status(self):
+        return [(label, getattr(self, f'{status}_systems')) for status, label in System.STATUS_CHOICES]
+
+
+class OrgSummary(SummaryCounts):
+    organisation = models.OneToOneField(Organisation, on_delete=models.CASCADE, related_name='inventory_summary')
+
+    def __str__(self):
+        return f"{self.organisation} summary"
+
+
+class RoomSummary(SummaryCounts):
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, related_name='summary')
+    organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [models.Index(fields=['organisation', 'room'])]
+
+    def __str__(self):
+        return f"{self.room} summary"
+
+
+@receiver(post_save, sender=Organisation)
+def create_org_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        OrgSummary.objects.get_or_create(organisation=instance)
+
+
+@receiver(post_save, sender=Room)
+def create_room_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RoomSummary.objects.get_or_create(room=instance, defaults={'organisation_id': instance.organisation_id})
+
+
+@receiver(pre_save, sender=Item)
+@receiver(pre_save, sender=Purchase)
+@receiver(pre_save, sender=Issue)
+@receiver(pre_save, sender=System)
+@receiver(pre_delete, sender=Item)
+@receiver(pre_delete, sender=Purchase)
+@receiver(pre_delete, sender=Issue)
+@receiver(pre_delete, sender=System)
+def remember_summary_fields(sender, instance, raw=False, **kwargs):
+    if not raw:
+        from inventory import dashboard
+        dashboard.remember(instance)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Purchase)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=System)
+def update_summaries(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        from inventory import dashboard
+        dashboard.record_save(instance, created)
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Purchase)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=System)
+def update_summaries_on_delete(sender, instance, **kwargs):
+    from inventory import dashboard
+    dashboard.record_delete(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Department)
+def forget_choices(sender, instance, raw=False, **kwargs):
+    if not raw:
+        from inventory import autocomplete
+        autocomplete.forget(instance.organisation_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_people_choices(sender, instance, raw=False, **kwargs):
+    if not raw and instance.org_id is not None:
+        from inventory import autocomplete
+        autocomplete.forget(instance.org_id)
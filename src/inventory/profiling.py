@@ -0,0 +1,86 @@
+"""
+Per-request query profiling, switched on with ``QUERY_PROFILER_ENABLED``.
+
+`QueryProfilerMiddleware` profiles a ``QUERY_PROFILER_SAMPLE_RATE`` share of
+requests; the others only pay for drawing a random number. While a sampled
+request is handled every query of every database connection goes through
+`QueryProfile`, which times it and counts identical statements run with
+identical parameters, such as a row fetched again by each part of a page.
+
+Each profile is logged as one JSON line to the ``inventory.profiling``
+logger and, with ``QUERY_PROFILER_HEADER``, summed up in an
+``X-Query-Profile`` response header. Requests slower than
+``QUERY_PROFILER_SLOW_MS`` are also logged with their slowest queries to
+``inventory.profiling.slow``, which the settings send to a rotating file.
+"""
+import json
+import logging
+import time
+from collections import Counter
+
+logger = logging.getLogger('inventory.profiling')
+slow_logger = logging.getLogger('inventory.profiling.slow')
+
+# Statements listed in a log line
+DUPLICATES_SHOWN = 5
+SLOWEST_SHOWN = 20
+
+
+class QueryProfile:
+    """Execute wrapper timing the queries of one request."""
+
+    def __init__(self):
+        self.queries = []
+        self.statements = Counter()
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_ms = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+            self.statements[(context['connection'].alias, sql, repr(params))] += 1
+
+    def start_view(self):
+        self.view_started = time.perf_counter()
+
+    def end_view(self):
+        if self.view_started is not None:
+            self.view_ms = (time.perf_counter() - self.view_started) * 1000
+
+    def get_duplicates(self):
+        """The statements run more than once, most repeated first, as ``(sql, times run)``."""
+        return [(sql, count) for (_, sql, _), count in self.statements.most_common() if count > 1]
+
+    def summary(self, request, response):
+        total_ms = (time.perf_counter() - self.started) * 1000
+        duplicates = self.get_duplicates()
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match is not None else None,
+            'status': response.status_code,
+            'queries': len(self.queries),
+            'sql_ms': round(sum(ms for _, ms in self.queries), 2),
+            'duplicate_queries': sum(count - 1 for _, count in duplicates),
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates[:DUPLICATES_SHOWN]],
+            'view_ms': round(self.view_ms, 2) if self.view_ms is not None else None,
+            'total_ms': round(total_ms, 2),
+        }
+
+    def header(self, summary):
+        return '; '.join(
+            f'{name}={summary[name]}' for name in ('queries', 'sql_ms', 'duplicate_queries', 'view_ms', 'total_ms')
+        )
+
+    def log(self, summary, slow_ms):
+        logger.info(json.dumps(summary))
+        if summary['total_ms'] >= slow_ms:
+            slowest = sorted(self.queries, key=lambda query: query[1], reverse=True)[:SLOWEST_SHOWN]
+            slow_logger.warning(json.dumps({
+                **summary, 'slowest': [{'sql': sql, 'ms': round(ms, 2)} for sql, ms in slowest],
+            }))
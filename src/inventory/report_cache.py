@@ -0,0 +1,105 @@
+"""
+On-disk cache of rendered room reports.
+
+A report is stored under a fingerprint of everything it shows: the row
+count and latest change of each model in the room plus the room's tab
+settings. Any edit moves the fingerprint, so entries never need to be
+invalidated; unused ones are evicted least recently used first once the
+cache grows past ``REPORT_CACHE_MAX_BYTES``.
+"""
+import hashlib
+import os
+import tempfile
+from django.conf import settings
+from django.db.models import Count, Max
+from inventory.models import Archive, Brand, Category, Issue, Item, ItemGroup, Purchase, System, SystemComponent
+
+# (model, lookup to the room, field that changes whenever a row does)
+REPORT_SOURCES = [
+    (Category, 'room', 'updated_on'),
+    (Brand, 'room', 'updated_on'),
+    (Item, 'room', 'updated_on'),
+    (System, 'room', 'updated_on'),
+    (SystemComponent, 'system__room', 'updated_on'),
+    (ItemGroup, 'room', 'updated_on'),
+    (Purchase, 'room', 'updated_on'),
+    (Archive, 'room', 'archived_on'),
+    (Issue, 'room', 'updated_on'),
+]
+
+
+def fingerprint(room, room_settings):
+    parts = [str(room.updated_on)]
+    parts += [f"{field}={getattr(room_settings, field)}" for field in room_settings.TAB_FIELDS]
+    for model, room_lookup, changed_field in REPORT_SOURCES:
+        stats = model.objects.filter(**{room_lookup: room}).aggregate(count=Count('pk'), last=Max(changed_field))
+        parts.append(f"{model.__name__}:{stats['count']}:{stats['last']}")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def get_cache_dir():
+    return settings.REPORT_CACHE_DIR
+
+
+def get_path(room, report_fingerprint):
+    return os.path.join(get_cache_dir(), f"room-{room.pk}-{report_fingerprint}.pdf")
+
+
+def get(room, report_fingerprint):
+    """
+    The cached report opened for reading, or None. A hit marks the file as
+    recently used. The open file stays readable if another process evicts
+    it before it is served.
+    """
+    path = get_path(room, report_fingerprint)
+    try:
+        cached_file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(cached_file.fileno())
+    except OSError:
+        pass
+    return cached_file
+
+
+def store(room, report_fingerprint, pdf):
+    """Write `pdf` to the cache atomically, then evict old reports. Returns its path."""
+    os.makedirs(get_cache_dir(), exist_ok=True)
+    path = get_path(room, report_fingerprint)
+    fd, tmp_path = tempfile.mkstemp(dir=get_cache_dir(), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(pdf)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    evict(keep=path)
+    return path
+
+
+def evict(max_bytes=None, keep=None):
+    """Delete least recently used reports until the cache fits in `max_bytes`."""
+    max_bytes = settings.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    with os.scandir(get_cache_dir()) as it:
+        for entry in it:
+            if entry.name.endswith('.pdf'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -0,0 +1,124 @@
+"""
+Room report jobs.
+
+Rendering a room report with WeasyPrint takes seconds for big rooms, so the
+request only queues a `ReportJob`. Jobs are picked up by a small thread pool
+in the web process (``REPORT_WORKERS``) or, when that is set to 0, by the
+``run_report_jobs`` management command. Either way a job is claimed with a
+conditional ``UPDATE`` so it is rendered exactly once. The finished PDF is
+stored in `report_cache`, which the download view serves it from, and the
+job only keeps its fingerprint; reports of rooms that did not change since
+the last render are not rendered again. A job left pending or running for
+longer than ``REPORT_JOB_TIMEOUT``, as when the process rendering it was
+restarted, is marked failed instead of reused. Finished jobs are deleted
+after ``JOB_RETENTION``.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from inventory import report_cache, selectors
+from inventory.models import ReportJob, RoomSettings
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs are deleted this long after they were queued
+JOB_RETENTION = timedelta(days=7)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.REPORT_WORKERS, thread_name_prefix='report')
+    return _executor
+
+
+def render_report_html(room, room_settings):
+    return render_to_string('room_incharge/room_report.html', selectors.room_report_data(room, room_settings))
+
+
+def render_report_pdf(room, room_settings):
+    # WeasyPrint needs Pango at import time, keep it out of the web process until a report is rendered
+    from weasyprint import HTML
+
+    return HTML(string=render_report_html(room, room_settings)).write_pdf()
+
+
+def cache_report(room, room_settings):
+    """Render the report of `room` into the report cache unless it is there already. Returns its fingerprint."""
+    report_fingerprint = report_cache.fingerprint(room, room_settings)
+    cached_file = report_cache.get(room, report_fingerprint)
+    if cached_file is not None:
+        cached_file.close()
+    else:
+        report_cache.store(room, report_fingerprint, render_report_pdf(room, room_settings))
+    return report_fingerprint
+
+
+def fail_stale_jobs(jobs):
+    """Mark the jobs of `jobs` pending or running for longer than ``REPORT_JOB_TIMEOUT`` as failed."""
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    return jobs.filter(
+        Q(status='pending', created_on__lt=cutoff) | Q(status='running', started_on__lt=cutoff)
+    ).update(status='failed', error="The report took too long and was abandoned.", finished_on=now)
+
+
+def enqueue_report(room, requested_by=None):
+    """
+    Queue a report for `room`, reusing one that is still pending or running
+    for the same user. A reused pending job is submitted to the worker pool
+    again, as the process it was submitted to may be gone.
+    """
+    jobs = ReportJob.objects.filter(room=room, requested_by=requested_by)
+    fail_stale_jobs(jobs)
+    job = jobs.filter(status__in=('pending', 'running')).order_by('-created_on').first()
+    if job is None:
+        ReportJob.objects.filter(
+            status__in=('done', 'failed'), created_on__lt=timezone.now() - JOB_RETENTION
+        ).delete()
+        job = ReportJob.objects.create(room=room, requested_by=requested_by)
+    if job.status == 'pending' and settings.REPORT_WORKERS:
+        # Claiming is conditional, so a job submitted twice is still rendered once
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_pk):
+    try:
+        run_report_job(job_pk)
+    finally:
+        close_old_connections()
+
+
+def run_report_job(job_pk):
+    """Render one job. Returns False when another worker already claimed it."""
+    claimed = ReportJob.objects.filter(pk=job_pk, status='pending').update(status='running', started_on=timezone.now())
+    if not claimed:
+        return False
+
+    job = ReportJob.objects.select_related('room').get(pk=job_pk)
+    try:
+        job.fingerprint = cache_report(job.room, RoomSettings.for_room(job.room))
+        job.status = 'done'
+    except Exception as e:
+        logger.exception("Report job %s failed", job.job_id)
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_on = timezone.now()
+    job.save(update_fields=['fingerprint', 'status', 'error', 'finished_on'])
+    return True
+
+
+def run_pending_jobs(limit=None):
+    """Render queued jobs oldest first. Returns the number of jobs rendered."""
+    job_pks = ReportJob.objects.filter(status='pending').order_by('created_on').values_list('pk', flat=True)
+    if limit:
+        job_pks = job_pks[:limit]
+    return sum(run_report_job(job_pk) for job_pk in list(job_pks))
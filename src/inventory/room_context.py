@@ -0,0 +1,32 @@
+from django.http import Http404
+from inventory.models import Room, RoomSettings
+
+
+class RoomContext:
+    """
+    The room named in the URL together with its settings.
+
+    Resolved once per request by `get_room_context` so that views, forms and
+    templates all share the same `Room` and `RoomSettings` instances.
+    """
+    def __init__(self, room, room_settings):
+        self.room = room
+        self.room_settings = room_settings
+
+    @classmethod
+    def resolve(cls, request, room_slug):
+        """Load the room, scoped to the user's organisation, and its cached settings."""
+        try:
+            room = Room.objects.get(slug=room_slug, organisation_id=request.user.profile.org_id)
+        except Room.DoesNotExist:
+            raise Http404("Room not found.")
+        return cls(room, RoomSettings.for_room(room))
+
+
+def get_room_context(request, room_slug):
+    """Return the `RoomContext` for `room_slug`, memoized on the request."""
+    room_context = getattr(request, '_room_context', None)
+    if room_context is None or room_context.room.slug != room_slug:
+        room_context = RoomContext.resolve(request, room_slug)
+        request._room_context = room_context
+    return room_context
@@ -0,0 +1,225 @@
+"""
+Full-text search over the items, systems and purchases of a room.
+
+Every searchable object has a `SearchDocument` with its title and the text
+it can also be found by: the category and brand of an item, the serial
+numbers and component items of a system, the item and vendor of a purchase.
+The signal handlers in `inventory.models` keep documents current, updating
+the documents changed in a transaction together once it commits; rows
+inserted with ``bulk_create`` are indexed with `index_objects` or the
+``rebuild_search_index`` command.
+
+On PostgreSQL documents are matched against a GIN-indexed tsvector and
+ranked with ``ts_rank``, on SQLite against an FTS5 table ranked with
+``bm25``. Each search term matches as a prefix. Other databases fall back to
+unranked substring matches.
+"""
+import re
+from itertools import islice
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from config.utils import CommitBatch
+from inventory.models import Brand, Category, Item, Purchase, SearchDocument, System, SystemComponent, Vendor
+
+PAGE_SIZE = 20
+MAX_PAGE = 50
+MAX_TERMS = 8
+BATCH_SIZE = 1000
+
+TERM_PATTERN = re.compile(r'[\w-]+')
+
+DOCUMENT_TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{DOCUMENT_TABLE}_fts'
+# Must stay identical to the expression of the GIN index created by the migration
+PG_VECTOR = "(setweight(to_tsvector('simple', title), 'A') || to_tsvector('simple', text))"
+
+RESULT_URLS = {
+    'item': ('room_incharge:item_update', 'item_slug'),
+    'system': ('room_incharge:system_component_list', 'system_slug'),
+    'purchase': ('room_incharge:purchase_update', 'purchase_slug'),
+}
+
+
+def join_text(*values):
+    return ' '.join(str(value) for value in values if value)
+
+
+def item_documents(items):
+    rows = items.values_list('pk', 'room_id', 'slug', 'item_name', 'category__category_name', 'brand__brand_name')
+    for pk, room_id, slug, name, category, brand in rows.iterator(chunk_size=BATCH_SIZE):
+        yield SearchDocument(kind='item', object_id=pk, room_id=room_id, slug=slug, title=name, text=join_text(category, brand))
+
+
+def system_documents(systems):
+    components = {}
+    rows = SystemComponent.objects.filter(system__in=systems.values('pk')).values_list(
+        'system_id', 'component_type', 'serial_number', 'component_item__item_name',
+    )
+    for system_id, *values in rows.iterator(chunk_size=BATCH_SIZE):
+        components.setdefault(system_id, []).extend(values)
+
+    rows = systems.values_list('pk', 'room_id', 'slug', 'system_name', 'status')
+    for pk, room_id, slug, name, status in rows.iterator(chunk_size=BATCH_SIZE):
+        yield SearchDocument(
+            kind='system', object_id=pk, room_id=room_id, slug=slug, title=name,
+            text=join_text(status, *components.get(pk, ())),
+        )
+
+
+def purchase_documents(purchases):
+    rows = purchases.values_list('pk', 'room_id', 'slug', 'purchase_id', 'item__item_name', 'vendor__vendor_name', 'status')
+    for pk, room_id, slug, purchase_id, item_name, vendor_name, status in rows.iterator(chunk_size=BATCH_SIZE):
+        yield SearchDocument(
+            kind='purchase', object_id=pk, room_id=room_id, slug=slug, title=purchase_id,
+            text=join_text(item_name, vendor_name, status),
+        )
+
+
+DOCUMENT_BUILDERS = {
+    'item': (Item, item_documents),
+    'system': (System, system_documents),
+    'purchase': (Purchase, purchase_documents),
+}
+
+
+def index_objects(kind, queryset):
+    """Replace the documents of the objects of `kind` in `queryset`."""
+    build = DOCUMENT_BUILDERS[kind][1]
+    with transaction.atomic():
+        SearchDocument.objects.filter(kind=kind, object_id__in=queryset.values('pk')).delete()
+        _insert(build(queryset))
+
+
+def rebuild(rooms):
+    """Recreate every document of `rooms`, a queryset."""
+    with transaction.atomic():
+        SearchDocument.objects.filter(room__in=rooms).delete()
+        for kind, (model, build) in DOCUMENT_BUILDERS.items():
+            _insert(build(model.objects.filter(room__in=rooms)))
+
+
+def _insert(documents):
+    documents = iter(documents)
+    while batch := list(islice(documents, BATCH_SIZE)):
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Changes:
+    """Documents to update, by the lookups of their objects, and to delete, by their objects' pks."""
+
+    def __init__(self):
+        self.lookups = {}
+        self.removed = {}
+
+    def index(self, kind, lookup, value):
+        self.lookups.setdefault(kind, {}).setdefault(lookup, set()).add(value)
+
+    def remove(self, kind, pk):
+        self.removed.setdefault(kind, set()).add(pk)
+
+    def apply(self):
+        """Delete the documents of removed objects, then rebuild those of each kind in one pass."""
+        with transaction.atomic():
+            for kind, pks in self.removed.items():
+                SearchDocument.objects.filter(kind=kind, object_id__in=pks).delete()
+            for kind, lookups in self.lookups.items():
+                condition = Q()
+                for lookup, values in lookups.items():
+                    condition |= Q(**{f'{lookup}__in': values})
+                index_objects(kind, DOCUMENT_BUILDERS[kind][0].objects.filter(condition).distinct())
+
+
+# Documents changed by the rows saved and deleted in the current transaction
+pending = CommitBatch(Changes, Changes.apply)
+
+
+def showing(instance, created=False):
+    """``(kind, lookup, value)`` of the objects whose documents show `instance`."""
+    if isinstance(instance, Item):
+        yield 'item', 'pk', instance.pk
+        if not created:
+            yield 'purchase', 'item', instance.pk
+            yield 'system', 'systemcomponent__component_item', instance.pk
+    elif isinstance(instance, System):
+        yield 'system', 'pk', instance.pk
+    elif isinstance(instance, SystemComponent):
+        yield 'system', 'pk', instance.system_id
+    elif isinstance(instance, Purchase):
+        yield 'purchase', 'pk', instance.pk
+    elif created:
+        return
+    elif isinstance(instance, Category):
+        yield 'item', 'category', instance.pk
+    elif isinstance(instance, Brand):
+        yield 'item', 'brand', instance.pk
+    elif isinstance(instance, Vendor):
+        yield 'purchase', 'vendor', instance.pk
+
+
+def index_instance(instance, created=False):
+    """Update the documents that show `instance`, which was just saved, once the transaction commits."""
+    lookups = list(showing(instance, created))
+    if lookups:
+        pending.add(lambda changes: [changes.index(*lookup) for lookup in lookups])
+
+
+def remove_instance(instance):
+    """Update the documents that showed `instance`, which was just deleted, once the transaction commits."""
+    if isinstance(instance, SystemComponent):
+        index_instance(instance)
+        return
+    kind = next(kind for kind, (model, _) in DOCUMENT_BUILDERS.items() if isinstance(instance, model))
+    pending.add(lambda changes: changes.remove(kind, instance.pk))
+
+
+def get_terms(query):
+    terms = (term.strip('-') for term in TERM_PATTERN.findall(query.lower()))
+    return [term for term in terms if term][:MAX_TERMS]
+
+
+def search(room, query, page=1, page_size=PAGE_SIZE):
+    """
+    Return the documents of `room` matching every term of `query`, best
+    matches first, as ``(documents, has_next)`` for the given page.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return [], False
+    backend = {'postgresql': _search_postgresql, 'sqlite': _search_sqlite}.get(connection.vendor, _search_substring)
+    documents = list(backend(room, terms, (page - 1) * page_size, page_size + 1))
+    return documents[:page_size], len(documents) > page_size
+
+
+def _search_postgresql(room, terms, offset, limit):
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    return SearchDocument.objects.raw(
+        f"SELECT d.*, ts_rank({PG_VECTOR}, q) AS rank "
+        f"FROM {DOCUMENT_TABLE} d, to_tsquery('simple', %s) q "
+        f"WHERE d.room_id = %s AND {PG_VECTOR} @@ q "
+        f"ORDER BY rank DESC, d.id LIMIT %s OFFSET %s",
+        [tsquery, room.pk, limit, offset],
+    )
+
+
+def _search_sqlite(room, terms, offset, limit):
+    # A quoted term is searched as a phrase of its tokens, the last one as a prefix
+    match = ' '.join(f'"{term}"*' for term in terms)
+    return SearchDocument.objects.raw(
+        f"SELECT d.* FROM {FTS_TABLE} JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s AND d.room_id = %s "
+        f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), d.id LIMIT %s OFFSET %s",
+        [match, room.pk, limit, offset],
+    )
+
+
+def _search_substring(room, terms, offset, limit):
+    documents = SearchDocument.objects.filter(room=room)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(text__icontains=term))
+    return documents.order_by('title', 'pk')[offset:offset + limit]
+
+
+def result_url(document, room_slug):
+    url_name, slug_kwarg = RESULT_URLS[document.kind]
+    return reverse(url_name, kwargs={'room_slug': room_slug, slug_kwarg: document.slug})
@@ -0,0 +1,164 @@
+"""
+Synthetic inventory data for benchmarks.
+
+`seed_organisation` bulk-inserts an organisation with rooms full of items,
+systems and their components, item groups, purchases, archives and issues.
+Rows skip `save()`, so slugs and codes are generated up front, items get
+their opening stock movement in bulk and search documents and dashboard
+summaries are built in one pass at the end. Purchases, archives and issues
+can be spread over a history of `history_days` days.
+"""
+import random
+from datetime import timedelta
+from uuid import uuid4
+from django.utils import timezone
+from core.models import Department, Organisation, User, UserProfile
+from config.utils import reserve_unique_codes
+from inventory import dashboard, search, stock
+from inventory.models import (
+    Archive, Brand, Category, Issue, Item, ItemGroup, ItemGroupItem, Purchase, Room, RoomSettings, System,
+    SystemComponent, Vendor,
+)
+
+BATCH_SIZE = 1000
+CATEGORIES_PER_ROOM = 5
+BRANDS_PER_ROOM = 5
+ITEMS_PER_GROUP = 5
+
+# Number of equal slices of a history, each moved to its own date with one UPDATE
+HISTORY_SLICES = 36
+
+
+def seed_organisation(rooms=10, items_per_room=100, systems_per_room=10, purchases_per_room=50,
+                      archives_per_room=50, issues_per_room=20, components_per_system=0, item_groups_per_room=0,
+                      departments=0, history_days=0, seed=0):
+    """Create and return an organisation of the given scale."""
+    rng = random.Random(seed)
+    token = uuid4().hex[:8]
+    org = Organisation.objects.create(name=f"Benchmark {token}", slug=f"benchmark-{token}")
+    department_list = Department.objects.bulk_create([
+        Department(organisation=org, department_name=f"Department {n}", slug=f"department-{token}-{n}")
+        for n in range(departments)
+    ])
+
+    User.objects.bulk_create(
+        [User(email=f"incharge-{token}-{n}@example.com") for n in range(rooms)], batch_size=BATCH_SIZE
+    )
+    users = User.objects.filter(email__startswith=f"incharge-{token}-").order_by('pk')
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(user=user, org=org, first_name="Room", last_name=f"Incharge {n}", is_incharge=True, slug=f"incharge-{token}-{n}")
+        for n, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+    Room.objects.bulk_create([
+        Room(organisation=org, label=f"R{n}", room_name=f"Room {n}", incharge=profile, slug=f"room-{token}-{n}",
+             department=department_list[n % departments] if departments else None)
+        for n, profile in enumerate(profiles)
+    ], batch_size=BATCH_SIZE)
+    room_list = list(Room.objects.filter(organisation=org).order_by('pk'))
+    RoomSettings.objects.bulk_create([RoomSettings(room=room) for room in room_list], batch_size=BATCH_SIZE)
+
+    vendor = Vendor.objects.create(
+        organisation=org, vendor_name="Benchmark vendor", email="vendor@example.com",
+        contact_number="1", alternate_number="2", address="Street", slug=f"vendor-{token}",
+    )
+
+    for model, name_field, per_room in ((Category, 'category_name', CATEGORIES_PER_ROOM), (Brand, 'brand_name', BRANDS_PER_ROOM)):
+        model.objects.bulk_create([
+            model(organisation=org, room=room, slug=f"{name_field}-{token}-{room.pk}-{n}", **{name_field: f"{model.__name__} {n}"})
+            for room in room_list for n in range(per_room)
+        ], batch_size=BATCH_SIZE)
+    categories = _by_room(Category.objects.filter(organisation=org))
+    brands = _by_room(Brand.objects.filter(organisation=org))
+
+    items = []
+    for room in room_list:
+        for n in range(items_per_room):
+            total = rng.randint(1, 50)
+            items.append(Item(
+                organisation=org, room=room, category=rng.choice(categories[room.pk]), brand=rng.choice(brands[room.pk]),
+                item_name=f"Item {n}", total_count=total, available_count=total, slug=f"item-{token}-{room.pk}-{n}",
+            ))
+    Item.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    stock.record_opening_balances(items, batch_size=BATCH_SIZE)
+    room_items = _by_room(Item.objects.filter(organisation=org).only('pk', 'room_id'))
+
+    System.objects.bulk_create([
+        System(organisation=org, room=room, system_name=f"System {n}", slug=f"system-{token}-{room.pk}-{n}",
+               status=rng.choice(System.STATUS_CHOICES)[0])
+        for room in room_list for n in range(systems_per_room)
+    ], batch_size=BATCH_SIZE)
+
+    # Components and group members are only benchmark rows, they do not move stock
+    if components_per_system:
+        types = [component_type for component_type, _ in SystemComponent.COMPONENT_TYPES]
+        SystemComponent.objects.bulk_create([
+            SystemComponent(system=system, component_item=rng.choice(room_items[system.room_id]),
+                            component_type=types[n % len(types)], serial_number=f"SN-{system.pk}-{n}",
+                            slug=f"component-{token}-{system.pk}-{n}")
+            for system in System.objects.filter(organisation=org).only('pk', 'room_id') for n in range(components_per_system)
+        ], batch_size=BATCH_SIZE)
+
+    if item_groups_per_room:
+        ItemGroup.objects.bulk_create([
+            ItemGroup(organisation=org, room=room, item_group_name=f"Group {n}", slug=f"group-{token}-{room.pk}-{n}")
+            for room in room_list for n in range(item_groups_per_room)
+        ], batch_size=BATCH_SIZE)
+        ItemGroupItem.objects.bulk_create([
+            ItemGroupItem(item_group=group, item=item, qty=1, slug=f"group-item-{token}-{group.pk}-{item.pk}")
+            for group in ItemGroup.objects.filter(organisation=org).only('pk', 'room_id')
+            for item in rng.sample(room_items[group.room_id], min(ITEMS_PER_GROUP, len(room_items[group.room_id])))
+        ], batch_size=BATCH_SIZE)
+
+    purchase_rooms = [room for room in room_list for _ in range(purchases_per_room)]
+    purchase_ids = reserve_unique_codes(Purchase, len(purchase_rooms), 8, 'purchase_id')
+    Purchase.objects.bulk_create([
+        Purchase(organisation=org, room=room, item=rng.choice(room_items[room.pk]), vendor=vendor,
+                 purchase_id=purchase_id, slug=f"{purchase_id}-{token}",
+                 quantity=rng.randint(1, 20), unit_of_measure='units', status=rng.choice(Purchase.STATUS_CHOICES)[0])
+        for room, purchase_id in zip(purchase_rooms, purchase_ids)
+    ], batch_size=BATCH_SIZE)
+
+    Archive.objects.bulk_create([
+        Archive(organisation=org, room=room, item=rng.choice(room_items[room.pk]), count=1, remark="Benchmark",
+                archive_type=rng.choice(Archive.ARCHIVE_TYPES)[0], slug=f"archive-{token}-{room.pk}-{n}")
+        for room in room_list for n in range(archives_per_room)
+    ], batch_size=BATCH_SIZE)
+
+    Issue.objects.bulk_create([
+        Issue(organisation=org, room=room, created_by="Student", subject=f"Issue {n}", description="...",
+              resolved=rng.random() < 0.8, slug=f"issue-{token}-{room.pk}-{n}")
+        for room in room_list for n in range(issues_per_room)
+    ], batch_size=BATCH_SIZE)
+
+    if history_days:
+        for queryset, date_fields in (
+            (Purchase.objects.filter(organisation=org), ['created_on', 'updated_on']),
+            (Archive.objects.filter(organisation=org), ['archived_on']),
+            (Issue.objects.filter(organisation=org), ['created_on', 'updated_on']),
+        ):
+            spread_history(queryset, date_fields, history_days)
+
+    search.rebuild(Room.objects.filter(organisation=org))
+    dashboard.rebuild_organisation(org.pk)
+    return org
+
+
+def _by_room(queryset):
+    rows = {}
+    for row in queryset:
+        rows.setdefault(row.room_id, []).append(row)
+    return rows
+
+
+def spread_history(queryset, date_fields, days):
+    """
+    Date the rows of `queryset` back over the last `days` days, oldest pk
+    first, so lists ordered by date find them as they would have been added.
+    """
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    slices = min(HISTORY_SLICES, len(pks))
+    now = timezone.now()
+    for n in range(slices):
+        chunk = pks[len(pks) * n // slices:len(pks) * (n + 1) // slices]
+        date = now - timedelta(days=days * (slices - n) / slices)
+        queryset.filter(pk__gte=chunk[0], pk__lte=chunk[-1]).update(**dict.fromkeys(date_fields, date))
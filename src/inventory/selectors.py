@@ -0,0 +1,79 @@
+"""
+Read-side querysets for room pages and reports.
+
+Each selector fetches exactly the columns its template shows and joins the
+related rows it dereferences, so rendering costs one query per table no
+matter how many rows the room has.
+"""
+from inventory.models import Archive, Brand, Category, Issue, Item, ItemGroup, Purchase, Room, System, SystemComponent
+
+TIMESTAMPS = ('created_on', 'updated_on')
+
+
+def report_room(room):
+    return Room.objects.select_related('incharge', 'department').only(
+        'room_name', 'slug', 'organisation_id', *TIMESTAMPS,
+        'incharge__first_name', 'incharge__last_name', 'department__department_name',
+    ).get(pk=room.pk)
+
+
+def report_categories(room):
+    return Category.objects.filter(room=room).only('category_name', *TIMESTAMPS)
+
+
+def report_brands(room):
+    return Brand.objects.filter(room=room).only('brand_name', *TIMESTAMPS)
+
+
+def report_items(room):
+    return Item.objects.filter(room=room).select_related('category', 'brand').only(
+        'item_name', 'total_count', 'available_count', 'in_use', 'achived_count', *TIMESTAMPS,
+        'category__category_name', 'brand__brand_name',
+    )
+
+
+def report_systems(room):
+    return System.objects.filter(room=room).only('system_name', 'status', *TIMESTAMPS)
+
+
+def report_system_components(room):
+    return SystemComponent.objects.filter(system__room=room).select_related('system', 'component_item').only(
+        'component_type', 'serial_number', *TIMESTAMPS, 'system__system_name', 'component_item__item_name',
+    )
+
+
+def report_item_groups(room):
+    return ItemGroup.objects.filter(room=room).only('item_group_name', *TIMESTAMPS)
+
+
+def report_purchases(room):
+    return Purchase.objects.filter(room=room).select_related('item', 'vendor').only(
+        'purchase_id', 'quantity', 'unit_of_measure', 'status', 'item__item_name', 'vendor__vendor_name',
+    )
+
+
+def report_archives(room):
+    return Archive.objects.filter(room=room).select_related('item').only(
+        'count', 'archive_type', 'remark', 'archived_on', 'item__item_name',
+    )
+
+
+def report_issues(room):
+    return Issue.objects.filter(room=room).only('subject', 'description', 'resolved', *TIMESTAMPS)
+
+
+def room_report_data(room, room_settings):
+    """Template context for `room_incharge/room_report.html`; tabs turned off in `room_settings` are skipped."""
+    return {
+        'room': report_room(room),
+        'room_settings': room_settings,
+        'categories': report_categories(room) if room_settings.categories_tab else None,
+        'brands': report_brands(room) if room_settings.brands_tab else None,
+        'items': report_items(room) if room_settings.items_tab else None,
+        'systems': report_systems(room) if room_settings.systems_tab else None,
+        'item_groups': report_item_groups(room) if room_settings.item_groups_tab else None,
+        'system_components': report_system_components(room) if room_settings.systems_tab else None,
+        'purchases': report_purchases(room),
+        'archives': report_archives(room),
+        'issues': report_issues(room),
+    }
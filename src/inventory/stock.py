@@ -0,0 +1,198 @@
+"""
+Stock movements for `Item` counters.
+
+Every movement is a single conditional ``UPDATE`` built from ``F()``
+expressions, so concurrent room incharges can never lose each other's
+updates and a movement that would take a counter below zero is rejected by
+the database instead of by a stale Python copy of the row. Each applied
+movement is also appended to the `StockMovement` ledger, of which the
+counters on `Item` are the materialized balance.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from inventory import dashboard
+from inventory.models import Item, StockMovement
+
+
+class InsufficientStock(Exception):
+    """Raised when a movement would take a counter of the item below zero."""
+
+
+COUNTERS = {
+    'total': 'total_count',
+    'available': 'available_count',
+    'in_use': 'in_use',
+    'archived': 'achived_count',
+}
+
+
+def move_stock(item, movement_type, strict=True, actor=None, source=None, fields=None, **deltas):
+    """
+    Apply signed `deltas` (keyed by `total`, `available`, `in_use` and
+    `archived`) to `item` in one round trip and record them in the ledger.
+    When `strict`, counters that decrease must hold at least that much stock,
+    otherwise `InsufficientStock` is raised and nothing changes. `fields` are
+    plain column values written by the same UPDATE.
+    """
+    item_id = getattr(item, 'pk', item)
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    filters = {}
+    updates = {'updated_on': timezone.now(), **(fields or {})}
+    for name, delta in deltas.items():
+        column = COUNTERS[name]
+        updates[column] = F(column) + delta
+        if strict and delta < 0:
+            filters[f'{column}__gte'] = -delta
+
+    with transaction.atomic():
+        updated = Item.objects.filter(pk=item_id, **filters).update(**updates)
+        if not updated:
+            if filters:
+                raise InsufficientStock("Not enough stock for this item.")
+            return
+        record_movement(item_id, movement_type, actor=actor, source=source, **deltas)
+        dashboard.record_stock_deltas({item_id: deltas})
+    if isinstance(item, Item):
+        # A later save or delete of `item` reads the moved counters again
+        item.forget_loaded_values(*(COUNTERS[name] for name in deltas))
+
+
+def move_stock_many(counts, movement_type, actor=None, sources=None, **directions):
+    """
+    Bulk counterpart of `move_stock`: move ``counts[pk]`` units of every item
+    in `counts` with a single UPDATE, each counter named in `directions`
+    going up (``1``) or down (``-1``). Always strict; if any item lacks the
+    stock, `InsufficientStock` is raised and nothing changes. `sources` maps
+    item pks to the object recorded as the source of their ledger row, or to
+    a list of ``counts[pk]`` objects, each the source of a row of one unit.
+    """
+    counts = {pk: count for pk, count in counts.items() if count}
+    if not counts:
+        return
+    amount = Case(*[When(pk=pk, then=Value(count)) for pk, count in counts.items()], output_field=IntegerField())
+
+    filters = {}
+    updates = {'updated_on': timezone.now()}
+    for name, direction in directions.items():
+        column = COUNTERS[name]
+        if direction < 0:
+            updates[column] = F(column) - amount
+            filters[f'{column}__gte'] = amount
+        else:
+            updates[column] = F(column) + amount
+
+    with transaction.atomic():
+        if Item.objects.filter(pk__in=counts, **filters).update(**updates) != len(counts):
+            raise InsufficientStock("Not enough stock for some of these items.")
+        sources = sources or {}
+        content_types = {}
+        movements = []
+        for pk, count in counts.items():
+            source = sources.get(pk)
+            shares = [(unit, 1) for unit in source] if isinstance(source, list) else [(source, count)]
+            for share_source, share in shares:
+                if share_source is not None and type(share_source) not in content_types:
+                    content_types[type(share_source)] = ContentType.objects.get_for_model(share_source)
+                movements.append(StockMovement(
+                    item_id=pk, movement_type=movement_type, actor=actor,
+                    source_type=content_types[type(share_source)] if share_source is not None else None,
+                    source_id=share_source.pk if share_source is not None else None,
+                    **{f'{name}_delta': direction * share for name, direction in directions.items()},
+                ))
+        StockMovement.objects.bulk_create(movements, batch_size=1000)
+        dashboard.record_stock_deltas({
+            pk: {name: direction * count for name, direction in directions.items()} for pk, count in counts.items()
+        })
+
+
+def record_movement(item, movement_type, actor=None, source=None, **deltas):
+    """Append a ledger row without touching the item's counters."""
+    return StockMovement.objects.create(
+        item_id=getattr(item, 'pk', item),
+        movement_type=movement_type,
+        actor=actor,
+        source_type=ContentType.objects.get_for_model(source) if source is not None else None,
+        source_id=source.pk if source is not None else None,
+        **{f'{name}_delta': delta for name, delta in deltas.items()},
+    )
+
+
+def record_opening_balances(items, batch_size=1000):
+    """Ledger rows for bulk inserted `items`, which `bulk_create` skips the signal for."""
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            item_id=item.pk, movement_type='opening', total_delta=item.total_count,
+            available_delta=item.available_count, in_use_delta=item.in_use, archived_delta=item.achived_count,
+        )
+        for item in items
+    ], batch_size=batch_size)
+
+
+def assign(item, count=1, **kwargs):
+    """Move `count` units from available stock into use."""
+    move_stock(item, 'assign', available=-count, in_use=count, **kwargs)
+
+
+def release(item, count=1, **kwargs):
+    """Return `count` units in use to available stock. Returning stock is never refused."""
+    move_stock(item, 'release', strict=False, available=count, in_use=-count, **kwargs)
+
+
+def archive_available(item, count, **kwargs):
+    """Archive `count` units of available stock."""
+    move_stock(item, 'archive', available=-count, archived=count, **kwargs)
+
+
+def archive_in_use(item, count=1, **kwargs):
+    """Archive `count` units that are currently in use."""
+    move_stock(item, 'archive', in_use=-count, archived=count, **kwargs)
+
+
+def add_to_stock(item, count, **kwargs):
+    """Add `count` newly purchased units and list the item."""
+    move_stock(item, 'purchase', total=count, available=count, fields={'is_listed': True}, **kwargs)
+
+
+def balance_fields(until=None):
+    """
+    Aggregates that sum an item's ledger, optionally up to and including `until`.
+    Use with `Item.objects.annotate(**balance_fields(...))`.
+    """
+    condition = Q(stock_movements__created_on__lte=until) if until else Q()
+    return {
+        f'{name}_balance': Coalesce(Sum(f'stock_movements__{name}_delta', filter=condition), 0)
+        for name in COUNTERS
+    }
+
+
+def balances_as_of(items, until):
+    """Item queryset annotated with its counters as of `until`, computed in one query."""
+    return items.annotate(**balance_fields(until))
+
+
+def rebuild_balances(items, batch_size=1000):
+    """
+    Recompute the counters of `items` from the ledger in a single aggregate
+    query and write back only the rows that drifted. Returns the number of
+    items corrected.
+    """
+    drifted = []
+    deltas = {}
+    for item in items.annotate(**balance_fields()).only('pk', *COUNTERS.values()).iterator(chunk_size=batch_size):
+        for name, column in COUNTERS.items():
+            balance = getattr(item, f'{name}_balance')
+            if getattr(item, column) != balance:
+                deltas.setdefault(item.pk, {})[name] = balance - getattr(item, column)
+                setattr(item, column, balance)
+        if item.pk in deltas:
+            drifted.append(item)
+    with transaction.atomic():
+        Item.objects.bulk_update(drifted, list(COUNTERS.values()), batch_size=batch_size)
+        dashboard.record_stock_deltas(deltas)
+    return len(drifted)
@@ -1,3 +1,1427 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from config.utils import reserve_unique_slugs, reserve_unique_codes
+from inventory import autocomplete, benchmarks, bulk_actions, dashboard, exports, imports, profiling, report_cache, reports, search, stock
+from inventory.profiling import QueryProfile
+from inventory.forms.central_admin import RoomCreateForm
+from inventory.forms.room_incharge import IssueBulkResolveForm, ItemForm, ItemPurchaseForm, PurchaseForm, RoomUpdateForm
+from inventory.views.room_incharge import BulkActionView, ItemListView
+from core.models import User, UserProfile, Organisation
+from inventory.models import (
+    Room, RoomSettings, Category, Brand, Item, System, SystemComponent, ItemGroup, ItemGroupItem,
+    Vendor, Purchase, Archive, Issue, StockMovement, ReportJob, OrgSummary, RoomSummary,
+)
 
-# Create your tests here.
+
+class InventoryTestData:
+    """Creates an organisation with a single, fully populated room."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Summaries and search documents are written when the transaction commits
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.org = Organisation.objects.create(name="Test College")
+            cls.user = User.objects.create_user(email="incharge@example.com", password="password")
+            cls.profile = UserProfile.objects.create(
+                user=cls.user, org=cls.org, first_name="Room", last_name="Incharge", is_incharge=True
+            )
+            cls.room = Room.objects.create(
+                organisation=cls.org, label="L1", room_name="Computer Lab", incharge=cls.profile
+            )
+            cls.category = Category.objects.create(organisation=cls.org, room=cls.room, category_name="Peripherals")
+            cls.brand = Brand.objects.create(organisation=cls.org, room=cls.room, brand_name="Logitech")
+            cls.item = Item.objects.create(
+                organisation=cls.org, room=cls.room, category=cls.category, brand=cls.brand,
+                item_name="Mouse", total_count=10, available_count=10,
+            )
+            cls.system = System.objects.create(organisation=cls.org, room=cls.room, system_name="PC 1", status='active')
+            cls.component = SystemComponent.objects.create(
+                system=cls.system, component_item=cls.item, component_type='mouse', serial_number="SN-1"
+            )
+            cls.item_group = ItemGroup.objects.create(organisation=cls.org, room=cls.room, item_group_name="Kit")
+            cls.item_group_item = ItemGroupItem.objects.create(item_group=cls.item_group, item=cls.item, qty=1)
+            cls.vendor = Vendor.objects.create(
+                organisation=cls.org, vendor_name="Vendor", email="vendor@example.com",
+                contact_number="1", alternate_number="2", address="Street",
+            )
+            cls.purchase = Purchase.objects.create(
+                organisation=cls.org, room=cls.room, item=cls.item, quantity=1,
+                unit_of_measure='units', vendor=cls.vendor, status='requested',
+            )
+            cls.archive = Archive.objects.create(
+                organisation=cls.org, room=cls.room, item=cls.item, count=1, archive_type='consumption', remark="Broken"
+            )
+            cls.issue = Issue.objects.create(
+                organisation=cls.org, room=cls.room, created_by="Student", subject="Mouse broken", description="..."
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+
+class RoomContextQueryCountTests(InventoryTestData, TestCase):
+    """
+    Every room_incharge page must resolve its room and settings exactly once,
+    and the total query count per page must not regress.
+    """
+
+    def room_url(self, name, **kwargs):
+        return reverse(f'room_incharge:{name}', kwargs={'room_slug': self.room.slug, **kwargs})
+
+    def get_page_urls(self):
+        system = {'system_slug': self.system.slug}
+        item_group = {'item_group_slug': self.item_group.slug}
+        return [
+            (self.room_url('room_dashboard'), 4),
+            (self.room_url('room_update'), 6),
+            (self.room_url('room_settings'), 4),
+            (self.room_url('category_list'), 6),
+            (self.room_url('category_create'), 4),
+            (self.room_url('category_update', category_slug=self.category.slug), 5),
+            (self.room_url('category_delete', category_slug=self.category.slug), 6),
+            (self.room_url('brand_list'), 6),
+            (self.room_url('brand_create'), 4),
+            (self.room_url('brand_update', brand_slug=self.brand.slug), 5),
+            (self.room_url('brand_delete', brand_slug=self.brand.slug), 6),
+            (self.room_url('item_list'), 8),
+            (self.room_url('item_create'), 6),
+            (self.room_url('item_update', item_slug=self.item.slug), 7),
+            (self.room_url('item_delete', item_slug=self.item.slug), 6),
+            (self.room_url('item_archive', item_slug=self.item.slug), 4),
+            (self.room_url('system_list'), 6),
+            (self.room_url('system_create'), 4),
+            (self.room_url('system_update', system_slug=self.system.slug), 5),
+            (self.room_url('system_delete', system_slug=self.system.slug), 6),
+            (self.room_url('system_component_list', **system), 7),
+            (self.room_url('system_component_create', **system), 6),
+            (self.room_url('system_component_update', component_slug=self.component.slug, **system), 6),
+            (self.room_url('system_component_delete', component_slug=self.component.slug, **system), 8),
+            (self.room_url('system_component_archive', component_slug=self.component.slug, **system), 4),
+            (self.room_url('item_group_list'), 6),
+            (self.room_url('item_group_create'), 4),
+            (self.room_url('item_group_update', **item_group), 5),
+            (self.room_url('item_group_delete', **item_group), 6),
+            (self.room_url('item_group_item_list', **item_group), 8),
+            (self.room_url('item_group_item_create', **item_group), 5),
+            (self.room_url('item_group_item_update', item_group_item_slug=self.item_group_item.slug, **item_group), 6),
+            (self.room_url('item_group_item_delete', item_group_item_slug=self.item_group_item.slug, **item_group), 6),
+            (self.room_url('purchase_list'), 8),
+            (self.room_url('purchase_create'), 6),
+            (self.room_url('purchase_update', purchase_slug=self.purchase.slug), 6),
+            (self.room_url('purchase_delete', purchase_slug=self.purchase.slug), 5),
+            (self.room_url('purchase_complete', purchase_slug=self.purchase.slug), 4),
+            (self.room_url('purchase_new_item_create'), 7),
+            (self.room_url('archive_list'), 7),
+            (self.room_url('issue_list'), 6),
+        ]
+
+    def test_room_is_resolved_once_per_request(self):
+        RoomSettings.for_room(self.room)
+        for url, _ in self.get_page_urls():
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                room_queries = [q for q in ctx.captured_queries if 'FROM "inventory_room"' in q['sql']]
+                settings_queries = [q for q in ctx.captured_queries if 'FROM "inventory_roomsettings"' in q['sql']]
+                self.assertEqual(len(room_queries), 1)
+                self.assertEqual(len(settings_queries), 0)
+
+    def test_query_counts(self):
+        RoomSettings.for_room(self.room)
+        for url, expected in self.get_page_urls():
+            with self.subTest(url=url), self.assertNumQueries(expected):
+                self.client.get(url)
+
+    def test_room_from_other_organisation_is_not_found(self):
+        other_org = Organisation.objects.create(name="Other College")
+        self.profile.org = other_org
+        self.profile.save()
+        response = self.client.get(self.room_url('room_dashboard'))
+        self.assertEqual(response.status_code, 404)
+
+
+
+class RoomSettingsCacheTests(InventoryTestData, TestCase):
+
+    def test_settings_are_created_with_room(self):
+        self.assertTrue(RoomSettings.objects.filter(room=self.room).exists())
+
+    def test_settings_are_served_from_cache(self):
+        RoomSettings.for_room(self.room)
+        with self.assertNumQueries(0):
+            room_settings = RoomSettings.for_room(self.room)
+        self.assertTrue(room_settings.items_tab)
+        self.assertEqual(room_settings.room, self.room)
+
+    def test_save_invalidates_cache(self):
+        RoomSettings.for_room(self.room)
+        response = self.client.post(
+            reverse('room_incharge:room_settings', kwargs={'room_slug': self.room.slug}),
+            {'items_tab': 'on', 'systems_tab': 'on'},
+        )
+        self.assertEqual(response.status_code, 302)
+        room_settings = RoomSettings.for_room(self.room)
+        self.assertTrue(room_settings.items_tab)
+        self.assertFalse(room_settings.brands_tab)
+
+    def test_page_render_does_not_write_missing_settings(self):
+        RoomSettings.objects.filter(room=self.room).delete()
+        response = self.client.get(reverse('room_incharge:room_dashboard', kwargs={'room_slug': self.room.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RoomSettings.objects.filter(room=self.room).exists())
+
+
+class UniqueSlugTests(InventoryTestData, TestCase):
+
+    def test_save_does_not_probe_for_existing_slug(self):
+        with CaptureQueriesContext(connection) as ctx:
+            Category.objects.create(organisation=self.org, room=self.room, category_name="Cables")
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+
+    def test_slug_collision_is_retried(self):
+        code = self.category.slug.rsplit('-', 1)[1]
+        with mock.patch('config.utils.generate_code', side_effect=[code, 'fresh123']):
+            category = Category.objects.create(organisation=self.org, room=self.room, category_name="Peripherals")
+        self.assertEqual(category.slug, 'peripherals-fresh123')
+
+    def test_generated_code_collision_is_retried(self):
+        with mock.patch('config.utils.generate_code', side_effect=[self.purchase.purchase_id, 'slugcode', 'newcode1', 'slugcod2']):
+            purchase = Purchase.objects.create(
+                organisation=self.org, room=self.room, item=self.item, quantity=1,
+                unit_of_measure='units', vendor=self.vendor, status='requested',
+            )
+        self.assertEqual(purchase.purchase_id, 'newcode1')
+        self.assertEqual(purchase.slug, 'newcode1-slugcod2')
+
+    def test_reserve_unique_slugs_uses_one_query(self):
+        with self.assertNumQueries(1):
+            slugs = reserve_unique_slugs(Item, ["mouse"] * 100)
+        self.assertEqual(len(set(slugs)), 100)
+        self.assertTrue(all(slug.startswith("mouse-") for slug in slugs))
+
+    def test_reserve_unique_codes_skips_taken_codes(self):
+        with mock.patch('config.utils.generate_code', side_effect=[self.purchase.purchase_id, 'abcdefgh', 'hgfedcba']):
+            codes = reserve_unique_codes(Purchase, 2, 8, 'purchase_id')
+        self.assertEqual(sorted(codes), ['abcdefgh', 'hgfedcba'])
+
+
+class StockMovementTests(InventoryTestData, TestCase):
+
+    def test_movement_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            stock.assign(self.item, 3)
+        statements = [query['sql'].split()[0] for query in queries]
+        item_updates = [query for query in queries if query['sql'].startswith('UPDATE "inventory_item" ')]
+        self.assertEqual(len(item_updates), 1)
+        self.assertNotIn('SELECT', statements)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.available_count, self.item.in_use), (7, 3))
+
+    def test_movement_below_zero_is_rejected(self):
+        with self.assertRaises(stock.InsufficientStock):
+            stock.archive_available(self.item, 11)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.available_count, self.item.achived_count), (10, 0))
+
+    def test_item_archive_view_updates_counts(self):
+        url = reverse('room_incharge:item_archive', kwargs={'room_slug': self.room.slug, 'item_slug': self.item.slug})
+        response = self.client.post(url, {'count': 4, 'archive_type': 'consumption', 'remark': 'Used'})
+        self.assertEqual(response.status_code, 302)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.available_count, self.item.achived_count), (6, 4))
+
+        response = self.client.post(url, {'count': 7, 'archive_type': 'consumption', 'remark': 'Used'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Archive.objects.filter(item=self.item).count(), 2)
+
+    def test_purchase_is_added_to_stock_once(self):
+        Purchase.objects.filter(pk=self.purchase.pk).update(status='completed', quantity=5)
+        url = reverse('room_incharge:purchase_add_to_stock', kwargs={'room_slug': self.room.slug, 'purchase_slug': self.purchase.slug})
+        self.client.get(url)
+        self.client.get(url)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.total_count, self.item.available_count), (15, 15))
+
+    def test_deleting_item_group_item_releases_stock(self):
+        stock.assign(self.item, self.item_group_item.qty)
+        self.item_group_item.delete()
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.available_count, self.item.in_use), (10, 0))
+
+
+class StockLedgerTests(InventoryTestData, TestCase):
+
+    def test_new_item_records_opening_balance(self):
+        movement = StockMovement.objects.get(item=self.item)
+        self.assertEqual(movement.movement_type, 'opening')
+        self.assertEqual((movement.total_delta, movement.available_delta), (10, 10))
+
+    def test_movements_are_recorded_with_actor_and_source(self):
+        url = reverse('room_incharge:item_archive', kwargs={'room_slug': self.room.slug, 'item_slug': self.item.slug})
+        self.client.post(url, {'count': 4, 'archive_type': 'consumption', 'remark': 'Used'})
+        movement = StockMovement.objects.filter(item=self.item).latest('created_on')
+        self.assertEqual(movement.movement_type, 'archive')
+        self.assertEqual((movement.available_delta, movement.archived_delta), (-4, 4))
+        self.assertEqual(movement.actor, self.profile)
+        self.assertEqual(movement.source, Archive.objects.filter(item=self.item).latest('pk'))
+
+    def test_total_correction_is_recorded_against_the_current_row(self):
+        url = reverse('room_incharge:item_update', kwargs={'room_slug': self.room.slug, 'item_slug': self.item.slug})
+        save = ItemForm.save
+
+        def save_after_concurrent_move(form, commit=True):
+            # Another incharge moves stock after the view loaded the item
+            stock.add_to_stock(self.item, 5)
+            stock.assign(self.item, 2)
+            return save(form, commit)
+
+        with mock.patch.object(ItemForm, 'save', save_after_concurrent_move):
+            self.client.post(url, {
+                'item_name': "Mouse", 'category': self.category.pk, 'brand': self.brand.pk, 'total_count': 20,
+            })
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.total_count, self.item.available_count, self.item.in_use), (20, 13, 2))
+        adjustment = StockMovement.objects.get(item=self.item, movement_type='adjustment')
+        self.assertEqual(adjustment.total_delta, 5)
+        out = StringIO()
+        call_command('rebuild_stock_balances', room=self.room.slug, stdout=out)
+        self.assertIn('Corrected 0 item(s).', out.getvalue())
+
+    def edit_before_transaction(self, edit):
+        """Let `edit`, another incharge's change, commit just before the view starts its transaction."""
+        edits = [edit]
+
+        def atomic(*args, **kwargs):
+            while edits:
+                edits.pop()()
+            return transaction.atomic(*args, **kwargs)
+        return mock.patch('inventory.views.room_incharge.transaction', mock.Mock(atomic=atomic))
+
+    def test_component_and_group_edits_move_stock_from_the_current_row(self):
+        other = Item.objects.create(
+            organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+            item_name="Keyboard", total_count=5, available_count=5,
+        )
+        self.item.refresh_from_db()
+        in_use = self.item.in_use
+
+        def raise_group_quantity():
+            stock.assign(self.item, 2)
+            ItemGroupItem.objects.filter(pk=self.item_group_item.pk).update(qty=3)
+
+        def swap_component():
+            stock.release(self.item)
+            stock.assign(other)
+            SystemComponent.objects.filter(pk=self.component.pk).update(component_item=other)
+
+        url = reverse('room_incharge:item_group_item_update', kwargs={
+            'room_slug': self.room.slug, 'item_group_slug': self.item_group.slug, 'item_group_item_slug': self.item_group_item.slug,
+        })
+        with self.edit_before_transaction(raise_group_quantity):
+            self.client.post(url, {'item': self.item.pk, 'qty': 4})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.in_use, in_use + 3)
+
+        url = reverse('room_incharge:system_component_update', kwargs={
+            'room_slug': self.room.slug, 'system_slug': self.system.slug, 'component_slug': self.component.slug,
+        })
+        with self.edit_before_transaction(swap_component):
+            self.client.post(url, {'component_item': self.item.pk, 'component_type': 'mouse', 'serial_number': "SN-1"})
+        self.item.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.item.in_use, other.in_use), (in_use + 3, 0))
+        out = StringIO()
+        call_command('rebuild_stock_balances', room=self.room.slug, stdout=out)
+        self.assertIn('Corrected 0 item(s).', out.getvalue())
+
+    def test_rejected_movement_is_not_recorded(self):
+        with self.assertRaises(stock.InsufficientStock):
+            stock.archive_available(self.item, 11)
+        self.assertEqual(StockMovement.objects.filter(item=self.item).count(), 1)
+
+    def test_ledger_is_append_only(self):
+        movement = StockMovement.objects.get(item=self.item)
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+    def test_balances_as_of(self):
+        before = timezone.now()
+        stock.assign(self.item, 3)
+        StockMovement.objects.filter(movement_type='assign').update(created_on=before + timedelta(hours=1))
+
+        item = stock.balances_as_of(Item.objects.filter(pk=self.item.pk), before).get()
+        self.assertEqual((item.available_balance, item.in_use_balance), (10, 0))
+        item = stock.balances_as_of(Item.objects.filter(pk=self.item.pk), before + timedelta(hours=2)).get()
+        self.assertEqual((item.available_balance, item.in_use_balance), (7, 3))
+
+    def test_rebuild_corrects_drifted_counters(self):
+        stock.assign(self.item, 2)
+        Item.objects.filter(pk=self.item.pk).update(available_count=42)
+        out = StringIO()
+        call_command('rebuild_stock_balances', room=self.room.slug, stdout=out)
+        self.assertIn('Corrected 1 item(s).', out.getvalue())
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.total_count, self.item.available_count, self.item.in_use), (10, 8, 2))
+
+
+@mock.patch('inventory.reports.render_report_pdf', return_value=b'%PDF-1.4 report')
+class RoomReportJobTests(InventoryTestData, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, REPORT_CACHE_DIR=os.path.join(media_root, 'report_cache'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def request_report(self):
+        response = self.client.get(reverse('room_incharge:room_report', kwargs={'room_slug': self.room.slug}))
+        job = ReportJob.objects.latest('created_on')
+        self.assertRedirects(response, reverse('room_incharge:room_report_status', kwargs={'room_slug': self.room.slug, 'job_id': job.job_id}))
+        return job
+
+    def test_report_request_only_queues_a_job(self, render):
+        job = self.request_report()
+        render.assert_not_called()
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.requested_by, self.profile)
+        self.assertEqual(self.request_report(), job)
+
+    def test_stuck_job_is_failed_instead_of_reused(self, render):
+        job = self.request_report()
+        ReportJob.objects.filter(pk=job.pk).update(status='running', started_on=timezone.now() - timedelta(hours=1))
+        with override_settings(REPORT_JOB_TIMEOUT=600):
+            new_job = self.request_report()
+        self.assertNotEqual(new_job, job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.error)
+        self.assertEqual(self.request_report(), new_job)
+
+    def test_reused_pending_job_is_submitted_again(self, render):
+        job = self.request_report()
+        with override_settings(REPORT_WORKERS=1), mock.patch.object(reports, 'get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.request_report(), job)
+        get_executor.return_value.submit.assert_called_once_with(reports._run_in_thread, job.pk)
+
+    def test_job_lifecycle(self, render):
+        job = self.request_report()
+        status_url = reverse('room_incharge:room_report_status', kwargs={'room_slug': self.room.slug, 'job_id': job.job_id})
+        download_url = reverse('room_incharge:room_report_download', kwargs={'room_slug': self.room.slug, 'job_id': job.job_id})
+        self.assertEqual(self.client.get(status_url, {'format': 'json'}).json()['status'], 'pending')
+        self.assertEqual(self.client.get(download_url).status_code, 404)
+
+        self.assertEqual(reports.run_pending_jobs(), 1)
+        self.assertFalse(reports.run_report_job(job.pk))
+        render.assert_called_once()
+
+        data = self.client.get(status_url, {'format': 'json'}).json()
+        self.assertEqual((data['status'], data['download_url']), ('done', download_url))
+        response = self.client.get(download_url)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 report')
+
+    def test_finished_job_is_served_from_report_cache(self, render):
+        job = self.request_report()
+        reports.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.fingerprint, report_cache.fingerprint(self.room, RoomSettings.for_room(self.room)))
+        self.assertEqual(os.listdir(settings.MEDIA_ROOT), ['report_cache'])
+
+        report_cache.evict(max_bytes=0)
+        download_url = reverse('room_incharge:room_report_download', kwargs={'room_slug': self.room.slug, 'job_id': job.job_id})
+        self.assertRedirects(
+            self.client.get(download_url), reverse('room_incharge:room_report', kwargs={'room_slug': self.room.slug}),
+            fetch_redirect_response=False,
+        )
+
+        ReportJob.objects.filter(pk=job.pk).update(created_on=timezone.now() - reports.JOB_RETENTION - timedelta(days=1))
+        new_job = self.request_report()
+        self.assertEqual(list(ReportJob.objects.all()), [new_job])
+
+    def test_failed_render_is_reported(self, render):
+        render.side_effect = RuntimeError("Pango is missing")
+        job = self.request_report()
+        out = StringIO()
+        with self.assertLogs('inventory.reports', 'ERROR'):
+            call_command('run_report_jobs', stdout=out)
+        self.assertIn('Rendered 1 report(s).', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('failed', 'Pango is missing'))
+
+    def test_job_of_other_room_is_not_found(self, render):
+        other_profile = UserProfile.objects.create(user=User.objects.create_user(email="other@example.com", password="password"), org=self.org, first_name="Other", last_name="Incharge")
+        other_room = Room.objects.create(organisation=self.org, label="L2", room_name="Physics Lab", incharge=other_profile)
+        job = ReportJob.objects.create(room=other_room)
+        response = self.client.get(reverse('room_incharge:room_report_status', kwargs={'room_slug': self.room.slug, 'job_id': job.job_id}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_room_is_served_from_report_cache(self, render):
+        self.request_report()
+        reports.run_pending_jobs()
+        response = self.client.get(reverse('room_incharge:room_report', kwargs={'room_slug': self.room.slug}))
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 report')
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+        stock.assign(self.item, 1)
+        self.request_report()
+        self.assertEqual(ReportJob.objects.count(), 2)
+
+    def test_fingerprint_follows_room_changes(self, render):
+        room_settings = RoomSettings.for_room(self.room)
+        original = report_cache.fingerprint(self.room, room_settings)
+        self.assertEqual(report_cache.fingerprint(self.room, room_settings), original)
+
+        Issue.objects.create(organisation=self.org, room=self.room, created_by="Student", subject="Broken fan", description="Fan")
+        changed = report_cache.fingerprint(self.room, room_settings)
+        self.assertNotEqual(changed, original)
+
+        room_settings.brands_tab = False
+        self.assertNotEqual(report_cache.fingerprint(self.room, room_settings), changed)
+
+    def test_least_recently_used_reports_are_evicted(self, render):
+        with override_settings(REPORT_CACHE_MAX_BYTES=25):
+            first = report_cache.store(self.room, 'a', b'x' * 10)
+            second = report_cache.store(self.room, 'b', b'x' * 10)
+            os.utime(first, (0, 0))
+            os.utime(second, (1, 1))
+            with report_cache.get(self.room, 'a') as cached_file:
+                self.assertEqual(cached_file.name, first)
+            report_cache.store(self.room, 'c', b'x' * 10)
+        self.assertIsNone(report_cache.get(self.room, 'b'))
+        self.assertFalse(os.path.exists(second))
+        with report_cache.get(self.room, 'c') as cached_file:
+            self.assertEqual(cached_file.read(), b'x' * 10)
+        self.assertTrue(os.path.exists(first))
+
+    def test_report_evicted_while_served_is_still_read(self, render):
+        self.request_report()
+        reports.run_pending_jobs()
+        get = report_cache.get
+
+        def get_then_evict(room, report_fingerprint):
+            cached_file = get(room, report_fingerprint)
+            # Another worker evicts the report before this one streams it
+            report_cache.evict(max_bytes=0)
+            return cached_file
+
+        with mock.patch.object(report_cache, 'get', get_then_evict):
+            response = self.client.get(reverse('room_incharge:room_report', kwargs={'room_slug': self.room.slug}))
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 report')
+
+
+class RoomReportSelectorTests(InventoryTestData, TestCase):
+
+    def add_rows(self, count):
+        for n in range(count):
+            category = Category.objects.create(organisation=self.org, room=self.room, category_name=f"Category {n}")
+            brand = Brand.objects.create(organisation=self.org, room=self.room, brand_name=f"Brand {n}")
+            item = Item.objects.create(organisation=self.org, room=self.room, category=category, brand=brand, item_name=f"Item {n}", total_count=1, available_count=1)
+            system = System.objects.create(organisation=self.org, room=self.room, system_name=f"PC {n}", status='active')
+            SystemComponent.objects.create(system=system, component_item=item, component_type='cpu', serial_number=f"CPU-{n}")
+            ItemGroup.objects.create(organisation=self.org, room=self.room, item_group_name=f"Kit {n}")
+            Purchase.objects.create(organisation=self.org, room=self.room, item=item, quantity=1, unit_of_measure='units', vendor=self.vendor)
+            Archive.objects.create(organisation=self.org, room=self.room, item=item, count=1, archive_type='consumption', remark="Old")
+            Issue.objects.create(organisation=self.org, room=self.room, created_by="Student", subject=f"Issue {n}", description="...")
+
+    def test_report_query_count_does_not_grow_with_rows(self):
+        room_settings = RoomSettings.for_room(self.room)
+        with self.assertNumQueries(9):
+            html = reports.render_report_html(self.room, room_settings)
+        self.assertIn("Logitech", html)
+
+        self.add_rows(5)
+        with self.assertNumQueries(9):
+            html = reports.render_report_html(self.room, room_settings)
+        self.assertIn("Item 4", html)
+        self.assertIn("CPU-4", html)
+
+
+class ExportTests(InventoryTestData, TestCase):
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_room_items_csv(self):
+        response = self.client.get(reverse('room_incharge:room_export', kwargs={'room_slug': self.room.slug, 'dataset': 'items'}))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][:4], ['Room', 'Item', 'Category', 'Brand'])
+        self.assertEqual(rows[1][:5], ['Computer Lab', 'Mouse', 'Peripherals', 'Logitech', '10'])
+
+    def test_systems_are_exported_with_their_components(self):
+        response = self.client.get(reverse('room_incharge:room_export', kwargs={'room_slug': self.room.slug, 'dataset': 'systems'}))
+        rows = self.read_csv(response)
+        self.assertEqual(rows[1][1:], ['PC 1', 'active', 'mouse', 'Mouse', 'SN-1'])
+
+    def test_organisation_export_is_scoped_to_the_organisation(self):
+        other_org = Organisation.objects.create(name="Other College")
+        other_profile = UserProfile.objects.create(user=User.objects.create_user(email="other@example.com", password="password"), org=other_org, first_name="Other", last_name="Incharge")
+        other_room = Room.objects.create(organisation=other_org, label="X1", room_name="Other Lab", incharge=other_profile)
+        Issue.objects.create(organisation=other_org, room=other_room, created_by="Student", subject="Other issue", description="...")
+
+        rows = self.read_csv(self.client.get(reverse('central_admin:export', kwargs={'dataset': 'issues'})))
+        self.assertEqual([row[1] for row in rows[1:]], ['Mouse broken'])
+
+    def test_formulas_are_exported_as_text(self):
+        Issue.objects.filter(pk=self.issue.pk).update(subject="=HYPERLINK(\"http://example.com\")", description="-1+1", created_by="@Student")
+        rows = self.read_csv(self.client.get(reverse('central_admin:export', kwargs={'dataset': 'issues'})))
+        self.assertEqual(rows[1][1:4], ["'=HYPERLINK(\"http://example.com\")", "'-1+1", "'@Student"])
+        self.assertEqual(exports.clean_cell("\tcmd"), "'\tcmd")
+        self.assertEqual((exports.clean_cell("Mouse"), exports.clean_cell(-1)), ("Mouse", -1))
+
+    def test_unknown_export_is_not_found(self):
+        response = self.client.get(reverse('room_incharge:room_export', kwargs={'room_slug': self.room.slug, 'dataset': 'users'}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('central_admin:export', kwargs={'dataset': 'items'}), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 404)
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), "openpyxl is not installed")
+    def test_room_purchases_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(reverse('room_incharge:room_export', kwargs={'room_slug': self.room.slug, 'dataset': 'purchases'}), {'format': 'xlsx'})
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.values)
+        self.assertEqual(rows[0][:3], ('Room', 'Purchase ID', 'Item'))
+        self.assertEqual(rows[1][2], 'Mouse')
+
+
+@mock.patch.object(ItemListView, 'paginate_by', 3)
+class KeysetListTests(InventoryTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.other_category = Category.objects.create(organisation=cls.org, room=cls.room, category_name="Cables")
+            for name in ["Keyboard", "Monitor", "Cable A", "Cable B", "Webcam", "Speaker"]:
+                Item.objects.create(
+                    organisation=cls.org, room=cls.room, brand=cls.brand, item_name=name, total_count=1, available_count=1,
+                    category=cls.other_category if name.startswith("Cable") else cls.category,
+                )
+        cls.url = reverse('room_incharge:item_list', kwargs={'room_slug': cls.room.slug})
+
+    def walk(self, params, direction='next'):
+        names, response = [], self.client.get(self.url, params)
+        while True:
+            names += [item.item_name for item in response.context['items']]
+            query = getattr(response.context['page_obj'], f'{direction}_query')
+            if not query:
+                return names, response
+            response = self.client.get(f"{self.url}?{query}")
+
+    def test_pages_cover_every_row_once_in_both_directions(self):
+        names, last_page = self.walk({'sort': 'name'})
+        self.assertEqual(names, sorted(Item.objects.filter(room=self.room).values_list('item_name', flat=True)))
+
+        previous_query = last_page.context['page_obj'].previous_query
+        backwards, _ = self.walk(dict(QueryDict(previous_query)), direction='previous')
+        self.assertEqual(len(backwards) + len(last_page.context['items']), len(names))
+
+    def test_default_sort_is_newest_first(self):
+        names, _ = self.walk({'sort': 'unknown'})
+        self.assertEqual(names, list(Item.objects.filter(room=self.room).order_by('-created_on', '-pk').values_list('item_name', flat=True)))
+
+    def test_filters_are_applied(self):
+        names, _ = self.walk({'category': self.other_category.slug, 'sort': '-name'})
+        self.assertEqual(names, ["Cable B", "Cable A"])
+
+    def test_invalid_cursor_and_dates_are_ignored(self):
+        response = self.client.get(self.url, {'after': 'not-a-cursor', 'from': '2024-02-30'})
+        self.assertEqual(len(response.context['items']), 3)
+
+    def test_invalid_filter_values_are_ignored(self):
+        room = {'room_slug': self.room.slug}
+        for url, params in [
+            (self.url, {'listed': 'abc'}),
+            (reverse('room_incharge:issue_list', kwargs=room), {'resolved': 'maybe'}),
+            (reverse('room_incharge:purchase_list', kwargs=room), {'added_to_stock': 'x'}),
+            (reverse('central_admin:issue_list'), {'resolved': 'maybe'}),
+        ]:
+            self.assertEqual(self.client.get(url, params).status_code, 200, url)
+        response = self.client.get(reverse('room_incharge:issue_list', kwargs=room), {'resolved': 'False'})
+        self.assertEqual(list(response.context['issues']), [self.issue])
+
+    def test_later_pages_cost_the_same_queries(self):
+        first = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as first_queries:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as next_queries:
+            self.client.get(f"{self.url}?{first.context['page_obj'].next_query}")
+        self.assertEqual(len(next_queries), len(first_queries))
+
+    def test_archives_can_be_filtered_by_date(self):
+        url = reverse('room_incharge:archive_list', kwargs={'room_slug': self.room.slug})
+        today = timezone.localdate()
+        response = self.client.get(url, {'from': today.isoformat(), 'to': today.isoformat()})
+        self.assertEqual(list(response.context['archives']), [self.archive])
+        response = self.client.get(url, {'to': (today - timedelta(days=1)).isoformat()})
+        self.assertEqual(list(response.context['archives']), [])
+
+
+class ItemImportTests(InventoryTestData, TestCase):
+
+    def upload(self, content, name="items.csv"):
+        return SimpleUploadedFile(name, content.encode('utf-8-sig'), content_type='text/csv')
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        result = imports.import_items(self.room, self.upload(
+            "Room,Item,Category,Brand,Total\n"
+            "Lab,Keyboard,peripherals,Dell,5\n"
+            "Lab,Cable,Networking,dell,12\n"
+            "\n"
+            "Lab,,Networking,Dell,1\n"
+            "Lab,Switch,Networking,Dell,-2\n"
+        ))
+
+        self.assertEqual((result.created, result.categories_created, result.brands_created), (2, 1, 1))
+        self.assertEqual([line for line, _ in result.errors], [5, 6])
+        self.assertIn("Item: This field is required.", result.errors[0][1])
+        self.assertIn("Total:", result.errors[1][1])
+
+        keyboard = Item.objects.get(room=self.room, item_name="Keyboard")
+        self.assertEqual(keyboard.category, self.category)
+        self.assertEqual((keyboard.total_count, keyboard.available_count), (5, 5))
+        self.assertEqual(Item.objects.get(item_name="Cable").brand.brand_name, "Dell")
+        self.assertEqual(StockMovement.objects.filter(item=keyboard, movement_type='opening').get().total_delta, 5)
+        self.assertEqual(stock.rebuild_balances(Item.objects.filter(room=self.room)), 0)
+        self.assertEqual([document.title for document in search.search(self.room, "cable")[0]], ["Cable"])
+
+    def test_queries_do_not_grow_with_rows(self):
+        rows = "".join(f"Item {n},Category {n % 3},Brand {n % 2},{n}\n" for n in range(200))
+        with CaptureQueriesContext(connection) as queries:
+            result = imports.import_items(self.room, self.upload("item,category,brand,total\n" + rows))
+        self.assertEqual(result.created, 200)
+        # A handful per batch; SQLite splits the bulk inserts into a few statements each
+        self.assertLess(len(queries), 30)
+
+    def test_unreadable_files_import_nothing(self):
+        with self.assertRaisesMessage(imports.ItemImportError, "Missing column(s): Brand, Total."):
+            imports.import_items(self.room, self.upload("Item,Category\nKeyboard,Peripherals\n"))
+        with self.assertRaises(imports.ItemImportError):
+            imports.import_items(self.room, SimpleUploadedFile("items.csv", b"Item,Category,Brand,Total\nKeyboard,\xff,Dell,1\n"))
+        with mock.patch.object(imports, 'MAX_ROWS', 1), self.assertRaises(imports.ItemImportError):
+            imports.import_items(self.room, self.upload("Item,Category,Brand,Total\nA,B,C,1\nD,E,F,1\n"))
+        self.assertFalse(Item.objects.exclude(pk=self.item.pk).exists())
+
+    def test_import_page(self):
+        url = reverse('room_incharge:item_import', kwargs={'room_slug': self.room.slug})
+        response = self.client.post(url, {'file': self.upload("Item,Category,Brand,Total\nKeyboard,Peripherals,Dell,x\nMonitor,Peripherals,Dell,2\n")})
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertContains(response, "Enter a whole number.")
+
+        response = self.client.post(url, {'file': self.upload("Name\nKeyboard\n")})
+        self.assertFormError(response.context['form'], 'file', "Missing column(s): Item, Category, Brand, Total.")
+
+
+class SystemBulkCreateTests(InventoryTestData, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('room_incharge:system_bulk_create', kwargs={'room_slug': self.room.slug})
+        self.keyboard = Item.objects.create(
+            organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+            item_name="Keyboard", total_count=40, available_count=40,
+        )
+
+    def post(self, count, components, **data):
+        payload = {
+            'name_pattern': "PC-{n:02}", 'start': 1, 'count': count, 'status': 'active',
+            'components-TOTAL_FORMS': 5, 'components-INITIAL_FORMS': 0, **data,
+        }
+        for index, component in enumerate(components):
+            payload.update({f'components-{index}-{key}': value for key, value in component.items()})
+        return self.client.post(self.url, payload)
+
+    def test_creates_systems_with_components_and_assigns_stock(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(3, [
+                {'component_type': 'mouse', 'component_item': self.item.pk, 'serial_pattern': "MS-{n:03}"},
+                {'component_type': 'keyboard', 'component_item': self.keyboard.pk, 'serial_numbers': "KB-A\nKB-B\n\nKB-C"},
+            ])
+        # Counted before assertRedirects, whose request resets the query log
+        self.assertLess(len(queries), 40)
+        self.assertRedirects(response, reverse('room_incharge:system_list', kwargs={'room_slug': self.room.slug}))
+
+        systems = System.objects.filter(system_name__startswith="PC-").order_by('system_name')
+        self.assertEqual([system.system_name for system in systems], ["PC-01", "PC-02", "PC-03"])
+        self.assertEqual(
+            sorted(SystemComponent.objects.filter(system=systems[1]).values_list('component_type', 'serial_number')),
+            [('keyboard', "KB-B"), ('mouse', "MS-002")],
+        )
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.available_count, self.item.in_use), (7, 3))
+        movements = StockMovement.objects.filter(item=self.keyboard, movement_type='assign')
+        self.assertEqual([movement.in_use_delta for movement in movements], [1, 1, 1])
+        self.assertEqual(
+            {movement.source for movement in movements}, set(SystemComponent.objects.filter(component_item=self.keyboard))
+        )
+        self.assertEqual([document.title for document in search.search(self.room, "kb-c")[0]], ["PC-03"])
+
+        with CaptureQueriesContext(connection) as more_queries:
+            self.post(30, [{'component_type': 'keyboard', 'component_item': self.keyboard.pk, 'serial_pattern': "K{n}"}])
+        self.assertEqual(System.objects.filter(system_name__startswith="PC-").count(), 33)
+        self.assertLess(len(more_queries), 40)
+
+    def test_nothing_is_created_when_stock_runs_short(self):
+        response = self.post(11, [
+            {'component_type': 'keyboard', 'component_item': self.keyboard.pk, 'serial_pattern': "K{n}"},
+            {'component_type': 'mouse', 'component_item': self.item.pk, 'serial_pattern': "M{n}"},
+        ])
+        self.assertContains(response, "Not enough Mouse available: 11 needed.")
+        self.assertFalse(System.objects.filter(system_name__startswith="PC-").exists())
+        self.keyboard.refresh_from_db()
+        self.assertEqual(self.keyboard.in_use, 0)
+
+    def test_invalid_serials_are_reported(self):
+        response = self.post(3, [{'component_type': 'mouse', 'component_item': self.item.pk, 'serial_numbers': "A\nB"}])
+        self.assertContains(response, "2 serial numbers given for 3 systems.")
+
+        response = self.post(3, [{'component_type': 'mouse', 'component_item': self.item.pk, 'serial_pattern': "M"}])
+        self.assertContains(response, "The pattern must contain {n}")
+
+        response = self.post(3, [{'component_type': 'mouse', 'component_item': self.item.pk}], name_pattern="PC-{x}")
+        self.assertContains(response, "Use {n}")
+
+        response = self.post(3, [])
+        self.assertContains(response, "Add at least one component.")
+        self.assertFalse(System.objects.filter(system_name__startswith="PC-").exists())
+
+
+class BulkActionTests(InventoryTestData, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.keyboard = Item.objects.create(
+            organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+            item_name="Keyboard", total_count=5, available_count=5,
+        )
+
+    def url(self, name, **kwargs):
+        return reverse(f'room_incharge:{name}', kwargs={'room_slug': self.room.slug, **kwargs})
+
+    def test_archives_selected_items_with_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url('item_bulk_archive'), {
+                'selected': [self.item.pk, self.keyboard.pk], 'count': 2, 'archive_type': 'depreciation', 'remark': "Worn out",
+            })
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "inventory_item" ')]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, self.url('item_list'))
+
+        self.item.refresh_from_db()
+        self.keyboard.refresh_from_db()
+        self.assertEqual((self.item.available_count, self.item.achived_count), (8, 2))
+        self.assertEqual((self.keyboard.available_count, self.keyboard.achived_count), (3, 2))
+        archives = Archive.objects.filter(remark="Worn out")
+        self.assertEqual(sorted(archives.values_list('item__item_name', 'count')), [("Keyboard", 2), ("Mouse", 2)])
+        self.assertEqual(StockMovement.objects.filter(movement_type='archive', source_id__in=archives.values('pk')).count(), 2)
+
+    def test_item_archive_is_all_or_nothing(self):
+        response = self.client.post(self.url('item_bulk_archive'), {
+            'selected': [self.item.pk, self.keyboard.pk], 'count': 6, 'archive_type': 'consumption', 'remark': "Used",
+        }, follow=True)
+        self.assertContains(response, "Not enough stock for some of these items.")
+        self.keyboard.refresh_from_db()
+        self.assertEqual(self.keyboard.available_count, 5)
+        self.assertFalse(Archive.objects.filter(remark="Used").exists())
+
+    def test_rows_of_other_rooms_cannot_be_selected(self):
+        other_profile = UserProfile.objects.create(user=User.objects.create_user(email="other@example.com", password="password"), org=self.org, first_name="Other", last_name="Incharge")
+        other_room = Room.objects.create(organisation=self.org, label="L2", room_name="Other Lab", incharge=other_profile)
+        other_item = Item.objects.create(
+            organisation=self.org, room=other_room, category=self.category, brand=self.brand,
+            item_name="Other", total_count=5, available_count=5,
+        )
+        response = self.client.post(self.url('item_bulk_archive'), {
+            'selected': [other_item.pk], 'count': 1, 'archive_type': 'consumption', 'remark': "Used",
+        }, follow=True)
+        self.assertContains(response, "Select rows of this list only.")
+        other_item.refresh_from_db()
+        self.assertEqual(other_item.available_count, 5)
+
+    def test_archives_selected_components(self):
+        second = SystemComponent.objects.create(
+            system=self.system, component_item=self.item, component_type='mouse', serial_number="SN-2"
+        )
+        third = SystemComponent.objects.create(
+            system=self.system, component_item=self.keyboard, component_type='keyboard', serial_number="KB-1"
+        )
+        stock.assign(self.item, 2)
+        stock.assign(self.keyboard, 1)
+
+        response = self.client.post(self.url('system_component_bulk_archive', system_slug=self.system.slug), {
+            'selected': [self.component.pk, second.pk, third.pk], 'archive_type': 'depreciation', 'remark': "Dead",
+        })
+        self.assertRedirects(response, self.url('system_component_list', system_slug=self.system.slug))
+        self.assertFalse(SystemComponent.objects.filter(system=self.system).exists())
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.in_use, self.item.achived_count), (0, 2))
+        self.assertEqual(
+            sorted(Archive.objects.filter(remark="Dead").values_list('item__item_name', 'count')), [("Keyboard", 1), ("Mouse", 2)]
+        )
+
+    def test_sets_status_of_selected_systems(self):
+        other = System.objects.create(organisation=self.org, room=self.room, system_name="PC 2", status='active')
+        response = self.client.post(self.url('system_bulk_status'), {
+            'selected': [self.system.pk, other.pk], 'status': 'under_maintenance',
+        })
+        self.assertRedirects(response, self.url('system_list'))
+        self.assertEqual(set(System.objects.values_list('status', flat=True)), {'under_maintenance'})
+        self.assertEqual(len(search.search(self.room, "under_maintenance")[0]), 2)
+
+    def test_resolves_selected_issues(self):
+        other = Issue.objects.create(
+            organisation=self.org, room=self.room, created_by="Student", subject="Keyboard broken", description="..."
+        )
+        response = self.client.post(self.url('issue_bulk_resolve'), {'selected': [self.issue.pk, other.pk]}, follow=True)
+        self.assertContains(response, "Resolved 2 issues.")
+        self.assertFalse(Issue.objects.filter(resolved=False).exists())
+
+        response = self.client.post(self.url('issue_bulk_resolve'), {}, follow=True)
+        self.assertContains(response, "Select at least one row.")
+
+
+    def test_action_and_model_can_be_passed_to_as_view(self):
+        view = BulkActionView.as_view(
+            form_class=IssueBulkResolveForm, list_url_name='room_incharge:issue_list', model=Issue,
+            action=lambda view, form, selected: f"Closed {selected.update(resolved=True)}.",
+        )
+        request = RequestFactory().post(self.url('issue_bulk_resolve'), {'selected': [self.issue.pk]})
+        request.user, request.session = self.user, self.client.session
+        request._messages = FallbackStorage(request)
+        response = view(request, room_slug=self.room.slug)
+
+        self.assertEqual(response.url, self.url('issue_list'))
+        self.assertEqual([str(message) for message in request._messages], ["Closed 1."])
+        self.issue.refresh_from_db()
+        self.assertTrue(self.issue.resolved)
+        with self.assertRaises(ImproperlyConfigured):
+            BulkActionView.as_view(form_class=IssueBulkResolveForm)(request, room_slug=self.room.slug)
+
+class DashboardSummaryTests(InventoryTestData, TestCase):
+
+    def assertSummariesMatch(self):
+        """The incrementally maintained summaries equal a count from scratch."""
+        counts = dashboard.count_rooms(Room.objects.filter(organisation=self.org))
+        for room_pk, room_counts in counts.items():
+            summary = RoomSummary.objects.filter(room_id=room_pk).values(*OrgSummary.COUNTERS).get()
+            self.assertEqual(summary, room_counts)
+        totals = {name: sum(room_counts[name] for room_counts in counts.values()) for name in OrgSummary.COUNTERS}
+        self.assertEqual(OrgSummary.objects.filter(organisation=self.org).values(*OrgSummary.COUNTERS).get(), totals)
+
+    def create_room(self, n):
+        profile = UserProfile.objects.create(
+            user=User.objects.create_user(email=f"incharge{n}@example.com", password="password"),
+            org=self.org, first_name="Room", last_name=f"Incharge {n}",
+        )
+        room = Room.objects.create(organisation=self.org, label=f"L{n}", room_name=f"Lab {n}", incharge=profile)
+        Item.objects.create(
+            organisation=self.org, room=room, category=self.category, brand=self.brand,
+            item_name="Monitor", total_count=4, available_count=4,
+        )
+        Issue.objects.create(organisation=self.org, room=room, created_by="Student", subject="Flicker", description="...")
+        return room
+
+    def test_summaries_follow_writes(self):
+        self.assertSummariesMatch()
+        summary = RoomSummary.objects.get(room=self.room)
+        self.assertEqual((summary.item_count, summary.total_stock, summary.pending_purchases, summary.open_issues), (1, 10, 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other_room = self.create_room(2)
+            stock.assign(self.item, 3)
+            bulk_actions.archive_items(self.room, [self.item], 2, 'consumption', "Lost")
+            self.purchase.status = 'approved'
+            self.purchase.save()
+            self.system.status = 'inactive'
+            self.system.save()
+            bulk_actions.set_system_status(System.objects.filter(pk=self.system.pk), 'disposed')
+            bulk_actions.resolve_issues(Issue.objects.filter(room=other_room))
+            item = Item.objects.get(room=other_room)
+            item.room = self.room
+            item.total_count = 6
+            item.save()
+            item.total_count = 8
+            item.save()
+        self.assertSummariesMatch()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issue.delete()
+            self.item.delete()
+        self.assertSummariesMatch()
+        summary = RoomSummary.objects.get(room=self.room)
+        self.assertEqual((summary.item_count, summary.total_stock, summary.open_issues), (1, 8, 0))
+
+    def test_saves_are_counted_once_per_transaction(self):
+        issue = Issue.objects.get(pk=self.issue.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries, transaction.atomic():
+                for resolved in (True, False, True):
+                    issue.resolved = resolved
+                    issue.save()
+                self.item.total_count = 12
+                self.item.save()
+        # The previous values come from the loaded rows and nothing is counted before the commit
+        self.assertFalse([query for query in queries if 'SELECT' in query['sql'] and 'inventory_issue' in query['sql']])
+        self.assertFalse([query for query in queries if 'summary' in query['sql']])
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(len([query for query in queries if 'summary' in query['sql']]), 2)
+        self.assertSummariesMatch()
+
+    def test_bulk_inserts_are_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            imports.import_items(self.room, BytesIO(b"Item,Category,Brand,Total\nCable,Wires,Generic,7\n"))
+        self.assertSummariesMatch()
+        self.assertEqual(OrgSummary.objects.get(organisation=self.org).total_stock, 17)
+
+    def test_missing_summaries_are_rebuilt(self):
+        OrgSummary.objects.all().delete()
+        RoomSummary.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Issue.objects.create(organisation=self.org, room=self.room, created_by="Student", subject="Keyboard", description="...")
+        self.assertSummariesMatch()
+
+        RoomSummary.objects.update(open_issues=0, item_count=0)
+        OrgSummary.objects.update(pending_purchases=5)
+        out = StringIO()
+        call_command('rebuild_dashboard', org=self.org.slug, stdout=out)
+        self.assertIn("1 organisation(s)", out.getvalue())
+        self.assertSummariesMatch()
+
+    def test_dashboard_cost_does_not_grow_with_rooms(self):
+        url = reverse('central_admin:dashboard')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            baseline = len(queries)
+        self.assertContains(response, "Computer Lab")
+        self.assertEqual(response.context['summary'].open_issues, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(2, 6):
+                self.create_room(n)
+        with self.assertNumQueries(baseline):
+            response = self.client.get(url)
+        self.assertEqual(response.context['summary'].open_issues, 5)
+        self.assertContains(response, "Lab 5")
+
+
+class RoomSearchTests(InventoryTestData, TestCase):
+
+    def search(self, query, **kwargs):
+        return [(document.kind, document.title) for document in search.search(self.room, query, **kwargs)[0]]
+
+    def test_finds_objects_by_any_of_their_fields(self):
+        self.assertEqual(self.search("mou"), [('item', "Mouse"), ('system', "PC 1"), ('purchase', self.purchase.purchase_id)])
+        self.assertIn(('item', "Mouse"), self.search("peripherals logi"))
+        self.assertEqual(self.search("sn-1"), [('system', "PC 1")])
+        self.assertEqual(self.search(self.purchase.purchase_id), [('purchase', self.purchase.purchase_id)])
+        self.assertEqual(self.search("mouse keyboard"), [])
+        self.assertEqual(self.search(" -- "), [])
+
+    def test_title_matches_rank_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(
+                organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+                item_name="Logitech receiver", total_count=1, available_count=1,
+            )
+        self.assertEqual(self.search("logitech")[0], ('item', "Logitech receiver"))
+
+    def test_documents_follow_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.category_name = "Accessories"
+            self.category.save()
+        self.assertIn(('item', "Mouse"), self.search("accessories"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.component.delete()
+        self.assertEqual(self.search("sn-1"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.system.delete()
+        self.assertNotIn(('system', "PC 1"), self.search("pc"))
+
+    def test_documents_are_updated_once_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                for n in range(5):
+                    self.item.item_name = f"Mouse {n}"
+                    self.item.save()
+                self.brand.brand_name = "Generic"
+                self.brand.save()
+        self.assertFalse([query for query in queries if 'search' in query['sql']])
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        # One delete and one insert of the documents of each kind
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT')]), 3)
+        self.assertEqual(self.search("generic"), [('item', "Mouse 4")])
+
+    def test_results_are_scoped_to_the_room_and_paginated(self):
+        other_profile = UserProfile.objects.create(
+            user=User.objects.create_user(email="other@example.com", password="password"), org=self.org, first_name="Other", last_name="Incharge",
+        )
+        other_room = Room.objects.create(organisation=self.org, label="L2", room_name="Other Lab", incharge=other_profile)
+        Item.objects.create(
+            organisation=self.org, room=other_room, category=self.category, brand=self.brand,
+            item_name="Mouse pad", total_count=1, available_count=1,
+        )
+        self.assertEqual(len(self.search("mouse")), 3)
+        documents, has_next = search.search(self.room, "mouse", page=2, page_size=2)
+        self.assertEqual(len(documents), 1)
+        self.assertFalse(has_next)
+
+    def test_rebuild_command_indexes_bulk_inserted_rows(self):
+        Item.objects.bulk_create([Item(
+            organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+            item_name="Projector", total_count=1, available_count=1, slug="projector",
+        )])
+        self.assertEqual(self.search("projector"), [])
+        call_command('rebuild_search_index', room=self.room.slug, stdout=StringIO())
+        self.assertEqual(self.search("projector"), [('item', "Projector")])
+
+    def test_search_page(self):
+        url = reverse('room_incharge:search', kwargs={'room_slug': self.room.slug})
+        response = self.client.get(url, {'q': 'sn-1'})
+        self.assertContains(response, reverse('room_incharge:system_component_list', kwargs={'room_slug': self.room.slug, 'system_slug': self.system.slug}))
+
+        response = self.client.get(url, {'q': 'mouse', 'format': 'json', 'page': 'x'})
+        data = response.json()
+        self.assertEqual([result['kind'] for result in data['results']], ['item', 'system', 'purchase'])
+        self.assertEqual((data['page'], data['has_next']), (1, False))
+
+
+class RoomChoicesTests(InventoryTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            other_org = Organisation.objects.create(name="Other College")
+            other_profile = UserProfile.objects.create(
+                user=User.objects.create_user(email="other@example.com", password="password"), org=other_org, first_name="Other", last_name="Incharge",
+            )
+            cls.other_room = Room.objects.create(organisation=other_org, label="X1", room_name="Other Lab", incharge=other_profile)
+            cls.other_category = Category.objects.create(organisation=other_org, room=cls.other_room, category_name="Monitors")
+            cls.other_vendor = Vendor.objects.create(
+                organisation=other_org, vendor_name="Other vendor", email="other@example.com",
+                contact_number="1", alternate_number="2", address="Street",
+            )
+
+    def autocomplete(self, source, query=''):
+        url = reverse('room_incharge:autocomplete', kwargs={'room_slug': self.room.slug, 'source': source})
+        return self.client.get(url, {'q': query})
+
+    def test_forms_only_offer_the_rows_of_their_room(self):
+        form = ItemForm(room=self.room)
+        self.assertEqual(list(form.fields['category'].queryset), [self.category])
+        self.assertEqual(list(ItemPurchaseForm(room=self.room).fields['vendor'].queryset), [self.vendor])
+        self.assertFalse(ItemForm().fields['category'].queryset.exists())
+
+        form = ItemForm({'item_name': "Cable", 'category': self.other_category.pk, 'brand': self.brand.pk, 'total_count': 1}, room=self.room)
+        self.assertIn('category', form.errors)
+
+    def test_large_choice_sets_render_only_the_selected_option(self):
+        Item.objects.create(
+            organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+            item_name="Keyboard", total_count=1, available_count=1,
+        )
+        html = str(PurchaseForm(room=self.room)['item'])
+        self.assertIn("Keyboard", html)
+        self.assertNotIn("data-autocomplete-url", html)
+
+        with mock.patch.object(autocomplete, 'SELECT_LIMIT', 1):
+            form = PurchaseForm(room=self.room, initial={'item': self.item.pk})
+        html = str(form['item'])
+        self.assertIn('data-autocomplete-url="%s"' % reverse('room_incharge:autocomplete', kwargs={'room_slug': self.room.slug, 'source': 'item'}), html)
+        self.assertIn("Mouse", html)
+        self.assertNotIn("Keyboard", html)
+        self.assertIn('form-select', html)
+
+    def test_autocomplete_searches_by_prefix_within_the_scope(self):
+        Item.objects.create(
+            organisation=self.org, room=self.other_room, category=self.other_category, brand=self.brand,
+            item_name="Mouse pad", total_count=1, available_count=1,
+        )
+        self.assertEqual(self.autocomplete('item', "MO").json(), {'results': [{'id': self.item.pk, 'text': "Mouse"}], 'more': False})
+        self.assertEqual(self.autocomplete('item', "ouse").json()['results'], [])
+        self.assertEqual([result['text'] for result in self.autocomplete('vendor').json()['results']], ["Vendor"])
+        self.assertEqual(self.autocomplete('room').status_code, 404)
+
+        results, more = autocomplete.search('item', self.org.pk, "", room=self.room, limit=0)
+        self.assertEqual((results, more), ([], True))
+
+    @skipUnless(connection.vendor == 'sqlite', "Checks SQLite query plans")
+    def test_prefix_searches_use_an_index(self):
+        Item.objects.bulk_create([
+            Item(
+                organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+                item_name=f"Item {n}", slug=f"item-{n}", total_count=1, available_count=1,
+            )
+            for n in range(500)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        plan = autocomplete.SOURCES['item'].matching(self.org.pk, "item 4", room=self.room).explain()
+        self.assertIn('inventory_item_room_name_prefix', plan)
+        plan = autocomplete.SOURCES['item'].matching(self.org.pk, "item 4").explain()
+        self.assertIn('inventory_item_org_name_prefix', plan)
+
+    def test_searches_are_cached_until_a_source_changes(self):
+        self.autocomplete('category', "p")
+        with self.assertNumQueries(4):
+            # Session, user, profile and room only
+            self.assertEqual(len(self.autocomplete('category', "p").json()['results']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(organisation=self.org, room=self.room, category_name="Printers")
+        self.assertEqual(len(self.autocomplete('category', "p").json()['results']), 2)
+
+    def test_room_forms_pick_people_of_the_organisation(self):
+        self.assertEqual(list(RoomCreateForm(organisation=self.org).fields['incharge'].queryset), [self.profile])
+        self.assertEqual(list(RoomUpdateForm(room=self.room, instance=self.room).fields['incharge'].queryset), [self.profile])
+
+        with mock.patch.object(autocomplete, 'SELECT_LIMIT', 0):
+            html = str(RoomCreateForm(organisation=self.org)['incharge'])
+        self.assertIn('data-autocomplete-url="%s"' % reverse('central_admin:autocomplete', kwargs={'source': 'person'}), html)
+        self.assertContains(self.client.get(reverse('central_admin:room_create')), "Room Incharge")
+
+    def test_organisation_autocomplete(self):
+        url = reverse('central_admin:autocomplete', kwargs={'source': 'person'})
+        expected = {'results': [{'id': self.profile.pk, 'text': "Room Incharge"}], 'more': False}
+        self.assertEqual(self.client.get(url, {'q': "inch"}).json(), expected)
+        self.assertEqual(self.client.get(url, {'q': "room"}).json(), expected)
+        self.assertEqual(self.client.get(url, {'q': "other"}).json()['results'], [])
+
+        # Items of every room of the organisation, at most `limit` of them
+        monitor = Item.objects.create(
+            organisation=self.org, room=self.room, category=self.category, brand=self.brand,
+            item_name="Monitor", total_count=1, available_count=1,
+        )
+        url = reverse('central_admin:autocomplete', kwargs={'source': 'item'})
+        data = self.client.get(url, {'q': "m", 'limit': 1}).json()
+        self.assertEqual((data['results'], data['more']), ([{'id': monitor.pk, 'text': "Monitor"}], True))
+        self.assertEqual(self.client.get(reverse('central_admin:autocomplete', kwargs={'source': 'vendor'}), {'q': "other"}).json()['results'], [])
+
+    def test_limits_are_bounded(self):
+        self.assertEqual(autocomplete.parse_limit(None), autocomplete.RESULT_LIMIT)
+        self.assertEqual(autocomplete.parse_limit("x"), autocomplete.RESULT_LIMIT)
+        self.assertEqual(autocomplete.parse_limit("0"), 1)
+        self.assertEqual(autocomplete.parse_limit("1000"), autocomplete.MAX_RESULTS)
+
+
+class ScopedIndexBenchmarkTests(TestCase):
+
+    def test_benchmark_compares_plans_and_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_indexes', orgs=1, rooms=2, items=20, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Requested purchases", output)
+        self.assertIn("inventory_p_organis_62bb24_idx", output)
+        self.assertFalse(Item.objects.exists())
+        constraints = connection.introspection.get_constraints(connection.cursor(), Purchase._meta.db_table)
+        self.assertIn("inventory_p_organis_62bb24_idx", constraints)
+
+
+@override_settings(QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_HEADER=True, QUERY_PROFILER_SLOW_MS=60000)
+class QueryProfilerTests(InventoryTestData, TestCase):
+
+    def get_item_list(self):
+        return self.client.get(reverse('room_incharge:item_list', kwargs={'room_slug': self.room.slug}))
+
+    def test_logs_and_reports_each_profiled_request(self):
+        with self.assertLogs('inventory.profiling', 'INFO') as logs:
+            response = self.get_item_list()
+
+        profile = json.loads(logs.records[0].getMessage())
+        self.assertEqual((profile['view'], profile['status']), ('room_incharge:item_list', 200))
+        self.assertGreater(profile['queries'], 0)
+        self.assertLessEqual(profile['view_ms'], profile['total_ms'])
+        self.assertEqual(response['X-Query-Profile'].split('; ')[0], f"queries={profile['queries']}")
+
+    def test_counts_duplicate_queries(self):
+        profile = QueryProfile()
+        with connection.execute_wrapper(profile):
+            Room.objects.get(pk=self.room.pk)
+            Room.objects.get(pk=self.room.pk)
+            Room.objects.filter(pk=self.room.pk).exists()
+        duplicates = profile.get_duplicates()
+        self.assertEqual(len(duplicates), 1)
+        self.assertIn('"inventory_room"', duplicates[0][0])
+        self.assertEqual(duplicates[0][1], 2)
+
+    @override_settings(QUERY_PROFILER_SLOW_MS=0)
+    def test_slow_requests_are_logged_with_their_queries(self):
+        with self.assertLogs('inventory.profiling', 'INFO'), self.assertLogs('inventory.profiling.slow', 'WARNING') as logs:
+            self.get_item_list()
+        sample = json.loads(logs.records[0].getMessage())
+        self.assertEqual(len(sample['slowest']), min(sample['queries'], profiling.SLOWEST_SHOWN))
+
+    @override_settings(QUERY_PROFILER_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_left_alone(self):
+        self.assertNotIn('X-Query-Profile', self.get_item_list())
+
+    @override_settings(QUERY_PROFILER_ENABLED=False)
+    def test_disabled_by_default(self):
+        self.assertNotIn('X-Query-Profile', self.get_item_list())
+
+
+class FormBenchmarkTests(TestCase):
+
+    def test_benchmark_times_each_form(self):
+        out = StringIO()
+        call_command('benchmark_forms', repeat=2, stdout=out)
+
+        output = out.getvalue()
+        for form_name in ("ItemForm", "PurchaseForm", "PeopleCreateForm"):
+            self.assertIn(form_name, output)
+
+
+class PageBenchmarkTests(TestCase):
+    scale = {
+        'rooms': 1, 'items': 5, 'systems': 2, 'components': 1, 'item_groups': 1, 'purchases': 2,
+        'archives': 2, 'issues': 1, 'departments': 1, 'history_days': 30,
+    }
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.output = os.path.join(directory, 'pages.json')
+
+    def run_benchmark(self, **options):
+        out = StringIO()
+        call_command('benchmark_pages', repeat=2, stdout=out, stderr=StringIO(), **{**self.scale, **options})
+        return out.getvalue()
+
+    def test_measures_every_page_and_rolls_back(self):
+        self.run_benchmark(output=self.output)
+
+        with open(self.output) as f:
+            baseline = json.load(f)
+        self.assertEqual(baseline['database'], connection.vendor)
+        names = [
+            f"{urlconf.app_name}:{pattern.name}" for urlconf in benchmarks.URLCONFS for pattern in urlconf.urlpatterns
+        ]
+        self.assertEqual(sorted(baseline['pages']), sorted(names))
+        for name, result in baseline['pages'].items():
+            self.assertLess(result['status'], 500, name)
+            self.assertGreater(result['queries'], 0, name)
+        self.assertFalse(Organisation.objects.exists())
+
+    def test_fails_on_extra_queries(self):
+        self.run_benchmark(output=self.output)
+        with open(self.output) as f:
+            baseline = json.load(f)
+        baseline['pages']['room_incharge:item_list']['queries'] -= 1
+        with open(self.output, 'w') as f:
+            json.dump(baseline, f)
+
+        with self.assertRaisesMessage(CommandError, "1 regressions"):
+            self.run_benchmark(baseline=self.output, latency_tolerance=1000, memory_tolerance=1000)
+
+    def test_refuses_a_baseline_of_another_scale(self):
+        with open(self.output, 'w') as f:
+            json.dump({'database': connection.vendor, 'scale': {**self.scale, 'items': 6}, 'repeat': 2, 'pages': {}}, f)
+        with self.assertRaisesMessage(CommandError, "another scale"):
+            self.run_benchmark(baseline=self.output)
+
+    def test_compare_allows_latency_within_slack(self):
+        previous = {'page': {'queries': 3, 'p50_ms': 1.0, 'p95_ms': 2.0, 'peak_kib': 100}}
+        result = {'page': {'queries': 3, 'p50_ms': 4.0, 'p95_ms': 9.0, 'peak_kib': 120}}
+        self.assertEqual(benchmarks.compare(previous, result, 0.5, 0.25, 5), ["page: p95_ms 9.0, was 2.0"])
+
+
+class UniqueSlugAutocommitTests(TransactionTestCase):
+
+    def test_insert_outside_a_transaction_takes_no_savepoint(self):
+        org = Organisation.objects.create(name="Test College")
+        with CaptureQueriesContext(connection) as queries:
+            first = Vendor.objects.create(
+                organisation=org, vendor_name="Vendor", email="vendor@example.com",
+                contact_number="1", alternate_number="2", address="Street",
+            )
+        self.assertFalse([query for query in queries if 'SAVEPOINT' in query['sql']])
+
+        code = first.slug.rsplit('-', 1)[1]
+        with mock.patch('config.utils.generate_code', side_effect=[first.vendor_id, code, 'fresh123', 'fresh456']):
+            second = Vendor.objects.create(
+                organisation=org, vendor_name="Vendor", email="other@example.com",
+                contact_number="1", alternate_number="2", address="Street",
+            )
+        self.assertEqual((second.vendor_id, second.slug), ('fresh123', 'vendor-fresh456'))
+
+
+class StockMovementConcurrencyTests(TransactionTestCase):
+
+    def test_concurrent_archiving_never_oversells(self):
+        org = Organisation.objects.create(name="Test College")
+        user = User.objects.create_user(email="incharge@example.com", password="password")
+        profile = UserProfile.objects.create(user=user, org=org, first_name="Room", last_name="Incharge")
+        room = Room.objects.create(organisation=org, label="L1", room_name="Lab", incharge=profile)
+        category = Category.objects.create(organisation=org, room=room, category_name="Peripherals")
+        brand = Brand.objects.create(organisation=org, room=room, brand_name="Logitech")
+        item = Item.objects.create(
+            organisation=org, room=room, category=category, brand=brand,
+            item_name="Mouse", total_count=50, available_count=50,
+        )
+        successes = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    while True:
+                        try:
+                            stock.archive_available(item.pk, 1)
+                            successes.append(1)
+                        except stock.InsufficientStock:
+                            pass
+                        except OperationalError:
+                            # SQLite's shared in-memory test database locks whole tables; just retry
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        item.refresh_from_db()
+        self.assertEqual(len(successes), 50)
+        self.assertEqual((item.available_count, item.achived_count), (0, 50))
+        self.assertEqual(StockMovement.objects.filter(item=item, movement_type='archive').count(), 50)
@@ -20,7 +20,9 @@ urlpatterns = [
     path('purchases/<slug:purchase_slug>/approve/', central_admin.PurchaseApproveView.as_view(), name='purchase_approve'),
     path('purchases/<slug:purchase_slug>/decline/', central_admin.PurchaseDeclineView.as_view(), name='purchase_decline'),
     path('issues/', central_admin.IssueListView.as_view(), name='issue_list'),
+    path('export/<slug:dataset>/', central_admin.ExportView.as_view(), name='export'),
     path('departments/', central_admin.DepartmentListView.as_view(), name='department_list'),
     path('departments/create/', central_admin.DepartmentCreateView.as_view(), name='department_create'),
     path('departments/<slug:department_slug>/delete/', central_admin.DepartmentDeleteView.as_view(), name='department_delete'),
+    path('autocomplete/<slug:source>/', central_admin.AutocompleteView.as_view(), name='autocomplete'),
 ]
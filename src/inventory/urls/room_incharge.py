@@ -14,9 +14,11 @@ urlpatterns = [
     path('rooms/<slug:room_slug>/brands/<slug:brand_slug>/delete/', room_incharge.BrandDeleteView.as_view(), name='brand_delete'),
     path('rooms/<slug:room_slug>/items/', room_incharge.ItemListView.as_view(), name='item_list'),
     path('rooms/<slug:room_slug>/items/create/', room_incharge.ItemCreateView.as_view(), name='item_create'),
+    path('rooms/<slug:room_slug>/items/import/', room_incharge.ItemImportView.as_view(), name='item_import'),
     path('rooms/<slug:room_slug>/items/<slug:item_slug>/update/', room_incharge.ItemUpdateView.as_view(), name='item_update'),
     path('rooms/<slug:room_slug>/items/<slug:item_slug>/delete/', room_incharge.ItemDeleteView.as_view(), name='item_delete'),
     path('rooms/<slug:room_slug>/items/<slug:item_slug>/archive/', room_incharge.ItemArchiveView.as_view(), name='item_archive'),
+    path('rooms/<slug:room_slug>/items/bulk-archive/', room_incharge.ItemBulkArchiveView.as_view(), name='item_bulk_archive'),
     path('rooms/<slug:room_slug>/item-groups/', room_incharge.ItemGroupListView.as_view(), name='item_group_list'),
     path('rooms/<slug:room_slug>/item-groups/create/', room_incharge.ItemGroupCreateView.as_view(), name='item_group_create'),
     path('rooms/<slug:room_slug>/item-groups/<slug:item_group_slug>/update/', room_incharge.ItemGroupUpdateView.as_view(), name='item_group_update'),
@@ -27,6 +29,8 @@ urlpatterns = [
     path('rooms/<slug:room_slug>/item-groups/<slug:item_group_slug>/items/<slug:item_group_item_slug>/delete/', room_incharge.ItemGroupItemDeleteView.as_view(), name='item_group_item_delete'),
     path('rooms/<slug:room_slug>/systems/', room_incharge.SystemListView.as_view(), name='system_list'),
     path('rooms/<slug:room_slug>/systems/create/', room_incharge.SystemCreateView.as_view(), name='system_create'),
+    path('rooms/<slug:room_slug>/systems/bulk-create/', room_incharge.SystemBulkCreateView.as_view(), name='system_bulk_create'),
+    path('rooms/<slug:room_slug>/systems/bulk-status/', room_incharge.SystemBulkStatusView.as_view(), name='system_bulk_status'),
     path('rooms/<slug:room_slug>/systems/<slug:system_slug>/update/', room_incharge.SystemUpdateView.as_view(), name='system_update'),
     path('rooms/<slug:room_slug>/systems/<slug:system_slug>/delete/', room_incharge.SystemDeleteView.as_view(), name='system_delete'),
     path('rooms/<slug:room_slug>/systems/<slug:system_slug>/components/', room_incharge.SystemComponentListView.as_view(), name='system_component_list'),
@@ -34,6 +38,7 @@ urlpatterns = [
     path('rooms/<slug:room_slug>/systems/<slug:system_slug>/components/<slug:component_slug>/update/', room_incharge.SystemComponentUpdateView.as_view(), name='system_component_update'),
     path('rooms/<slug:room_slug>/systems/<slug:system_slug>/components/<slug:component_slug>/delete/', room_incharge.SystemComponentDeleteView.as_view(), name='system_component_delete'),
     path('rooms/<slug:room_slug>/systems/<slug:system_slug>/components/<slug:component_slug>/archive/', room_incharge.SystemComponentArchiveView.as_view(), name='system_component_archive'),
+    path('rooms/<slug:room_slug>/systems/<slug:system_slug>/components/bulk-archive/', room_incharge.SystemComponentBulkArchiveView.as_view(), name='system_component_bulk_archive'),
     path('rooms/<slug:room_slug>/purchases/', room_incharge.PurchaseListView.as_view(), name='purchase_list'),
     path('rooms/<slug:room_slug>/purchases/create/', room_incharge.PurchaseCreateView.as_view(), name='purchase_create'),
     path('rooms/<slug:room_slug>/purchases/<slug:purchase_slug>/update/', room_incharge.PurchaseUpdateView.as_view(), name='purchase_update'),
@@ -45,6 +50,12 @@ urlpatterns = [
     path('rooms/<slug:room_slug>/dashboard/', room_incharge.RoomDashboardView.as_view(), name='room_dashboard'),
     path('rooms/<slug:room_slug>/update/', room_incharge.RoomUpdateView.as_view(), name='room_update'),
     path('rooms/<slug:room_slug>/issues/', room_incharge.IssueListView.as_view(), name='issue_list'),
+    path('rooms/<slug:room_slug>/issues/bulk-resolve/', room_incharge.IssueBulkResolveView.as_view(), name='issue_bulk_resolve'),
     path('rooms/<slug:room_slug>/settings/', room_incharge.RoomSettingsView.as_view(), name='room_settings'),
     path('rooms/<slug:room_slug>/report/', room_incharge.RoomReportView.as_view(), name='room_report'),
+    path('rooms/<slug:room_slug>/report/<uuid:job_id>/', room_incharge.RoomReportStatusView.as_view(), name='room_report_status'),
+    path('rooms/<slug:room_slug>/report/<uuid:job_id>/download/', room_incharge.RoomReportDownloadView.as_view(), name='room_report_download'),
+    path('rooms/<slug:room_slug>/export/<slug:dataset>/', room_incharge.RoomExportView.as_view(), name='room_export'),
+    path('rooms/<slug:room_slug>/search/', room_incharge.RoomSearchView.as_view(), name='search'),
+    path('rooms/<slug:room_slug>/autocomplete/<slug:source>/', room_incharge.RoomAutocompleteView.as_view(), name='autocomplete'),
 ]
\ No newline at end of file
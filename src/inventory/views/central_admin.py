@@ -2,7 +2,7 @@ from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView, View
 from core.models import User, UserProfile
-from inventory.models import Room, Vendor, Purchase, Issue, Department  # Import the Department model
+from inventory.models import Room, Vendor, Purchase, Issue, Department, RoomSummary  # Import the Department model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
@@ -10,12 +10,20 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.db import transaction
 from inventory.forms.central_admin import PeopleCreateForm, RoomCreateForm, DepartmentForm, VendorForm  # Import the form
 from django.contrib.auth.mixins import LoginRequiredMixin
+from config.mixins.list_mixin import KeysetListMixin
+from django.http import Http404
+from inventory import autocomplete, dashboard, exports
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'central_admin/dashboard.html'
+    rooms_shown = 20
     
     def get_context_data(self,**kwargs):
         context = super().get_context_data(**kwargs)
+        org = self.request.user.profile.org
+        # Precomputed counters, so the page costs the same for any organisation size
+        context['summary'] = dashboard.get_org_summary(org)
+        context['room_summaries'] = RoomSummary.objects.filter(organisation=org).select_related('room').order_by('room_id')[:self.rooms_shown]
         return context
 
 
@@ -87,13 +95,20 @@ class PeopleDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('central_admin:people_list')
     
 
-class RoomListView(LoginRequiredMixin, ListView):
+class RoomListView(LoginRequiredMixin, KeysetListMixin, ListView):
     template_name = 'central_admin/room_list.html'
     model = Room
     context_object_name = 'rooms'
+    sort_fields = {'created': 'created_on', 'name': 'room_name', 'label': 'label'}
+    filter_fields = {'department': 'department__slug'}
 
     def get_queryset(self):
-        return Room.objects.filter(organisation=self.request.user.profile.org)
+        return super().get_queryset().filter(organisation=self.request.user.profile.org)
+
+    def get_filter_choices(self):
+        choices = super().get_filter_choices()
+        choices['department'] = list(Department.objects.filter(organisation=self.request.user.profile.org).values_list('slug', 'department_name'))
+        return choices
     
     
 class RoomCreateView(LoginRequiredMixin, CreateView):
@@ -102,6 +117,11 @@ class RoomCreateView(LoginRequiredMixin, CreateView):
     form_class = RoomCreateForm
     success_url = reverse_lazy('central_admin:room_list')
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['organisation'] = self.request.user.profile.org
+        return kwargs
+
     def form_valid(self, form):
         room = form.save(commit=False)
         room.organisation = self.request.user.profile.org
@@ -125,6 +145,11 @@ class RoomUpdateView(LoginRequiredMixin, UpdateView):
     slug_field = 'slug'
     slug_url_kwarg = 'room_slug'
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['organisation'] = self.request.user.profile.org
+        return kwargs
+
     def form_valid(self, form):
         room = form.save(commit=False)
         room.organisation = self.request.user.profile.org
@@ -132,10 +157,11 @@ class RoomUpdateView(LoginRequiredMixin, UpdateView):
         return redirect(self.success_url)
 
 
-class VendorListView(LoginRequiredMixin, ListView):
+class VendorListView(LoginRequiredMixin, KeysetListMixin, ListView):
     template_name = 'central_admin/vendor_list.html'
     model = Vendor
     context_object_name = 'vendors'
+    sort_fields = {'created': 'created_on', 'name': 'vendor_name'}
     
     def get_queryset(self):
         return super().get_queryset().filter(organisation=self.request.user.profile.org)
@@ -177,19 +203,33 @@ class VendorDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('central_admin:vendor_list')
 
 
-class PurchaseListView(LoginRequiredMixin, ListView):
+class PurchaseListView(LoginRequiredMixin, KeysetListMixin, ListView):
     template_name = 'central_admin/purchase_list.html'
     model = Purchase
     context_object_name = 'purchases'
+    sort_fields = {'created': 'created_on', 'updated': 'updated_on', 'quantity': 'quantity'}
+    filter_fields = {'status': 'status', 'room': 'room__slug'}
+
+    def get_filter_choices(self):
+        choices = super().get_filter_choices()
+        choices['room'] = list(Room.objects.filter(organisation=self.request.user.profile.org).values_list('slug', 'room_name'))
+        return choices
     
     def get_queryset(self):
         return super().get_queryset().filter(organisation=self.request.user.profile.org)
 
 
-class IssueListView(LoginRequiredMixin, ListView):
+class IssueListView(LoginRequiredMixin, KeysetListMixin, ListView):
     template_name = 'central_admin/issue_list.html'
     model = Issue
     context_object_name = 'issues'
+    sort_fields = {'created': 'created_on', 'updated': 'updated_on'}
+    filter_fields = {'resolved': 'resolved', 'room': 'room__slug'}
+
+    def get_filter_choices(self):
+        choices = super().get_filter_choices()
+        choices['room'] = list(Room.objects.filter(organisation=self.request.user.profile.org).values_list('slug', 'room_name'))
+        return choices
     
     def get_queryset(self):
         return super().get_queryset().filter(organisation=self.request.user.profile.org)
@@ -241,3 +281,16 @@ class PurchaseDeclineView(LoginRequiredMixin, View):
             purchase.save()
         return redirect('central_admin:purchase_list')
 
+class ExportView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        dataset = self.kwargs['dataset']
+        export_format = request.GET.get('format', 'csv')
+        if dataset not in exports.DATASETS or export_format not in exports.FORMATS:
+            raise Http404("Unknown export.")
+        org = request.user.profile.org
+        return exports.export_response(dataset, export_format, f"{org.slug}-{dataset}", organisation=org)
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        return autocomplete.autocomplete_response(request, self.kwargs['source'], request.user.profile.org_id)
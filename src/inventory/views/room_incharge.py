@@ -1,19 +1,26 @@
+from django import forms
+from django.core.exceptions import ImproperlyConfigured
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import ListView, UpdateView, DeleteView, TemplateView, CreateView, View
 from inventory.models import Category, Purchase, Room, Brand, Item, System, SystemComponent, Issue, ItemGroup, ItemGroupItem, RoomSettings  # Import RoomSettings
-from inventory.forms.room_incharge import CategoryForm, BrandForm, ItemForm, ItemPurchaseForm, PurchaseForm, PurchaseUpdateForm, SystemForm, SystemComponentForm, ItemGroupForm, ItemGroupItemForm, RoomSettingsForm  # Import RoomSettingsForm
+from inventory.forms.room_incharge import CategoryForm, BrandForm, ItemForm, ItemImportForm, ItemPurchaseForm, PurchaseForm, PurchaseUpdateForm, SystemForm, SystemComponentForm, ItemGroupForm, ItemGroupItemForm, RoomSettingsForm, SystemBulkCreateForm, SystemBulkComponentFormSet  # Import RoomSettingsForm
 from django.contrib import messages
+from django.db import transaction
+from inventory import stock
 from django.views.generic.edit import FormView
 from inventory.forms.room_incharge import SystemComponentArchiveForm, ItemArchiveForm, RoomUpdateForm
+from inventory.forms.room_incharge import ItemBulkArchiveForm, SystemComponentBulkArchiveForm, SystemBulkStatusForm, IssueBulkResolveForm
 from inventory.models import Archive
 from inventory.forms.room_incharge import PurchaseCompleteForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from weasyprint import HTML
+from config.mixins.room_mixin import RoomContextMixin
+from config.mixins.list_mixin import KeysetListMixin, KeysetPage
+from django.http import FileResponse, Http404, JsonResponse
+from inventory import autocomplete, bulk_actions, exports, imports, report_cache, reports, search, system_builder
+from inventory.models import ReportJob
 
-class CategoryListView(LoginRequiredMixin, ListView):
+class CategoryListView(LoginRequiredMixin, RoomContextMixin, ListView):
     template_name = 'room_incharge/category_list.html'
     model = Category
     context_object_name = 'categories'
@@ -22,14 +29,7 @@ class CategoryListView(LoginRequiredMixin, ListView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class CategoryUpdateView(LoginRequiredMixin, UpdateView):
+class CategoryUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = Category
     template_name = 'room_incharge/category_update.html'
     form_class = CategoryForm
@@ -43,18 +43,11 @@ class CategoryUpdateView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         category = form.save(commit=False)
         category.organisation = self.request.user.profile.org
-        category.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        category.room = self.room
         category.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class CategoryDeleteView(LoginRequiredMixin, DeleteView):
+class CategoryDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = Category
     template_name = 'room_incharge/category_delete_confirm.html'
     slug_field = 'slug'
@@ -67,14 +60,7 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class CategoryCreateView(LoginRequiredMixin, CreateView):
+class CategoryCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = Category
     template_name = 'room_incharge/category_create.html'
     form_class = CategoryForm
@@ -86,58 +72,43 @@ class CategoryCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         category = form.save(commit=False)
         category.organisation = self.request.user.profile.org
-        category.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        category.room = self.room
         category.save()
         return redirect(self.get_success_url())
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['initial']['room'] = Room.objects.get(slug=self.kwargs['room_slug'])
+        kwargs['initial']['room'] = self.room
         return kwargs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class RoomDashboardView(LoginRequiredMixin, TemplateView):
+class RoomDashboardView(LoginRequiredMixin, RoomContextMixin, TemplateView):
     template_name = 'room_incharge/room_dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room_slug = self.kwargs['room_slug']
-        room = Room.objects.get(slug=room_slug)
-        context['room'] = room
-        context['room_slug'] = room_slug
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class RoomUpdateView(LoginRequiredMixin, UpdateView):
+class RoomUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = Room
     template_name = 'room_incharge/room_update.html'
     form_class = RoomUpdateForm
     slug_field = 'slug'
     slug_url_kwarg = 'room_slug'
 
+    def get_object(self):
+        return self.room
+
     def get_success_url(self):
         return reverse_lazy('room_incharge:room_dashboard', kwargs={'room_slug': self.kwargs['room_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         room = form.save(commit=False)
         room.organisation = self.request.user.profile.org
         room.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class BrandListView(LoginRequiredMixin, ListView):
+class BrandListView(LoginRequiredMixin, RoomContextMixin, ListView):
     template_name = 'room_incharge/brand_list.html'
     model = Brand
     context_object_name = 'brands'
@@ -146,14 +117,7 @@ class BrandListView(LoginRequiredMixin, ListView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class BrandCreateView(LoginRequiredMixin, CreateView):
+class BrandCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = Brand
     template_name = 'room_incharge/brand_create.html'
     form_class = BrandForm
@@ -165,23 +129,16 @@ class BrandCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         brand = form.save(commit=False)
         brand.organisation = self.request.user.profile.org
-        brand.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        brand.room = self.room
         brand.save()
         return redirect(self.get_success_url())
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['initial']['room'] = Room.objects.get(slug=self.kwargs['room_slug'])
+        kwargs['initial']['room'] = self.room
         return kwargs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class BrandUpdateView(LoginRequiredMixin, UpdateView):
+class BrandUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = Brand
     template_name = 'room_incharge/brand_update.html'
     form_class = BrandForm
@@ -195,18 +152,11 @@ class BrandUpdateView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         brand = form.save(commit=False)
         brand.organisation = self.request.user.profile.org
-        brand.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        brand.room = self.room
         brand.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class BrandDeleteView(LoginRequiredMixin, DeleteView):
+class BrandDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = Brand
     template_name = 'room_incharge/brand_delete_confirm.html'
     slug_field = 'slug'
@@ -219,30 +169,28 @@ class BrandDeleteView(LoginRequiredMixin, DeleteView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemListView(LoginRequiredMixin, ListView):
+class ItemListView(LoginRequiredMixin, RoomContextMixin, KeysetListMixin, ListView):
     template_name = 'room_incharge/item_list.html'
     model = Item
     context_object_name = 'items'
+    sort_fields = {'created': 'created_on', 'name': 'item_name', 'total': 'total_count', 'available': 'available_count'}
+    filter_fields = {'category': 'category__slug', 'brand': 'brand__slug', 'listed': 'is_listed'}
+
+    def get_filter_choices(self):
+        choices = super().get_filter_choices()
+        choices['category'] = list(Category.objects.filter(room=self.room).values_list('slug', 'category_name'))
+        choices['brand'] = list(Brand.objects.filter(room=self.room).values_list('slug', 'brand_name'))
+        return choices
 
     def get_queryset(self):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
+        kwargs.setdefault('archive_types', Archive.ARCHIVE_TYPES)
+        return super().get_context_data(**kwargs)
 
-class ItemCreateView(LoginRequiredMixin, CreateView):
+class ItemCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = Item
     template_name = 'room_incharge/item_create.html'
     form_class = ItemForm
@@ -254,7 +202,7 @@ class ItemCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         item = form.save(commit=False)
         item.organisation = self.request.user.profile.org
-        item.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        item.room = self.room
         item.achived_count = 0  # Set default value
         item.available_count = item.total_count  # Set available_count to total_count
         item.save()
@@ -262,17 +210,23 @@ class ItemCreateView(LoginRequiredMixin, CreateView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['initial']['room'] = Room.objects.get(slug=self.kwargs['room_slug'])
+        kwargs['room'] = self.room
+        kwargs['initial']['room'] = self.room
         return kwargs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
+class ItemImportView(LoginRequiredMixin, RoomContextMixin, FormView):
+    template_name = 'room_incharge/item_import.html'
+    form_class = ItemImportForm
 
-class ItemUpdateView(LoginRequiredMixin, UpdateView):
+    def form_valid(self, form):
+        try:
+            result = imports.import_items(self.room, form.cleaned_data['file'])
+        except imports.ItemImportError as e:
+            form.add_error('file', str(e))
+            return self.form_invalid(form)
+        return self.render_to_response(self.get_context_data(form=self.form_class(), result=result))
+
+class ItemUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = Item
     template_name = 'room_incharge/item_update.html'
     form_class = ItemForm
@@ -283,21 +237,30 @@ class ItemUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:item_list', kwargs={'room_slug': self.kwargs['room_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         item = form.save(commit=False)
         item.organisation = self.request.user.profile.org
-        item.room = Room.objects.get(slug=self.kwargs['room_slug'])
-        item.save()
+        item.room = self.room
+        with transaction.atomic():
+            # Lock the row so no stock movement lands between reading its counters and saving
+            current = Item.objects.select_for_update().only(*stock.COUNTERS.values()).get(pk=item.pk)
+            old_total = current.total_count
+            for column in ('available_count', 'in_use', 'achived_count'):
+                setattr(item, column, getattr(current, column))
+            # The summaries are moved from the locked counters, not the ones the form loaded
+            item._loaded_values.update(current._loaded_values)
+            item.save()
+            # Keep the stock ledger in step with manual corrections of the total
+            if item.total_count != old_total:
+                stock.record_movement(item, 'adjustment', actor=self.request.user.profile, total=item.total_count - old_total)
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemDeleteView(LoginRequiredMixin, DeleteView):
+class ItemDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = Item
     template_name = 'room_incharge/item_delete_confirm.html'
     slug_field = 'slug'
@@ -310,14 +273,7 @@ class ItemDeleteView(LoginRequiredMixin, DeleteView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemArchiveView(LoginRequiredMixin, FormView):
+class ItemArchiveView(LoginRequiredMixin, RoomContextMixin, FormView):
     template_name = 'room_incharge/item_archive.html'
     form_class = ItemArchiveForm
     success_url = reverse_lazy('room_incharge:item_list')
@@ -326,60 +282,113 @@ class ItemArchiveView(LoginRequiredMixin, FormView):
         return reverse_lazy('room_incharge:item_list', kwargs={'room_slug': self.kwargs['room_slug']})
 
     def form_valid(self, form):
-        item = Item.objects.get(slug=self.kwargs['item_slug'])
+        item = get_object_or_404(Item, slug=self.kwargs['item_slug'], room=self.room)
         count = form.cleaned_data['count']
 
-        if item.available_count < count:
+        try:
+            with transaction.atomic():
+                # Create an archive entry
+                archive = Archive.objects.create(
+                    organisation=item.organisation,
+                    department=item.department,
+                    room=self.room,
+                    item=item,
+                    count=count,
+                    archive_type=form.cleaned_data['archive_type'],
+                    remark=form.cleaned_data['remark']
+                )
+
+                # Update item counts
+                stock.archive_available(item, count, actor=self.request.user.profile, source=archive)
+        except stock.InsufficientStock:
             form.add_error('count', 'The count provided exceeds the available count.')
             return self.form_invalid(form)
 
-        # Create an archive entry
-        Archive.objects.create(
-            organisation=item.organisation,
-            department=item.department,
-            room=item.room,
-            item=item,
-            count=count,
-            archive_type=form.cleaned_data['archive_type'],
-            remark=form.cleaned_data['remark']
+        return redirect(self.get_success_url())
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['initial']['item_slug'] = self.kwargs['item_slug']
+        return kwargs
+
+class BulkActionView(LoginRequiredMixin, RoomContextMixin, FormView):
+    """
+    Applies an action to the rows ticked on a list page. The page posts the
+    pks as `selected`, picked among the rows of `model` in the room; the
+    outcome is reported with a message on the list.
+
+    `action` is called with the view, the valid form and the selected rows
+    and returns the success message. Both can be declared on a subclass or
+    passed to `as_view`.
+    """
+    http_method_names = ['post']
+    list_url_name = None
+    model = None
+    # Lookups of the room and organisation of a row of `model`
+    room_lookup = 'room'
+    organisation_lookup = 'organisation'
+    action = None
+
+    def get_queryset(self):
+        if self.model is None or self.action is None:
+            raise ImproperlyConfigured(f"{type(self).__name__} needs a model and an action.")
+        return self.model.objects.filter(
+            **{self.room_lookup: self.room, self.organisation_lookup: self.request.user.profile.org}
         )
 
-        # Update item counts
-        item.available_count -= count
-        item.achived_count += count
-        item.save()
+    def get_list_kwargs(self):
+        return {'room_slug': self.kwargs['room_slug']}
 
-        return redirect(self.get_success_url())
+    def get_success_url(self):
+        return reverse_lazy(self.list_url_name, kwargs=self.get_list_kwargs())
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['initial']['item_slug'] = self.kwargs['item_slug']
+        kwargs['queryset'] = self.get_queryset()
         return kwargs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
+    def form_valid(self, form):
+        try:
+            messages.success(self.request, self.action(self, form, form.cleaned_data['selected']))
+        except stock.InsufficientStock as e:
+            messages.error(self.request, str(e))
+        return redirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(self.request, error)
+        return redirect(self.get_success_url())
+
+def archive_selected_items(view, form, selected):
+    archives = bulk_actions.archive_items(
+        view.room, list(selected), form.cleaned_data['count'], form.cleaned_data['archive_type'],
+        form.cleaned_data['remark'], actor=view.request.user.profile,
+    )
+    return f"Archived {form.cleaned_data['count']} of each of {len(archives)} items."
 
-class SystemListView(LoginRequiredMixin, ListView):
+class ItemBulkArchiveView(BulkActionView):
+    form_class = ItemBulkArchiveForm
+    list_url_name = 'room_incharge:item_list'
+    model = Item
+    action = staticmethod(archive_selected_items)
+
+class SystemListView(LoginRequiredMixin, RoomContextMixin, KeysetListMixin, ListView):
     template_name = 'room_incharge/system_list.html'
     model = System
     context_object_name = 'systems'
+    sort_fields = {'created': 'created_on', 'name': 'system_name'}
+    filter_fields = {'status': 'status'}
 
     def get_queryset(self):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
+        kwargs.setdefault('status_choices', System.STATUS_CHOICES)
+        return super().get_context_data(**kwargs)
 
-class SystemCreateView(LoginRequiredMixin, CreateView):
+class SystemCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = System
     template_name = 'room_incharge/system_create.html'
     form_class = SystemForm
@@ -391,24 +400,73 @@ class SystemCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         system = form.save(commit=False)
         system.organisation = self.request.user.profile.org
-        system.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        system.room = self.room
         system.department = system.room.department  # Set the department field
         system.save()
         return redirect(self.get_success_url())
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['initial']['room'] = Room.objects.get(slug=self.kwargs['room_slug'])
+        kwargs['initial']['room'] = self.room
         return kwargs
 
+class SystemBulkCreateView(LoginRequiredMixin, RoomContextMixin, FormView):
+    template_name = 'room_incharge/system_bulk_create.html'
+    form_class = SystemBulkCreateForm
+
+    def get_success_url(self):
+        return reverse_lazy('room_incharge:system_list', kwargs={'room_slug': self.kwargs['room_slug']})
+
+    def get_formset(self):
+        return SystemBulkComponentFormSet(self.request.POST or None, prefix='components', form_kwargs={'room': self.room})
+
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
+        kwargs.setdefault('formset', self.get_formset())
+        return super().get_context_data(**kwargs)
+
+    def get_components(self, numbers, formset):
+        """The component specs of the formset, or None if a serial number list does not fit."""
+        components = []
+        for component_form in formset.get_components():
+            try:
+                serials = component_form.get_serials(numbers)
+            except forms.ValidationError as e:
+                component_form.add_error('serial_numbers', e)
+                continue
+            components.append(system_builder.ComponentSpec(
+                component_form.cleaned_data['component_type'], component_form.cleaned_data['component_item'], serials,
+            ))
+        return components if formset.is_valid() else None
+
+    def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        formset = self.get_formset()
+        if form.is_valid() and formset.is_valid():
+            components = self.get_components(form.get_numbers(), formset)
+            if components is not None:
+                try:
+                    systems = system_builder.build_systems(
+                        self.room, form.get_names(), form.cleaned_data['status'], components, actor=request.user.profile,
+                    )
+                except system_builder.SystemBuildError as e:
+                    form.add_error(None, str(e))
+                else:
+                    messages.success(request, f"Created {len(systems)} systems.")
+                    return redirect(self.get_success_url())
+        return self.render_to_response(self.get_context_data(form=form, formset=formset))
+
+def set_selected_system_status(view, form, selected):
+    status = form.cleaned_data['status']
+    updated = bulk_actions.set_system_status(view.get_queryset().filter(pk__in=selected.values('pk')), status)
+    return f"Set {updated} systems to {dict(System.STATUS_CHOICES)[status]}."
+
+class SystemBulkStatusView(BulkActionView):
+    form_class = SystemBulkStatusForm
+    list_url_name = 'room_incharge:system_list'
+    model = System
+    action = staticmethod(set_selected_system_status)
 
-class SystemUpdateView(LoginRequiredMixin, UpdateView):
+class SystemUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = System
     template_name = 'room_incharge/system_update.html'
     form_class = SystemForm
@@ -422,19 +480,12 @@ class SystemUpdateView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         system = form.save(commit=False)
         system.organisation = self.request.user.profile.org
-        system.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        system.room = self.room
         system.department = system.room.department  # Set the department field
         system.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class SystemDeleteView(LoginRequiredMixin, DeleteView):
+class SystemDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = System
     template_name = 'room_incharge/system_delete_confirm.html'
     slug_field = 'slug'
@@ -447,14 +498,7 @@ class SystemDeleteView(LoginRequiredMixin, DeleteView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class SystemComponentListView(LoginRequiredMixin, ListView):
+class SystemComponentListView(LoginRequiredMixin, RoomContextMixin, ListView):
     template_name = 'room_incharge/system_component_list.html'
     model = SystemComponent
     context_object_name = 'components'
@@ -466,13 +510,11 @@ class SystemComponentListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['system_slug'] = self.kwargs['system_slug']
-        context['room_slug'] = self.kwargs['room_slug']
         context['system'] = get_object_or_404(System, slug=self.kwargs['system_slug'])
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
+        context['archive_types'] = Archive.ARCHIVE_TYPES
         return context
 
-class SystemComponentCreateView(LoginRequiredMixin, CreateView):
+class SystemComponentCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = SystemComponent
     template_name = 'room_incharge/system_component_create.html'
     form_class = SystemComponentForm
@@ -485,34 +527,29 @@ class SystemComponentCreateView(LoginRequiredMixin, CreateView):
         component = form.save(commit=False)
         component.system = System.objects.get(slug=self.kwargs['system_slug'])
         try:
-            component.save()
-        except ValueError as e:
+            with transaction.atomic():
+                component.save()
+                # Adjust the available_count and in_use count of the associated Item
+                stock.assign(component.component_item_id, actor=self.request.user.profile, source=component)
+        except (ValueError, stock.InsufficientStock) as e:
             form.add_error(None, str(e))
             messages.error(self.request, str(e))
             return self.form_invalid(form)
         
-        # Adjust the available_count and in_use count of the associated Item
-        item = component.component_item
-        item.available_count -= 1
-        item.in_use += 1
-        item.save()
-        
         return redirect(self.get_success_url())
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
         kwargs['initial']['system'] = System.objects.get(slug=self.kwargs['system_slug'])
         return kwargs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['system_slug'] = self.kwargs['system_slug']
-        context['room_slug'] = self.kwargs['room_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class SystemComponentUpdateView(LoginRequiredMixin, UpdateView):
+class SystemComponentUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = SystemComponent
     template_name = 'room_incharge/system_component_update.html'
     form_class = SystemComponentForm
@@ -523,43 +560,37 @@ class SystemComponentUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:system_component_list', kwargs={'room_slug': self.kwargs['room_slug'], 'system_slug': self.kwargs['system_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         component = form.save(commit=False)
         component.system = System.objects.get(slug=self.kwargs['system_slug'])
         
-        # Get the old component item before saving the new one
-        old_component = SystemComponent.objects.get(pk=component.pk)
-        old_item = old_component.component_item
-        
         try:
-            component.save()
-        except ValueError as e:
+            with transaction.atomic():
+                # Lock the row so a concurrent edit can't move the stock of the same old item again
+                old_item_id = SystemComponent.objects.select_for_update().values_list('component_item_id', flat=True).get(pk=component.pk)
+                component.save()
+                # Adjust the counts if the item has changed
+                if old_item_id != component.component_item_id:
+                    stock.release(old_item_id, actor=self.request.user.profile, source=component)
+                    stock.assign(component.component_item_id, actor=self.request.user.profile, source=component)
+        except (ValueError, stock.InsufficientStock) as e:
             form.add_error(None, str(e))
             messages.error(self.request, str(e))
             return self.form_invalid(form)
         
-        # Adjust the counts if the item has changed
-        new_item = component.component_item
-        if old_item != new_item:
-            old_item.available_count += 1
-            old_item.in_use -= 1
-            old_item.save()
-            
-            new_item.available_count -= 1
-            new_item.in_use += 1
-            new_item.save()
-        
         return redirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['system_slug'] = self.kwargs['system_slug']
-        context['room_slug'] = self.kwargs['room_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class SystemComponentDeleteView(LoginRequiredMixin, DeleteView):
+class SystemComponentDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = SystemComponent
     template_name = 'room_incharge/system_component_delete_confirm.html'
     slug_field = 'slug'
@@ -575,12 +606,9 @@ class SystemComponentDeleteView(LoginRequiredMixin, DeleteView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['system_slug'] = self.kwargs['system_slug']
-        context['room_slug'] = self.kwargs['room_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class SystemComponentArchiveView(LoginRequiredMixin, FormView):
+class SystemComponentArchiveView(LoginRequiredMixin, RoomContextMixin, FormView):
     template_name = 'room_incharge/system_component_archive.html'
     form_class = SystemComponentArchiveForm
     success_url = reverse_lazy('room_incharge:system_component_list')
@@ -589,27 +617,30 @@ class SystemComponentArchiveView(LoginRequiredMixin, FormView):
         return reverse_lazy('room_incharge:system_component_list', kwargs={'room_slug': self.kwargs['room_slug'], 'system_slug': self.kwargs['system_slug']})
 
     def form_valid(self, form):
-        component = SystemComponent.objects.get(slug=self.kwargs['component_slug'])
+        component = get_object_or_404(SystemComponent.objects.select_related('component_item'), slug=self.kwargs['component_slug'])
         item = component.component_item
 
-        # Create an archive entry
-        Archive.objects.create(
-            organisation=item.organisation,
-            department=item.department,
-            room=item.room,
-            item=item,
-            count=1,
-            archive_type=form.cleaned_data['archive_type'],
-            remark=form.cleaned_data['remark']
-        )
-
-        # Update item counts
-        item.in_use -= 1
-        item.achived_count += 1
-        item.save()
-
-        # Delete the system component
-        component.delete()
+        try:
+            with transaction.atomic():
+                # Create an archive entry
+                archive = Archive.objects.create(
+                    organisation=item.organisation,
+                    department=item.department,
+                    room=self.room,
+                    item=item,
+                    count=1,
+                    archive_type=form.cleaned_data['archive_type'],
+                    remark=form.cleaned_data['remark']
+                )
+
+                # Update item counts
+                stock.archive_in_use(item, actor=self.request.user.profile, source=archive)
+
+                # Delete the system component
+                component.delete()
+        except stock.InsufficientStock as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
 
         return redirect(self.get_success_url())
 
@@ -621,44 +652,54 @@ class SystemComponentArchiveView(LoginRequiredMixin, FormView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['system_slug'] = self.kwargs['system_slug']
-        context['room_slug'] = self.kwargs['room_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class ArchiveListView(LoginRequiredMixin, ListView):
+def archive_selected_components(view, form, selected):
+    selected = list(selected)
+    bulk_actions.archive_components(
+        view.room, selected, form.cleaned_data['archive_type'], form.cleaned_data['remark'], actor=view.request.user.profile,
+    )
+    return f"Archived {len(selected)} components."
+
+class SystemComponentBulkArchiveView(BulkActionView):
+    form_class = SystemComponentBulkArchiveForm
+    list_url_name = 'room_incharge:system_component_list'
+    model = SystemComponent
+    room_lookup = 'system__room'
+    organisation_lookup = 'system__organisation'
+    action = staticmethod(archive_selected_components)
+
+    def get_list_kwargs(self):
+        return {'room_slug': self.kwargs['room_slug'], 'system_slug': self.kwargs['system_slug']}
+
+    def get_queryset(self):
+        return super().get_queryset().filter(system__slug=self.kwargs['system_slug']).select_related('component_item')
+
+class ArchiveListView(LoginRequiredMixin, RoomContextMixin, KeysetListMixin, ListView):
     template_name = 'room_incharge/archive_list.html'
     model = Archive
     context_object_name = 'archives'
+    sort_fields = {'archived': 'archived_on', 'count': 'count'}
+    default_sort = '-archived'
+    filter_fields = {'type': 'archive_type'}
+    date_field = 'archived_on'
 
     def get_queryset(self):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class PurchaseListView(LoginRequiredMixin, ListView):
+class PurchaseListView(LoginRequiredMixin, RoomContextMixin, KeysetListMixin, ListView):
     template_name = 'room_incharge/purchase_list.html'
     model = Purchase
     context_object_name = 'purchases'
+    sort_fields = {'created': 'created_on', 'updated': 'updated_on', 'quantity': 'quantity'}
+    filter_fields = {'status': 'status', 'added_to_stock': 'added_to_stock'}
 
     def get_queryset(self):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class PurchaseCreateView(LoginRequiredMixin, CreateView):
+class PurchaseCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = Purchase
     template_name = 'room_incharge/purchase_create.html'
     form_class = PurchaseForm
@@ -667,22 +708,20 @@ class PurchaseCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:purchase_list', kwargs={'room_slug': self.kwargs['room_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         purchase = form.save(commit=False)
         purchase.organisation = self.request.user.profile.org
-        purchase.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        purchase.room = self.room
         purchase.status = 'requested'  # Set default status to requested
         purchase.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class PurchaseUpdateView(LoginRequiredMixin, UpdateView):
+class PurchaseUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = Purchase
     template_name = 'room_incharge/purchase_update.html'
     form_class = PurchaseUpdateForm
@@ -693,6 +732,11 @@ class PurchaseUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:purchase_list', kwargs={'room_slug': self.kwargs['room_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         purchase = form.save(commit=False)
         if purchase.status != 'requested':
@@ -700,14 +744,7 @@ class PurchaseUpdateView(LoginRequiredMixin, UpdateView):
         purchase.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class PurchaseNewItemCreateView(LoginRequiredMixin, CreateView):
+class PurchaseNewItemCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = Purchase
     template_name = 'room_incharge/purchase_new_item_create.html'
     form_class = ItemPurchaseForm
@@ -716,8 +753,13 @@ class PurchaseNewItemCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:purchase_list', kwargs={'room_slug': self.kwargs['room_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
+        room = self.room
         item = Item.objects.create(
             organisation=self.request.user.profile.org,
             department=room.department,  # Set department from the associated room
@@ -737,14 +779,7 @@ class PurchaseNewItemCreateView(LoginRequiredMixin, CreateView):
         purchase.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class PurchaseDeleteView(LoginRequiredMixin, DeleteView):
+class PurchaseDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = Purchase
     template_name = 'room_incharge/purchase_delete_confirm.html'
     slug_field = 'slug'
@@ -754,14 +789,7 @@ class PurchaseDeleteView(LoginRequiredMixin, DeleteView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:purchase_list', kwargs={'room_slug': self.kwargs['room_slug']})
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class PurchaseCompleteView(LoginRequiredMixin, FormView):
+class PurchaseCompleteView(LoginRequiredMixin, RoomContextMixin, FormView):
     template_name = 'room_incharge/purchase_complete.html'
     form_class = PurchaseCompleteForm
     success_url = reverse_lazy('room_incharge:purchase_list')
@@ -781,44 +809,43 @@ class PurchaseCompleteView(LoginRequiredMixin, FormView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
         context['purchase_slug'] = self.kwargs['purchase_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class PurchaseAddToStockView(LoginRequiredMixin, View):
+class PurchaseAddToStockView(LoginRequiredMixin, RoomContextMixin, View):
     def get(self, request, *args, **kwargs):
-        purchase = get_object_or_404(Purchase, slug=self.kwargs['purchase_slug'])
-        if purchase.status == 'completed' and not purchase.added_to_stock:
-            item = purchase.item
-            item.total_count += purchase.quantity
-            item.available_count += purchase.quantity
-            if not item.is_listed:
-                item.is_listed = True
-            item.save()
-            purchase.added_to_stock = True
-            purchase.save()
-            messages.success(request, f"Added {purchase.quantity} {purchase.unit_of_measure} to {item.item_name} stock.")
+        purchase = get_object_or_404(Purchase.objects.select_related('item'), slug=self.kwargs['purchase_slug'])
+        with transaction.atomic():
+            # Claim the purchase first so that it can only ever be added once
+            claimed = Purchase.objects.filter(pk=purchase.pk, status='completed', added_to_stock=False).update(added_to_stock=True)
+            if claimed:
+                stock.add_to_stock(purchase.item_id, int(purchase.quantity), actor=request.user.profile, source=purchase)
+        if claimed:
+            messages.success(request, f"Added {purchase.quantity} {purchase.unit_of_measure} to {purchase.item.item_name} stock.")
         return redirect('room_incharge:purchase_list', room_slug=self.kwargs['room_slug'])
 
-class IssueListView(LoginRequiredMixin, ListView):
+class IssueListView(LoginRequiredMixin, RoomContextMixin, KeysetListMixin, ListView):
     template_name = 'room_incharge/issue_list.html'
     model = Issue
     context_object_name = 'issues'
+    sort_fields = {'created': 'created_on', 'updated': 'updated_on'}
+    filter_fields = {'resolved': 'resolved'}
 
     def get_queryset(self):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
+def resolve_selected_issues(view, form, selected):
+    resolved = bulk_actions.resolve_issues(view.get_queryset().filter(pk__in=selected.values('pk')))
+    return f"Resolved {resolved} issues."
+
+class IssueBulkResolveView(BulkActionView):
+    form_class = IssueBulkResolveForm
+    list_url_name = 'room_incharge:issue_list'
+    model = Issue
+    action = staticmethod(resolve_selected_issues)
 
-class ItemGroupListView(LoginRequiredMixin, ListView):
+class ItemGroupListView(LoginRequiredMixin, RoomContextMixin, ListView):
     template_name = 'room_incharge/item_group_list.html'
     model = ItemGroup
     context_object_name = 'item_groups'
@@ -827,14 +854,7 @@ class ItemGroupListView(LoginRequiredMixin, ListView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemGroupCreateView(LoginRequiredMixin, CreateView):
+class ItemGroupCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = ItemGroup
     template_name = 'room_incharge/item_group_create.html'
     form_class = ItemGroupForm
@@ -846,18 +866,11 @@ class ItemGroupCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         item_group = form.save(commit=False)
         item_group.organisation = self.request.user.profile.org
-        item_group.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        item_group.room = self.room
         item_group.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemGroupItemCreateView(LoginRequiredMixin, CreateView):
+class ItemGroupItemCreateView(LoginRequiredMixin, RoomContextMixin, CreateView):
     model = ItemGroupItem
     template_name = 'room_incharge/item_group_item_create.html'
     form_class = ItemGroupItemForm
@@ -865,19 +878,21 @@ class ItemGroupItemCreateView(LoginRequiredMixin, CreateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:item_group_item_list', kwargs={'room_slug': self.kwargs['room_slug'], 'item_group_slug': self.kwargs['item_group_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         item_group_item = form.save(commit=False)
         item_group_item.item_group = ItemGroup.objects.get(slug=self.kwargs['item_group_slug'])
-        item = item_group_item.item
-
-        # Adjust the available_count and in_use count of the associated Item
-        item.available_count -= item_group_item.qty
-        item.in_use += item_group_item.qty
 
         try:
-            item_group_item.save()
-            item.save()
-        except ValueError as e:
+            with transaction.atomic():
+                item_group_item.save()
+                # Adjust the available_count and in_use count of the associated Item
+                stock.assign(item_group_item.item_id, item_group_item.qty, actor=self.request.user.profile, source=item_group_item)
+        except (ValueError, stock.InsufficientStock) as e:
             form.add_error(None, str(e))
             return self.form_invalid(form)
 
@@ -885,13 +900,10 @@ class ItemGroupItemCreateView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['room_slug'] = self.kwargs['room_slug']
         context['item_group_slug'] = self.kwargs['item_group_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class ItemGroupItemListView(LoginRequiredMixin, ListView):
+class ItemGroupItemListView(LoginRequiredMixin, RoomContextMixin, ListView):
     template_name = 'room_incharge/item_group_item_list.html'
     model = ItemGroupItem
     context_object_name = 'item_group_items'
@@ -902,14 +914,11 @@ class ItemGroupItemListView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['room_slug'] = self.kwargs['room_slug']
         context['item_group_slug'] = self.kwargs['item_group_slug']
         context['item_group'] = get_object_or_404(ItemGroup, slug=self.kwargs['item_group_slug'])
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class ItemGroupUpdateView(LoginRequiredMixin, UpdateView):
+class ItemGroupUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = ItemGroup
     template_name = 'room_incharge/item_group_update.html'
     form_class = ItemGroupForm
@@ -923,18 +932,11 @@ class ItemGroupUpdateView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         item_group = form.save(commit=False)
         item_group.organisation = self.request.user.profile.org
-        item_group.room = Room.objects.get(slug=self.kwargs['room_slug'])
+        item_group.room = self.room
         item_group.save()
         return redirect(self.get_success_url())
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemGroupDeleteView(LoginRequiredMixin, DeleteView):
+class ItemGroupDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = ItemGroup
     template_name = 'room_incharge/item_group_delete_confirm.html'
     slug_field = 'slug'
@@ -947,14 +949,7 @@ class ItemGroupDeleteView(LoginRequiredMixin, DeleteView):
         room_slug = self.kwargs['room_slug']
         return super().get_queryset().filter(room__slug=room_slug, organisation=self.request.user.profile.org)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_slug'] = self.kwargs['room_slug']
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
-        return context
-
-class ItemGroupItemUpdateView(LoginRequiredMixin, UpdateView):
+class ItemGroupItemUpdateView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = ItemGroupItem
     template_name = 'room_incharge/item_group_item_update.html'
     form_class = ItemGroupItemForm
@@ -964,29 +959,33 @@ class ItemGroupItemUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse_lazy('room_incharge:item_group_item_list', kwargs={'room_slug': self.kwargs['room_slug'], 'item_group_slug': self.kwargs['item_group_slug']})
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['room'] = self.room
+        return kwargs
+
     def form_valid(self, form):
         item_group_item = form.save(commit=False)
-        item = item_group_item.item
-        old_qty = ItemGroupItem.objects.get(pk=item_group_item.pk).qty
-
-        # Adjust the available_count and in_use count of the associated Item
-        item.available_count += old_qty - item_group_item.qty
-        item.in_use -= old_qty - item_group_item.qty
-        item.save()
 
-        item_group_item.save()
+        try:
+            with transaction.atomic():
+                # Lock the row so a concurrent edit can't assign the same difference again
+                old_qty = ItemGroupItem.objects.select_for_update().values_list('qty', flat=True).get(pk=item_group_item.pk)
+                # Adjust the available_count and in_use count of the associated Item
+                stock.assign(item_group_item.item_id, item_group_item.qty - old_qty, actor=self.request.user.profile, source=item_group_item)
+                item_group_item.save()
+        except (ValueError, stock.InsufficientStock) as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
         return redirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['room_slug'] = self.kwargs['room_slug']
         context['item_group_slug'] = self.kwargs['item_group_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
 
-class ItemGroupItemDeleteView(LoginRequiredMixin, DeleteView):
+class ItemGroupItemDeleteView(LoginRequiredMixin, RoomContextMixin, DeleteView):
     model = ItemGroupItem
     template_name = 'room_incharge/item_group_item_delete_confirm.html'
     slug_field = 'slug'
@@ -1000,56 +999,127 @@ class ItemGroupItemDeleteView(LoginRequiredMixin, DeleteView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['room_slug'] = self.kwargs['room_slug']
         context['item_group_slug'] = self.kwargs['item_group_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
         return context
 
-class RoomSettingsView(LoginRequiredMixin, UpdateView):
+class RoomSettingsView(LoginRequiredMixin, RoomContextMixin, UpdateView):
     model = RoomSettings
     template_name = 'room_incharge/room_settings.html'
     form_class = RoomSettingsForm
     success_url = reverse_lazy('room_incharge:room_dashboard')
 
     def get_object(self):
-        room = get_object_or_404(Room, slug=self.kwargs['room_slug'])
-        return RoomSettings.objects.get_or_create(room=room)[0]
+        return self.room_settings
 
     def get_success_url(self):
         return reverse_lazy('room_incharge:room_settings', kwargs={'room_slug': self.kwargs['room_slug']})
 
+class RoomReportView(LoginRequiredMixin, RoomContextMixin, View):
+    def get(self, request, *args, **kwargs):
+        # Nothing in the room changed since the last report, serve it right away
+        cached_file = report_cache.get(self.room, report_cache.fingerprint(self.room, self.room_settings))
+        if cached_file is not None:
+            return FileResponse(cached_file, as_attachment=True, filename=f"{self.room.room_name}_report.pdf", content_type='application/pdf')
+
+        job = reports.enqueue_report(self.room, requested_by=request.user.profile)
+        return redirect('room_incharge:room_report_status', room_slug=self.kwargs['room_slug'], job_id=job.job_id)
+
+class RoomReportJobMixin(RoomContextMixin):
+    def get_job(self):
+        return get_object_or_404(ReportJob, job_id=self.kwargs['job_id'], room=self.room)
+
+    def get_download_url(self, job):
+        if job.status != 'done':
+            return None
+        return reverse_lazy('room_incharge:room_report_download', kwargs={'room_slug': self.kwargs['room_slug'], 'job_id': job.job_id})
+
+class RoomReportStatusView(LoginRequiredMixin, RoomReportJobMixin, TemplateView):
+    template_name = 'room_incharge/room_report_status.html'
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('format') == 'json':
+            job = self.get_job()
+            download_url = self.get_download_url(job)
+            return JsonResponse({
+                'status': job.status,
+                'error': job.error,
+                'download_url': str(download_url) if download_url else None,
+            })
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['room_slug'] = self.kwargs['room_slug']
-        room = Room.objects.get(slug=self.kwargs['room_slug'])
-        context['room_settings'] = RoomSettings.objects.get_or_create(room=room)[0]
+        context['job'] = job = self.get_job()
+        context['download_url'] = self.get_download_url(job)
         return context
 
-class RoomReportView(LoginRequiredMixin, View):
+class RoomReportDownloadView(LoginRequiredMixin, RoomReportJobMixin, View):
     def get(self, request, *args, **kwargs):
-        room_slug = self.kwargs['room_slug']
-        room = get_object_or_404(Room, slug=room_slug)
-        room_settings = RoomSettings.objects.get_or_create(room=room)[0]
-
-        context = {
-            'room': room,
-            'room_settings': room_settings,
-            'categories': Category.objects.filter(room=room) if room_settings.categories_tab else None,
-            'brands': Brand.objects.filter(room=room) if room_settings.brands_tab else None,
-            'items': Item.objects.filter(room=room) if room_settings.items_tab else None,
-            'systems': System.objects.filter(room=room) if room_settings.systems_tab else None,
-            'item_groups': ItemGroup.objects.filter(room=room) if room_settings.item_groups_tab else None,
-            'system_components': SystemComponent.objects.filter(system__room=room) if room_settings.systems_tab else None,
-            'purchases': Purchase.objects.filter(room=room),
-            'archives': Archive.objects.filter(room=room),
-            'issues': Issue.objects.filter(room=room),
-        }
-
-        html_string = render_to_string('room_incharge/room_report.html', context)
-        html = HTML(string=html_string)
-        pdf = html.write_pdf()
-
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{room.room_name}_report.pdf"'
-        return response
\ No newline at end of file
+        job = self.get_job()
+        if job.status != 'done':
+            raise Http404("The report is not ready yet.")
+        cached_file = report_cache.get(self.room, job.fingerprint)
+        if cached_file is None:
+            # Evicted from the report cache since, render it again
+            return redirect('room_incharge:room_report', room_slug=self.kwargs['room_slug'])
+        return FileResponse(cached_file, as_attachment=True, filename=f"{self.room.room_name}_report.pdf", content_type='application/pdf')
+
+class RoomExportView(LoginRequiredMixin, RoomContextMixin, View):
+    def get(self, request, *args, **kwargs):
+        dataset = self.kwargs['dataset']
+        export_format = request.GET.get('format', 'csv')
+        if dataset not in exports.DATASETS or export_format not in exports.FORMATS:
+            raise Http404("Unknown export.")
+        return exports.export_response(dataset, export_format, f"{self.room.slug}-{dataset}", room=self.room)
+
+class RoomSearchView(LoginRequiredMixin, RoomContextMixin, TemplateView):
+    template_name = 'room_incharge/search.html'
+
+    def get_page(self):
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+        return min(max(page, 1), search.MAX_PAGE)
+
+    def get_results(self):
+        page = self.get_page()
+        documents, has_next = search.search(self.room, self.request.GET.get('q', ''), page)
+        for document in documents:
+            document.url = search.result_url(document, self.kwargs['room_slug'])
+        return page, documents, has_next and page < search.MAX_PAGE
+
+    def get_page_query(self, page):
+        params = self.request.GET.copy()
+        params['page'] = page
+        return params.urlencode()
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('format') == 'json':
+            page, documents, has_next = self.get_results()
+            return JsonResponse({
+                'results': [
+                    {'kind': document.kind, 'title': document.title, 'text': document.text, 'url': document.url}
+                    for document in documents
+                ],
+                'page': page,
+                'has_next': has_next,
+            })
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page, documents, has_next = self.get_results()
+        context['query'] = self.request.GET.get('q', '')
+        context['results'] = documents
+        context['page_obj'] = page_obj = KeysetPage(
+            documents, has_next, page > 1,
+            next_query=self.get_page_query(page + 1) if has_next else None,
+            previous_query=self.get_page_query(page - 1) if page > 1 else None,
+        )
+        context['is_paginated'] = page_obj.has_other_pages()
+        return context
+
+class RoomAutocompleteView(LoginRequiredMixin, RoomContextMixin, View):
+    def get(self, request, *args, **kwargs):
+        return autocomplete.autocomplete_response(request, self.kwargs['source'], self.room.organisation_id, room=self.room)